@@ -0,0 +1,39 @@
+"""
+연결 입장 제어(admission control) - 토큰 버킷
+
+서버 재시작 직후처럼 로봇/브라우저가 한꺼번에 재연결할 때 등록 처리를 초당 rate개(순간 burst개)로
+제한한다. 토큰이 없으면 거절하지 않고 다음 토큰까지 남은 시간(retry_after)을 돌려주므로,
+클라이언트는 그만큼(+지터) 기다렸다가 다시 시도한다.
+"""
+
+from __future__ import annotations
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate                # 초당 보충되는 토큰 수
+        self.burst = burst              # 버킷 최대 토큰 수 (순간 허용량)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._deferred = 0              # 입장이 미뤄진 요청 수 (누적)
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """토큰 1개 사용. 입장 허용이면 0, 아니면 다시 시도할 때까지의 대기 시간(초)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            self._deferred += 1
+            # 이미 미뤄진 요청들이 같은 시각에 몰리지 않도록 지터 추가
+            return (1 - self._tokens) / self.rate + random.uniform(0, self.burst / self.rate)
+
+    @property
+    def deferred(self) -> int:
+        return self._deferred
@@ -1,15 +1,16 @@
 from __future__ import annotations
 from flask import Flask, render_template, request, jsonify, redirect, url_for
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room, ConnectionRefusedError
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from secrets import token_hex
 
+import os
 import time
 from datetime import datetime
 from functools import wraps
 
 # Blueprints
-from blueprints.custom_code_bp import custom_code_bp
+from blueprints.custom_code_bp import custom_code_bp, code_index
 from blueprints.tutorial_bp import tutorial_bp
 from blueprints.admin_bp import admin_bp
 from blueprints.robot_bp import robot_bp
@@ -19,12 +20,46 @@ from blueprints.auth_bp import auth_bp
 from auth import *
 from pathlib import Path
 
+# Async mode (eventlet/gevent는 run_server.py에서 monkey patch 후 import)
+from concurrency import ASYNC_MODE
+
+# Registry
+from registry import create_registries
+
+# Heartbeat
+from heartbeat import HeartbeatSweeper
+
+# Relay
+from relay import ImageRelay, OutputCoalescer, ControlThrottle, robot_room
+
+# Metrics
+from metrics import Metrics
+
+# Write-behind
+from writebehind import auth_writes, tutorial_writes
+
+# Migrations
+from migrations import migrate_all
+
+# Admission control
+from admission import TokenBucket
+
+# Syntax pre-check
+from codecheck import SyntaxChecker, format_syntax_error
+
+# Code upload (hash reference / delta)
+from codesync import CodeSync
+
 # DB 경로
 DB_PATH = Path(__file__).parent / "static" / "db" / "auth.db"
 
+# 멀티 워커 모드: Redis를 SocketIO 메시지 큐와 공유 레지스트리로 사용 (없으면 단일 프로세스)
+REDIS_URL = os.environ.get('PF_REDIS_URL')
+
 # Flask 앱 초기화
 app = Flask(__name__, static_folder='static', template_folder='templates')
-app.config['SECRET_KEY'] = token_hex(32)
+# 워커끼리 로그인 세션 쿠키를 공유하려면 PF_SECRET_KEY를 같은 값으로 지정
+app.config['SECRET_KEY'] = os.environ.get('PF_SECRET_KEY') or token_hex(32)
 app.register_blueprint(custom_code_bp)
 app.register_blueprint(tutorial_bp)
 app.register_blueprint(admin_bp)
@@ -40,26 +75,70 @@ login_manager.login_message_category = 'info'
 
 @login_manager.user_loader
 def load_user(user_id):
-    from auth import get_user, GuestUser
+    from auth import load_user_cached, GuestUser
     if user_id == 'guest':
         return GuestUser()
-    return get_user(user_id, by='id')
+    return load_user_cached(user_id)
 
 
 socketio = SocketIO(
     app,                                    # Flask 애플리케이션 인스턴스
     cors_allowed_origins="*",               # CORS 설정 - 모든 도메인 허용
-    async_mode='threading',                 # 비동기 모드 - 스레딩 사용
+    async_mode=ASYNC_MODE,                  # 비동기 모드 - PF_ASYNC_MODE (기본 threading)
     logger=False,                           # SocketIO 로거 비활성화
     engineio_logger=False,                  # Engine.IO 로거 비활성화
     ping_timeout=60,                        # 핑 타임아웃 60초
     ping_interval=25,                       # 핑 간격 25초
     transports=['websocket', 'polling'],    # 전송 방식 설정
-    allow_upgrades=True
+    allow_upgrades=True,
+    message_queue=REDIS_URL                 # 워커 간 emit 전달 (None이면 단일 프로세스)
 )
 
-# 로봇 관리 시스템
-registered_robots: dict[str, dict] = {}
+# 성능 지표 (/metrics, Prometheus 텍스트 형식) - 아래 @socketio.on 핸들러 정의보다 먼저 계측
+metrics = Metrics()
+metrics.instrument_socketio(socketio)
+metrics.instrument_flask(app)
+
+# 이미지 중계기 (위젯별 최신 프레임만 유지, 브라우저 수신 상태에 따라 로봇에 stream_hint 전송)
+SPECTATOR_MAX_FPS = 15              # 관전 room으로 보내는 위젯별 최대 fps
+ADAPTIVE_STREAM = True              # 적응형 fps/JPEG 품질 조정 사용 여부
+image_relay = ImageRelay(socketio, room_max_fps=SPECTATOR_MAX_FPS, adaptive=ADAPTIVE_STREAM)
+metrics.gauge('pf_image_frames_sent_total', '브라우저로 전송한 이미지 프레임 수',
+              lambda: image_relay.totals['sent'], kind='counter')
+metrics.gauge('pf_image_frames_dropped_total', '새 프레임으로 대체되어 전송하지 않은 이미지 프레임 수',
+              lambda: image_relay.totals['dropped'], kind='counter')
+metrics.gauge('pf_image_stream_degraded_total', '스트림 품질 하향(stream_hint) 횟수',
+              lambda: image_relay.totals['degraded'], kind='counter')
+metrics.gauge('pf_image_stream_recovered_total', '스트림 품질 복구(stream_hint) 횟수',
+              lambda: image_relay.totals['recovered'], kind='counter')
+metrics.gauge('pf_image_streams_degraded', '현재 품질을 낮춘 이미지 스트림 수', image_relay.degraded_streams)
+
+# stdout/stderr 배치 중계기
+OUTPUT_BATCH_BYTES = 16 * 1024      # 배치 크기 상한 (이 크기에 도달하면 즉시 전송)
+OUTPUT_BATCH_DELAY = 0.05           # 배치 최대 대기 시간 (초)
+OUTPUT_BUFFER_LIMIT = 256 * 1024    # 세션당 버퍼 상한 (초과분은 드롭)
+output_relay = OutputCoalescer(socketio,
+                               batch_bytes=OUTPUT_BATCH_BYTES,
+                               batch_delay=OUTPUT_BATCH_DELAY,
+                               buffer_limit=OUTPUT_BUFFER_LIMIT)
+
+# 웹 > 로봇 제어 이벤트 전송률 제한 (로봇/위젯별 초당 최대 전송 수, 마지막 값은 항상 전달)
+CONTROL_MAX_RATES = {
+    'slider_update': 20,
+    'pid_update': 10,
+    'gesture_update': 15,
+}
+control_throttle = ControlThrottle(socketio, CONTROL_MAX_RATES)
+
+# 로봇 관리 시스템 / 통합된 세션 관리 시스템 (PF_REDIS_URL이 있으면 워커 간 공유)
+registered_robots, integrated_mapping = create_registries(REDIS_URL)
+metrics.gauge('pf_connected_robots', '등록된 로봇 수', lambda: len(registered_robots))
+metrics.gauge('pf_connected_sessions', '연결된 SocketIO 세션 수', lambda: len(integrated_mapping))
+metrics.gauge('pf_user_cache_hits_total', 'user_loader 캐시 적중 수', lambda: user_cache.hits, kind='counter')
+metrics.gauge('pf_user_cache_misses_total', 'user_loader 캐시 미스 수', lambda: user_cache.misses, kind='counter')
+metrics.gauge('pf_user_cache_size', 'user_loader 캐시 항목 수', lambda: len(user_cache))
+metrics.gauge('pf_password_hash_running', '계산 중인 비밀번호 해시 수', lambda: password_pool.running)
+metrics.gauge('pf_password_hash_waiting', '차례를 기다리는 비밀번호 해시 수', lambda: password_pool.waiting)
 """
     "robot_123": {
         "name": "tbot",                    # 로봇 이름
@@ -72,8 +151,7 @@ registered_robots: dict[str, dict] = {}
         "session_id": "socket_session_456"      # 로봇의 SocketIO 세션 ID
     }
 """
-# 통합된 세션 관리 시스템
-integrated_mapping: dict[str, dict] = {}
+# 통합된 세션 정보
 """
     "socket_session_789": {
         "user_id": 123,
@@ -87,11 +165,71 @@ integrated_mapping: dict[str, dict] = {}
 # 로봇 버전 관리
 LATEST_ROBOT_VERSION = "1.1.2"  # 최신 로봇 버전
 
+# 로봇 생존 확인 (하트비트가 끊기면 offline 처리 후 세션 할당 해제, 오래 지나면 레지스트리에서 제거)
+ROBOT_HEARTBEAT_TIMEOUT = 30    # 초
+ROBOT_EVICT_AFTER = 600         # offline 이후 초
+heartbeat_sweeper = HeartbeatSweeper(socketio, registered_robots, integrated_mapping,
+                                     timeout=ROBOT_HEARTBEAT_TIMEOUT,
+                                     evict_after=ROBOT_EVICT_AFTER)
+heartbeat_sweeper.start()
+
+# DB 스키마 마이그레이션 (카탈로그 적재 전에 실행)
+migrate_all()
+
+# 저장 코드 파일 인덱스를 디렉터리와 대조 (서버 밖에서 바뀐 파일 반영)
+code_index.sync()
+
+# 로봇 카탈로그 (user_robot_assignments 메모리 사본) - 멀티 워커에서는 다른 워커의 변경을 주기적으로 재적재
+ROBOT_CATALOG_REFRESH = 5       # 초
+if REDIS_URL:
+    robot_catalog.refresh_interval = ROBOT_CATALOG_REFRESH
+robot_catalog.load()
+
+# 쓰기 지연 큐 (마지막 로그인, 튜토리얼 진행상황 등) - 백그라운드 배치 commit, 종료 시 flush
+auth_writes.start(socketio)
+tutorial_writes.start(socketio)
+metrics.gauge('pf_auth_write_queue_depth', 'auth.db 쓰기 지연 큐 길이', auth_writes.depth)
+metrics.gauge('pf_tutorial_write_queue_depth', 'tutorial.db 쓰기 지연 큐 길이', tutorial_writes.depth)
+
+# 재연결 폭주 입장 제어 (초당 등록 수 제한, 초과분은 retry_after 후 재시도 요청)
+ROBOT_ADMISSION_RATE = 200      # robot_connected 초당 처리 수
+ROBOT_ADMISSION_BURST = 500     # 순간 허용량
+WEB_ADMISSION_RATE = 100        # 로그인 사용자 connect 초당 처리 수
+WEB_ADMISSION_BURST = 200
+robot_admission = TokenBucket(ROBOT_ADMISSION_RATE, ROBOT_ADMISSION_BURST)
+web_admission = TokenBucket(WEB_ADMISSION_RATE, WEB_ADMISSION_BURST)
+metrics.gauge('pf_robot_admission_deferred_total', '입장이 미뤄진 robot_connected 수',
+              lambda: robot_admission.deferred, kind='counter')
+metrics.gauge('pf_web_admission_deferred_total', '입장이 미뤄진 웹 connect 수',
+              lambda: web_admission.deferred, kind='counter')
+
+# execute_code 전달 전 문법 검사 (코드 해시 캐시, PF_SYNTAX_CHECK_WORKERS)
+syntax_checker = SyntaxChecker()
+metrics.gauge('pf_syntax_check_cache_hits_total', '문법 검사 캐시 적중 수',
+              lambda: syntax_checker.cache.hits, kind='counter')
+metrics.gauge('pf_syntax_check_cache_misses_total', '문법 검사 캐시 미스 수',
+              lambda: syntax_checker.cache.misses, kind='counter')
+metrics.gauge('pf_syntax_check_waiting', '차례를 기다리는 문법 검사 수', lambda: syntax_checker.pool.waiting)
+
+# 로봇 코드 전송 (code_cache를 지원하는 로봇에는 해시 참조/delta 전송)
+code_sync = CodeSync()
+for kind in ('full', 'ref', 'delta'):
+    metrics.gauge(f'pf_code_upload_{kind}_total', f'execute_code 전송 수 ({kind})',
+                  lambda kind=kind: code_sync.sent[kind], kind='counter')
+metrics.gauge('pf_code_upload_cache_miss_total', '로봇 code_cache_miss 수', lambda: code_sync.misses, kind='counter')
+metrics.gauge('pf_code_upload_saved_chars_total', '해시 참조/delta로 줄인 코드 전송량(문자)',
+              lambda: code_sync.bytes_saved, kind='counter')
+
 
 # 전역 변수들을 app.config에 저장 (blueprint에서 접근 가능하도록)
 app.config['registered_robots'] = registered_robots
 app.config['integrated_mapping'] = integrated_mapping
 app.config['socketio'] = socketio
+app.config['image_relay'] = image_relay
+app.config['output_relay'] = output_relay
+app.config['control_throttle'] = control_throttle
+app.config['heartbeat_sweeper'] = heartbeat_sweeper
+app.config['metrics'] = metrics
 
 #- 페이지 목록 -#
 # 1. index : 랜딩 페이지
@@ -216,14 +354,19 @@ def handle_connect():
     print('웹 접속 인원 발생')
 
     if current_user.is_authenticated:
+        # 재연결 폭주 시 입장 지연 (클라이언트는 connect_error의 retry_after 후 재연결)
+        retry_after = web_admission.acquire()
+        if retry_after:
+            raise ConnectionRefusedError('서버 접속이 많아 잠시 후 다시 연결합니다.',
+                                         {'retry_after': round(retry_after, 2)})
         try:
-            integrated_mapping[request.sid] = {
+            integrated_mapping.add(request.sid, {
                 'user_id': current_user.id,
                 'username': current_user.username,
                 'email': current_user.email,
                 'role': current_user.role,
                 'assigned_robot': None  # 초기에는 로봇 할당 없음
-            }
+            })
             print(f"세션 : {request.sid} 사용자 : {current_user.username} (ID: {current_user.id}) 매핑")
         except Exception as e:
             print(f"사용자 매핑 오류: {e}")
@@ -237,9 +380,21 @@ def handle_disconnect():
 
     sid = request.sid
 
+    # 로봇 연결 해제: 세션 ID만 정리하고, 재연결 없이 하트비트 타임아웃이 지나면 스위퍼가 할당 해제
+    robot_id = registered_robots.robot_for_session(sid)
+    if robot_id:
+        registered_robots.update(robot_id, status='offline')
+        registered_robots.set_session(robot_id, None)
+        code_sync.discard(sid)
+        print(f"🤖 로봇 {robot_id} 연결 해제")
+
+    # 이미지/출력 중계 버퍼 정리
+    image_relay.discard_session(sid)
+    output_relay.discard_session(sid)
+
     # 통합된 세션 매핑 정리
-    if sid in integrated_mapping:
-        session_data = integrated_mapping.pop(sid)
+    session_data = integrated_mapping.remove(sid)
+    if session_data:
         user_info = {k: v for k, v in session_data.items() if k != "assigned_robot"}
         robot_id = session_data.get("assigned_robot")
 
@@ -253,10 +408,52 @@ def handle_disconnect():
 
             # 데이터베이스에서 로봇 할당 비활성화
             from auth import deactivate_robot_assignment
-            deactivate_robot_assignment(robot_id)
+            deactivate_robot_assignment(robot_id, defer=True)
             print(f"데이터베이스에서 로봇 {robot_id} 할당 비활성화")
 #endregion
 
+#region 로봇 스트림 관전
+def get_spectator_room():
+    """현재 이벤트를 보낸 로봇의 관전 room (등록되지 않은 로봇 세션이면 None)"""
+    robot_id = registered_robots.robot_for_session(request.sid)
+    return robot_room(robot_id) if robot_id else None
+
+@socketio.on('watch_robot') # 웹 > 서버
+def handle_watch_robot(data):
+    """로봇 스트림 관전 시작 (읽기 전용 - 코드 실행/제어 불가)"""
+    try:
+        robot_id = data.get('robot_id')
+        if not current_user.is_authenticated:
+            emit('watch_error', {'error': '로그인이 필요합니다.'})
+            return
+        if not robot_id:
+            emit('watch_error', {'error': 'robot_id가 필요합니다.'})
+            return
+
+        # 관리자 또는 해당 로봇이 할당된 사용자만 관전 가능
+        if current_user.role != 'admin' and robot_id not in get_user_robots(current_user.id):
+            emit('watch_error', {'error': '이 로봇을 관전할 권한이 없습니다.'})
+            return
+
+        join_room(robot_room(robot_id))
+        emit('watch_started', {'robot_id': robot_id})
+        print(f"세션 {request.sid}: 로봇 {robot_id} 관전 시작")
+    except Exception as e:
+        print(f"로봇 관전 시작 오류: {e}")
+        emit('watch_error', {'error': f'관전 시작 중 오류가 발생했습니다: {str(e)}'})
+
+@socketio.on('unwatch_robot') # 웹 > 서버
+def handle_unwatch_robot(data):
+    """로봇 스트림 관전 종료"""
+    try:
+        robot_id = data.get('robot_id')
+        if not robot_id: return
+        leave_room(robot_room(robot_id))
+        emit('watch_stopped', {'robot_id': robot_id})
+    except Exception as e:
+        print(f"로봇 관전 종료 오류: {e}")
+#endregion
+
 #region 로봇 코드 실행 + 출력
 @socketio.on('execute_code') # 웹 > 서버 > 로봇
 def handle_execute_code(data):
@@ -268,20 +465,29 @@ def handle_execute_code(data):
 
         sid = request.sid
 
-        # 로봇 할당 확인
-        session_data = integrated_mapping.get(sid, {})
-        robot_id = session_data.get("assigned_robot")
-        if not robot_id or robot_id not in registered_robots:
+        # 로봇 할당 및 로봇 세션 ID 확인
+        robot_id, robot_session_id = integrated_mapping.resolve_robot(sid)
+        if not robot_id:
             emit('execution_error', {'error': '로봇이 할당되지 않았습니다. 먼저 로봇을 선택하세요.'})
             return
 
-        # 로봇 세션 ID 확인
-        robot_session_id = registered_robots[robot_id].get('session_id')
         if not robot_session_id:
             emit('execution_error', {'error': '로봇 클라이언트의 세션 ID를 찾을 수 없습니다. 로봇이 연결되지 않았거나 재연결이 필요합니다.'})
             return
 
-        socketio.emit('execute_code', {'code': code, 'session_id': sid}, room=robot_session_id)
+        # 시작할 수 없는 코드(문법 오류)는 로봇에 보내지 않고 바로 알림
+        syntax_error = syntax_checker.check(code)
+        if syntax_error:
+            emit('execution_error', {'error': format_syntax_error(syntax_error), 'syntax_error': syntax_error})
+            return
+
+        # code_cache 지원 로봇에는 이전에 보낸 코드 기준으로 해시 참조/delta 전송
+        if registered_robots[robot_id].get('code_cache'):
+            payload = code_sync.prepare(robot_session_id, code, sid)
+        else:
+            payload = {'code': code}
+        payload['session_id'] = sid
+        socketio.emit('execute_code', payload, room=robot_session_id)
         emit('execution_started', {'message': f'로봇 {registered_robots[robot_id].get("name", robot_id)}에서 코드 실행을 시작합니다...'})
 
     except Exception as e:
@@ -292,15 +498,12 @@ def handle_stop_execution():
     try:
         sid = request.sid
 
-        # 로봇 할당 확인
-        session_data = integrated_mapping.get(sid, {})
-        robot_id = session_data.get("assigned_robot")
-        if not robot_id or robot_id not in registered_robots:
+        # 로봇 할당 및 로봇 세션 ID 확인
+        robot_id, robot_session_id = integrated_mapping.resolve_robot(sid)
+        if not robot_id:
             emit('execution_error', {'error': '로봇이 할당되지 않았습니다. 먼저 로봇을 선택하세요.'})
             return
 
-        # 로봇 세션 ID 확인
-        robot_session_id = registered_robots[robot_id].get('session_id')
         if not robot_session_id:
             emit('execution_error', {'error': '로봇 클라이언트의 세션 ID를 찾을 수 없습니다. 로봇이 연결되지 않았거나 재연결이 필요합니다.'})
             return
@@ -312,12 +515,37 @@ def handle_stop_execution():
         print(f"DEBUG: 코드 중지 요청 중 오류: {str(e)}")
         emit('execution_error', {'error': f'코드 중지 요청 중 오류가 발생했습니다: {str(e)}'})
 
+@socketio.on('code_cache_miss')
+def handle_code_cache_miss(data):
+    """로봇이 해시 참조/delta의 기준 프로그램을 가지고 있지 않음 -> 전체 코드로 다시 전송
+
+    등록된 로봇 세션에서 온 요청만 처리하고, 결과를 받을 브라우저 세션은 요청 내용이 아니라
+    코드를 보낼 때 기록해 둔 세션을 사용한다.
+    """
+    try:
+        if not registered_robots.robot_for_session(request.sid):
+            return
+        payload = code_sync.resend(request.sid, data.get('code_sha256'))
+        if payload is None:
+            print(f"코드 재전송 생략: {request.sid}의 code_cache_miss가 마지막 전송 코드와 다름")
+            return
+        emit('execute_code', payload)
+    except Exception as e:
+        print(f"코드 재전송 오류: {e}")
+
 @socketio.on('robot_finished')
 def handle_robot_finished(data):
     try:
         session_id = data.get('session_id')
         if not session_id: return
+        # 남은 출력을 먼저 보내야 브라우저에서 finished 이후에 출력이 붙지 않음
+        output_relay.flush(session_id, force=True)
         socketio.emit('finished', {'output': '실행 완료'}, room=session_id)
+
+        # 관전 중인 세션에도 전달
+        room = get_spectator_room()
+        if room:
+            socketio.emit('finished', {'output': '실행 완료'}, room=room, skip_sid=session_id)
     except Exception as e:
         print(f"로봇 finished 데이터 중계 오류: {e}")
 
@@ -328,7 +556,7 @@ def handle_robot_stdout(data):
         output = data.get('output')
         if not all([session_id, output]):
             return
-        socketio.emit('stdout', {'output': output}, room=session_id)
+        output_relay.push(session_id, 'stdout', output, room=get_spectator_room())
     except Exception as e:
         print(f"Robot stdout data relay error: {e}")
 
@@ -339,7 +567,7 @@ def handle_robot_stderr(data):
         output = data.get('output')
         if not all([session_id, output]):
             return
-        socketio.emit('stderr', {'output': output}, room=session_id)
+        output_relay.push(session_id, 'stderr', output, room=get_spectator_room())
     except Exception as e:
         print(f"Robot stderr data relay error: {e}")
 #endregion
@@ -347,7 +575,7 @@ def handle_robot_stderr(data):
 #region 로봇 커스텀 함수 관리
 @socketio.on('gesture_update')
 def handle_gesture_update(data):
-    """제스처 업데이트 데이터를 로봇에 직접 전달"""
+    """제스처 업데이트 데이터를 로봇에 전달"""
     try:
         sid = request.sid
         gesture_data = data.get('data')
@@ -355,31 +583,28 @@ def handle_gesture_update(data):
         if not gesture_data:
             return
 
-        # 로봇 할당 확인
-        session_data = integrated_mapping.get(sid, {})
-        robot_id = session_data.get("assigned_robot")
-        if not robot_id or robot_id not in registered_robots:
+        # 로봇 할당 및 로봇 세션 ID 확인
+        robot_id, robot_session_id = integrated_mapping.resolve_robot(sid)
+        if not robot_id:
             print(f"세션 {sid}: 로봇이 할당되지 않음")
             return
 
-        # 로봇 세션 ID 확인
-        robot_session_id = registered_robots[robot_id].get('session_id')
         if not robot_session_id:
             print(f"로봇 {robot_id}: 세션 ID를 찾을 수 없음")
             return
 
-        # 로봇에 직접 전달
-        socketio.emit('gesture_update', {
+        # 로봇에 전달 (전송률 제한, 최신 값 우선)
+        control_throttle.push(robot_id, robot_session_id, 'gesture_update', None, {
             'data': gesture_data,
             'session_id': sid
-        }, room=robot_session_id)
+        })
 
     except Exception as e:
         print(f"제스처 업데이트 전달 오류: {e}")
 
 @socketio.on('pid_update')
 def handle_pid_update(payload):
-    """PID 업데이트 데이터를 로봇에 직접 전달"""
+    """PID 업데이트 데이터를 로봇에 전달"""
     try:
         sid = request.sid
 
@@ -397,34 +622,31 @@ def handle_pid_update(payload):
             print(f"세션 {sid}: PID 값 변환 오류: {e}")
             return
 
-        # 로봇 할당 확인
-        session_data = integrated_mapping.get(sid, {})
-        robot_id = session_data.get("assigned_robot")
-        if not robot_id or robot_id not in registered_robots:
+        # 로봇 할당 및 로봇 세션 ID 확인
+        robot_id, robot_session_id = integrated_mapping.resolve_robot(sid)
+        if not robot_id:
             print(f"세션 {sid}: 로봇이 할당되지 않음")
             return
 
-        # 로봇 세션 ID 확인
-        robot_session_id = registered_robots[robot_id].get('session_id')
         if not robot_session_id:
             print(f"로봇 {robot_id}: 세션 ID를 찾을 수 없음")
             return
 
-        # 로봇에 직접 전달
-        socketio.emit('pid_update', {
+        # 로봇에 전달 (전송률 제한, 최신 값 우선)
+        control_throttle.push(robot_id, robot_session_id, 'pid_update', widget_id, {
             'widget_id': widget_id,
             'p': p,
             'i': i,
             'd': d,
             'session_id': sid
-        }, room=robot_session_id)
+        })
 
     except Exception as e:
         print(f"PID 업데이트 전달 오류: {e}")
 
 @socketio.on('slider_update')
 def handle_slider_update(payload):
-    """슬라이더 업데이트 데이터를 로봇에 직접 전달"""
+    """슬라이더 업데이트 데이터를 로봇에 전달"""
     try:
         sid = request.sid
 
@@ -439,25 +661,22 @@ def handle_slider_update(payload):
             print(f"세션 {sid}: values가 리스트가 아님")
             return
 
-        # 로봇 할당 확인
-        session_data = integrated_mapping.get(sid, {})
-        robot_id = session_data.get("assigned_robot")
-        if not robot_id or robot_id not in registered_robots:
+        # 로봇 할당 및 로봇 세션 ID 확인
+        robot_id, robot_session_id = integrated_mapping.resolve_robot(sid)
+        if not robot_id:
             print(f"세션 {sid}: 로봇이 할당되지 않음")
             return
 
-        # 로봇 세션 ID 확인
-        robot_session_id = registered_robots[robot_id].get('session_id')
         if not robot_session_id:
             print(f"로봇 {robot_id}: 세션 ID를 찾을 수 없음")
             return
 
-        # 로봇에 직접 전달
-        socketio.emit('slider_update', {
+        # 로봇에 전달 (전송률 제한, 최신 값 우선)
+        control_throttle.push(robot_id, robot_session_id, 'slider_update', widget_id, {
             'widget_id': widget_id,
             'values': values,
             'session_id': sid
-        }, room=robot_session_id)
+        })
 
     except Exception as e:
         print(f"슬라이더 업데이트 전달 오류: {e}")
@@ -472,11 +691,13 @@ def handle_robot_emit_image(data):
         if not all([session_id, image_data, widget_id]):
             return
 
-        # 브라우저로 이미지 데이터 중계
-        socketio.emit('image_data', {
-            'i': image_data,
-            'w': widget_id
-        }, room=session_id)
+        # 브라우저로 이미지 데이터 중계 (이전 프레임 ack 전이면 최신 프레임만 보관)
+        image_relay.push(session_id, widget_id, image_data, source_sid=request.sid)
+
+        # 관전 중인 세션에는 room으로 한 번만 전송
+        room = get_spectator_room()
+        if room:
+            image_relay.broadcast(room, widget_id, image_data, skip_sid=session_id)
 
     except Exception as e:
         print(f"로봇 이미지 데이터 중계 오류: {e}")
@@ -492,10 +713,16 @@ def handle_robot_emit_text(data):
             return
 
         # 브라우저로 텍스트 데이터 중계
-        socketio.emit('text_data', {
+        payload = {
             'text': text,
             'widget_id': widget_id
-        }, room=session_id)
+        }
+        socketio.emit('text_data', payload, room=session_id)
+
+        # 관전 중인 세션에는 room으로 한 번만 전송
+        room = get_spectator_room()
+        if room:
+            socketio.emit('text_data', payload, room=room, skip_sid=session_id)
 
     except Exception as e:
         print(f"로봇 텍스트 데이터 중계 오류: {e}")
@@ -507,9 +734,19 @@ def handle_robot_heartbeat(data):
     """로봇 하트비트 처리"""
     try:
         robot_id = data.get('robot_id')
-        if robot_id in registered_robots:
-            registered_robots[robot_id]['last_heartbeat'] = time.time()
-            registered_robots[robot_id]['status'] = 'online'
+        robot_info = registered_robots.get(robot_id) if robot_id else None
+        if robot_info is None:
+            return
+        heartbeat_sweeper.beat(robot_id)
+        robot_session_id = robot_info.get('session_id')
+        if robot_session_id and robot_session_id != request.sid:
+            # 다른 세션이 연결되어 있는 로봇: 세션을 가로채지 않도록 하트비트 시각만 갱신
+            registered_robots.update(robot_id, last_heartbeat=time.time())
+            return
+        registered_robots.update(robot_id, last_heartbeat=time.time(), status='online')
+        # offline 처리로 세션 ID가 정리된 뒤 하트비트가 다시 오면 복구 (재연결)
+        if not robot_session_id:
+            registered_robots.set_session(robot_id, request.sid)
     except Exception as e:
         print(f"로봇 하트비트 처리 오류: {e}")
 
@@ -520,23 +757,29 @@ def handle_robot_connected(data):
         robot_name = data.get('robot_name')
         hardware_enabled = data.get('hardware_enabled', False)
         robot_version = data.get('robot_version', '1.0.0')
-        print(f"🤖 로봇 연결: {robot_name} (ID: {robot_id}, 버전: {robot_version})")
+        code_cache = bool(data.get('code_cache', False))    # 해시 참조/delta 코드 전송 지원 여부
+
+        # 재연결 폭주 시 입장 지연 (로봇은 retry_after 후 robot_connected 재전송)
+        retry_after = robot_admission.acquire()
+        if retry_after:
+            emit('robot_registered', {
+                'success': False,
+                'deferred': True,
+                'retry_after': round(retry_after, 2),
+                'error': '서버 접속이 많아 등록이 지연되었습니다. 잠시 후 다시 시도하세요.'
+            })
+            return
 
-        # 데이터베이스에서 로봇 중복 등록 확인
-        from auth import is_robot_exist, append_robot_to_db
+        print(f"🤖 로봇 연결: {robot_name} (ID: {robot_id}, 버전: {robot_version})")
 
-        # 중복 등록이 아닌 경우에만 데이터베이스에 등록
-        if not is_robot_exist(robot_id):
-            db_success = append_robot_to_db(robot_id, robot_name)
-            if not db_success:
-                print(f"⚠️ 로봇 데이터베이스 등록 실패: {robot_name} (ID: {robot_id})")
-        else:
-            print(f"ℹ️ 로봇이 이미 등록되어 있음: {robot_name} (ID: {robot_id}) - 데이터베이스 등록 건너뜀")
+        # 처음 보는 로봇만 데이터베이스에 등록 (재연결은 메모리 카탈로그 확인으로 끝남)
+        if register_robot(robot_id, robot_name):
+            print(f"새 로봇 데이터베이스 등록 요청: {robot_name} (ID: {robot_id})")
 
         # 버전 비교
         needs_update = robot_version < LATEST_ROBOT_VERSION
 
-        registered_robots[robot_id] = {
+        registered_robots.register(robot_id, {
             "name": robot_name,
             "status": "online",
             "hardware_enabled": hardware_enabled,
@@ -544,8 +787,11 @@ def handle_robot_connected(data):
             "needs_update": needs_update,
             "connected_at": datetime.now().isoformat(),
             "last_heartbeat": time.time(),
-            "session_id": request.sid  # 로봇 클라이언트의 세션 ID 저장
-        }
+            "session_id": request.sid,  # 로봇 클라이언트의 세션 ID 저장
+            "code_cache": code_cache
+        })
+        heartbeat_sweeper.beat(robot_id)
+        code_sync.discard(request.sid)   # (재)등록한 로봇은 보관 프로그램 없이 시작
 
         emit('robot_registered', {
             'success': True,
@@ -578,7 +824,7 @@ def handle_client_update(data):
             return
 
         # 로봇 상태를 업데이트 중으로 변경
-        registered_robots[robot_id]['status'] = 'updating'
+        registered_robots.update(robot_id, status='updating')
 
         # 웹 클라이언트에게 업데이트 시작 알림
         emit('client_update', {'message': f'로봇 {registered_robots[robot_id].get("name", robot_id)}에서 업데이트 및 재시작을 시작합니다...'})
@@ -1,11 +1,91 @@
 import sqlite3
 import hashlib
+import hmac
+import os
+import secrets
 from datetime import datetime
 from flask_login import UserMixin
-from pathlib import Path
+from concurrency import offload, BoundedPool
+from db import auth_db, AUTH_DB_PATH
+from cache import TTLCache
+from catalog import RobotCatalog
+from writebehind import auth_writes
 
 # 데이터베이스 경로
-DB_PATH = Path(__file__).parent / "static" / "db" / "auth.db"
+DB_PATH = AUTH_DB_PATH
+
+# user_loader 캐시 (워커별, 다른 워커의 변경은 TTL 안에 반영)
+USER_CACHE_SIZE = 1024      # 최대 캐시 사용자 수
+USER_CACHE_TTL = 60         # 캐시 유효 시간 (초)
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# user_robot_assignments 메모리 사본 (로봇 조회는 DB를 거치지 않음, app.py 시작 시 적재)
+robot_catalog = RobotCatalog(auth_db, write_behind=auth_writes)
+
+# 비밀번호 해시 (PBKDF2-SHA256) - 반복 횟수가 클수록 느리고 안전함, 바꾸면 다음 로그인 때 다시 해시
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PF_PASSWORD_HASH_ITERATIONS', 200_000))
+# 동시에 해시를 계산하는 최대 작업 수 (나머지 CPU는 Socket.IO 중계용으로 남김)
+PASSWORD_HASH_WORKERS = int(os.environ.get('PF_PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+password_pool = BoundedPool(PASSWORD_HASH_WORKERS)
+
+# 자주 실행되는 쿼리 (util/check_query_plans.py가 같은 문자열로 인덱스 사용 여부를 확인)
+PASSWORD_ROW_SQL = '''
+    SELECT id, username, email, role, password_hash FROM users WHERE username = ?
+'''
+REPLACE_PASSWORD_HASH_SQL = '''
+    UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?
+'''
+USER_BY_ID_SQL = '''
+    SELECT id, username, email, role FROM users WHERE id = ?
+'''
+USER_BY_USERNAME_SQL = '''
+    SELECT id, username, email, role FROM users WHERE username = ?
+'''
+UPDATE_LAST_LOGIN_SQL = '''
+    UPDATE users SET last_login = ? WHERE id = ?
+'''
+# 미할당 행(user_id = 0)은 로봇당 1개 (idx_ura_unassigned_robot)
+UPSERT_UNASSIGNED_ROBOT_SQL = '''
+    INSERT INTO user_robot_assignments (robot_name, robot_id, is_active)
+    VALUES (?, ?, FALSE)
+    ON CONFLICT (robot_id) WHERE user_id = 0 DO UPDATE SET
+        robot_name = excluded.robot_name,
+        assigned_at = CURRENT_TIMESTAMP
+'''
+INSERT_ROBOT_IF_MISSING_SQL = '''
+    INSERT INTO user_robot_assignments (robot_name, robot_id, is_active)
+    SELECT ?, ?, FALSE
+    WHERE NOT EXISTS (SELECT 1 FROM user_robot_assignments WHERE robot_id = ?)
+    ON CONFLICT DO NOTHING
+'''
+ACTIVE_ROBOTS_FOR_USER_SQL = '''
+    SELECT robot_id FROM user_robot_assignments
+    WHERE user_id = ? AND is_active = TRUE
+'''
+DEACTIVATE_USER_ASSIGNMENTS_SQL = '''
+    UPDATE user_robot_assignments
+    SET is_active = FALSE
+    WHERE user_id = ? AND is_active = TRUE
+'''
+DEACTIVATE_OTHER_ASSIGNMENTS_SQL = '''
+    UPDATE user_robot_assignments
+    SET is_active = FALSE
+    WHERE robot_id = ? AND user_id != ? AND is_active = TRUE
+'''
+ASSIGN_ROBOT_SQL = '''
+    UPDATE user_robot_assignments
+    SET user_id = ?, is_active = TRUE, assigned_at = CURRENT_TIMESTAMP
+    WHERE robot_id = ? AND robot_name = ?
+'''
+DEACTIVATE_ROBOT_SQL = '''
+    UPDATE user_robot_assignments
+    SET is_active = FALSE
+    WHERE robot_id = ?
+'''
+DELETE_ROBOT_SQL = '''
+    DELETE FROM user_robot_assignments
+    WHERE robot_id = ?
+'''
 
 class User(UserMixin):
     def __init__(self, user_id, username, email, role='user'):
@@ -40,61 +120,91 @@ class GuestUser(UserMixin):
 
 # 사용자 인증
 def authenticate_user(username, password):
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT id, username, email, role, password_hash FROM users WHERE username = ?
-        ''', (username,))
-
-        row = cursor.fetchone()
-        conn.close()
+    user = check_credentials(username, password)
+    if user:
+        update_last_login(user.id)
+    return user
 
-        if row and verify_password(password, row[4]):
-            update_last_login(row[0])
-            return User(row[0], row[1], row[2], row[3])
-        return None
+def check_credentials(username, password):
+    """사용자명/비밀번호 확인 (해시 검증은 password_pool에서), 이전 형식 해시는 로그인 성공 시 다시 해시"""
+    try:
+        row = get_password_row(username)
+        if not row or not password_pool.run(verify_password, password, row[4]):
+            return None
+
+        if password_needs_rehash(row[4]):
+            new_hash = password_pool.run(hash_password, password)
+            auth_writes.submit(_replace_password_hash, row[0], row[4], new_hash)
+        return User(row[0], row[1], row[2], row[3])
     except Exception as e:
         print(f"사용자 인증 오류: {e}")
         return None
 
+@offload
+def get_password_row(username):
+    return auth_db.fetchone(PASSWORD_ROW_SQL, (username,))
+
+def _replace_password_hash(conn, user_id, old_hash, new_hash):
+    # 그 사이 비밀번호가 바뀌었으면 덮어쓰지 않음
+    conn.execute(REPLACE_PASSWORD_HASH_SQL, (new_hash, user_id, old_hash))
+
 # 사용자 생성
 def create_user(username, password, email, role='user'):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        password_hash = hash_password(password)
+        return _insert_user(username, password_pool.run(hash_password, password), email, role)
+    except Exception as e:
+        print(f"사용자 생성 오류: {e}")
+        return None
 
-        cursor.execute('''
+@offload
+def _insert_user(username, password_hash, email, role):
+    try:
+        cursor = auth_db.execute('''
             INSERT INTO users (username, password_hash, email, role)
             VALUES (?, ?, ?, ?)
         ''', (username, password_hash, email, role))
 
         user_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        user_cache.invalidate(str(user_id))
 
         return User(user_id, username, email, role)
     except sqlite3.IntegrityError:
         return None  # 사용자명 중복
-    except Exception as e:
-        print(f"사용자 생성 오류: {e}")
-        return None
 
 ##############################################################################
 
 # 비밀번호 해시화 및 검증
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+# 저장 형식: pbkdf2_sha256$반복 횟수$salt(hex)$해시(hex), 이전 형식: SHA-256 hex (salt 없음)
+PASSWORD_HASH_ALGORITHM = 'pbkdf2_sha256'
+
+def hash_password(password, iterations=None):
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
+    salt = secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+    return f"{PASSWORD_HASH_ALGORITHM}${iterations}${salt}${digest}"
 
 def verify_password(password, password_hash):
-    return hash_password(password) == password_hash
+    if '$' not in password_hash:
+        # 이전 형식 (SHA-256)
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), password_hash)
+    try:
+        algorithm, iterations, salt, digest = password_hash.split('$')
+        if algorithm != PASSWORD_HASH_ALGORITHM:
+            return False
+        computed = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), int(iterations)).hex()
+    except ValueError:
+        return False
+    return hmac.compare_digest(computed, digest)
+
+def password_needs_rehash(password_hash):
+    """이전 형식이거나 반복 횟수가 현재 설정과 다른 해시인지"""
+    parts = password_hash.split('$')
+    return len(parts) != 4 or parts[0] != PASSWORD_HASH_ALGORITHM or parts[1] != str(PASSWORD_HASH_ITERATIONS)
 
 ##############################################################################
 
 # 사용자 조회(ID 또는 사용자명)
+@offload
 def get_user(identifier, by='id'):
     """
     Args:
@@ -102,23 +212,13 @@ def get_user(identifier, by='id'):
         by: 'id' 또는 'username'
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
         if by == 'id':
-            cursor.execute('''
-                SELECT id, username, email, role FROM users WHERE id = ?
-            ''', (identifier,))
+            row = auth_db.fetchone(USER_BY_ID_SQL, (identifier,))
         elif by == 'username':
-            cursor.execute('''
-                SELECT id, username, email, role FROM users WHERE username = ?
-            ''', (identifier,))
+            row = auth_db.fetchone(USER_BY_USERNAME_SQL, (identifier,))
         else:
             raise ValueError("by 파라미터는 'id' 또는 'username'이어야 합니다.")
 
-        row = cursor.fetchone()
-        conn.close()
-
         if row:
             return User(row[0], row[1], row[2], row[3])
         return None
@@ -126,6 +226,16 @@ def get_user(identifier, by='id'):
         print(f"사용자 조회 오류: {e}")
         return None
 
+# Flask-Login user_loader용 ID 조회 (캐시 우선)
+def load_user_cached(user_id):
+    key = str(user_id)
+    user = user_cache.get(key)
+    if user is None:
+        user = get_user(user_id, by='id')
+        if user:
+            user_cache.set(key, user)
+    return user
+
 ##############################################################################
 
 # users 테이블 관련 함수수
@@ -144,18 +254,14 @@ def get_user(identifier, by='id'):
 
 
 
-# 마지막 로그인 시간 업데이트
-def update_last_login(user_id):
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
 
-        cursor.execute('''
-            UPDATE users SET last_login = ? WHERE id = ?
-        ''', (datetime.now().isoformat(), user_id))
+# 마지막 로그인 시간 업데이트 (쓰기 지연 큐로 기록)
+def update_last_login(user_id):
+    def write(conn, user_id, last_login):
+        conn.execute(UPDATE_LAST_LOGIN_SQL, (last_login, user_id))
 
-        conn.commit()
-        conn.close()
+    try:
+        auth_writes.submit(write, user_id, datetime.now().isoformat())
     except Exception as e:
         print(f"로그인 시간 업데이트 오류: {e}")
 
@@ -166,73 +272,41 @@ def update_last_login(user_id):
 # 사용자에게 할당된 로봇 목록 조회
 def get_user_robots(user_id):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT robot_id FROM user_robot_assignments
-            WHERE user_id = ?
-        ''', (user_id,))
-
-        rows = cursor.fetchall()
-        conn.close()
-
-        return [row[0] for row in rows]
+        return robot_catalog.robot_ids_for_user(user_id)
     except Exception as e:
         print(f"사용자 로봇 조회 오류: {e}")
         return []
 
 # 사용자에게 로봇 할당
 def assign_robot_to_user(user_id, robot_id):
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
+    def write(conn, user_id, robot_id):
         # 기존 할당 비활성화
-        cursor.execute('''
+        conn.execute('''
             UPDATE user_robot_assignments
             SET is_active = FALSE
             WHERE user_id = ? AND robot_id = ?
         ''', (user_id, robot_id))
 
         # 새 할당 생성
-        cursor.execute('''
+        conn.execute('''
             INSERT INTO user_robot_assignments (user_id, robot_id)
             VALUES (?, ?)
         ''', (user_id, robot_id))
+        return True, [robot_id]
 
-        conn.commit()
-        conn.close()
-        return True
+    try:
+        return robot_catalog.write(write, user_id, robot_id)
     except Exception as e:
         print(f"로봇 할당 오류: {e}")
         return False
 
-# 데이터베이스에서 로봇 이름 조회
+# 데이터베이스에서 로봇 이름 조회 (로봇 ID 기반 기본 이름, DB 조회 없음)
 def get_robot_name_from_db(robot_id):
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # user_robot_assignments 테이블에서 로봇 ID로 할당된 사용자 찾기
-        cursor.execute('''
-            SELECT ura.robot_id, ura.assigned_at
-            FROM user_robot_assignments ura
-            WHERE ura.robot_id = ? AND ura.is_active = TRUE
-            ORDER BY ura.assigned_at DESC
-            LIMIT 1
-        ''', (robot_id,))
-
-        row = cursor.fetchone()
-        conn.close()
+    return default_robot_name(robot_id)
 
-        if row:
-            # 로봇 ID를 기반으로 기본 이름 생성
-            return f"Robot {robot_id[:8]}"
-        return f"Robot {robot_id[:8]}"
-    except Exception as e:
-        print(f"로봇 이름 조회 오류: {e}")
-        return f"Robot {robot_id[:8]}"
+def default_robot_name(robot_id):
+    """DB에 이름 정보가 없는 로봇의 표시 이름"""
+    return f"Robot {robot_id[:8]}"
 
 
 
@@ -251,104 +325,84 @@ def get_robot_name_from_db(robot_id):
 
 
 
-# 로봇을 데이터베이스에 등록 (사용자 할당 없이)
+# 로봇을 데이터베이스에 등록 (사용자 할당 없이, 미할당 행이 있으면 이름/시각 갱신)
 def append_robot_to_db(robot_id, robot_name):
+    def write(conn, robot_id, robot_name):
+        conn.execute(UPSERT_UNASSIGNED_ROBOT_SQL, (robot_name, robot_id))
+        print(f"로봇 등록/업데이트: {robot_name} (ID: {robot_id})")
+        return True, [robot_id]
+
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT id FROM user_robot_assignments
-            WHERE robot_id = ? AND user_id = 0
-        ''', (robot_id,))
-
-        existing_robot = cursor.fetchone()
-
-        if existing_robot:
-            cursor.execute('''
-                UPDATE user_robot_assignments
-                SET robot_name = ?, assigned_at = CURRENT_TIMESTAMP
-                WHERE robot_id = ? AND user_id = 0
-            ''', (robot_name, robot_id))
-            print(f"로봇 정보 업데이트: {robot_name} (ID: {robot_id})")
-        else:
-            cursor.execute('''
-                INSERT INTO user_robot_assignments (robot_name, robot_id, is_active)
-                VALUES (?, ?, FALSE)
-            ''', (robot_name, robot_id))
-            print(f"새 로봇 등록: {robot_name} (ID: {robot_id})")
-
-        conn.commit()
-        conn.close()
-        return True
+        return robot_catalog.write(write, robot_id, robot_name)
     except Exception as e:
         print(f"로봇 등록 오류: {e}")
         return False
 
-# 사용자에게 로봇 할당 (로봇 이름으로 찾아서 할당)
-def assign_robot_to_user(user_id, robot_name):
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+def _insert_robot_if_missing(conn, robot_id, robot_name):
+    # 어떤 행으로든 이미 있는 로봇이면 아무것도 하지 않음 (여러 번 실행해도 결과가 같음)
+    cursor = conn.execute(INSERT_ROBOT_IF_MISSING_SQL, (robot_name, robot_id, robot_id))
+    if cursor.rowcount:
+        print(f"새 로봇 등록: {robot_name} (ID: {robot_id})")
+    return cursor.rowcount > 0, [robot_id]
 
-        # 해당 로봇 이름으로 등록된 로봇 찾기 (가장 최근에 등록한 것)
-        cursor.execute('''
-            SELECT robot_id FROM user_robot_assignments
-            WHERE robot_name = ?
-            ORDER BY assigned_at DESC
-            LIMIT 1
-        ''', (robot_name,))
+# 로봇 연결 시 등록 (재연결 폭주 대응)
+def register_robot(robot_id, robot_name):
+    """처음 보는 로봇이면 데이터베이스에 등록, 이미 있으면 DB를 건드리지 않음
 
-        robot_record = cursor.fetchone()
+    카탈로그에 있는 로봇(재연결)은 메모리 조회만으로 끝나고, 새 로봇은 단일 INSERT 문을
+    쓰기 지연 큐에 넣어 동시에 들어온 다른 등록과 한 트랜잭션으로 commit한다.
+    """
+    try:
+        if robot_catalog.exists(robot_id):
+            return False
+        robot_catalog.defer(_insert_robot_if_missing, robot_id, robot_name)
+        return True
+    except Exception as e:
+        print(f"로봇 등록 오류: {e}")
+        return False
 
-        if not robot_record:
-            conn.close()
-            return False, f"등록된 로봇을 찾을 수 없습니다: {robot_name}"
+def _assign_robot(conn, user_id, robot_id, robot_name):
+    """로봇을 사용자에게 단독 할당 (호출한 쪽의 트랜잭션 안에서), 영향받은 robot_id 목록 반환"""
+    # 비활성화될 사용자의 다른 로봇도 메모리에 반영
+    robot_ids = [row[0] for row in conn.execute(ACTIVE_ROBOTS_FOR_USER_SQL, (user_id,))]
 
-        robot_id = robot_record[0]
+    # 기존 사용자의 다른 로봇 할당 비활성화
+    conn.execute(DEACTIVATE_USER_ASSIGNMENTS_SQL, (user_id,))
 
-        # 기존 사용자의 다른 로봇 할당 비활성화
-        cursor.execute('''
-            UPDATE user_robot_assignments
-            SET is_active = FALSE
-            WHERE user_id = ? AND is_active = TRUE
-        ''', (user_id,))
+    # 해당 로봇이 다른 사용자에게 할당되어 있다면 비활성화
+    conn.execute(DEACTIVATE_OTHER_ASSIGNMENTS_SQL, (robot_id, user_id))
 
-        # 해당 로봇이 다른 사용자에게 할당되어 있다면 비활성화
-        cursor.execute('''
-            UPDATE user_robot_assignments
-            SET is_active = FALSE
-            WHERE robot_id = ? AND user_id != ? AND is_active = TRUE
-        ''', (robot_id, user_id))
+    # 해당 로봇을 사용자에게 할당
+    conn.execute(ASSIGN_ROBOT_SQL, (user_id, robot_id, robot_name))
+    return robot_ids + [robot_id]
 
-        # 해당 로봇을 사용자에게 할당
-        cursor.execute('''
-            UPDATE user_robot_assignments
-            SET user_id = ?, is_active = TRUE, assigned_at = CURRENT_TIMESTAMP
-            WHERE robot_id = ? AND robot_name = ?
-        ''', (user_id, robot_id, robot_name))
+# 사용자에게 로봇 할당 (로봇 이름으로 찾아서 할당)
+def assign_robot_to_user(user_id, robot_name):
+    # 해당 로봇 이름으로 등록된 로봇 찾기 (가장 최근에 등록한 것)
+    robot_id = robot_catalog.robot_id_by_name(robot_name)
+    if not robot_id:
+        return False, f"등록된 로봇을 찾을 수 없습니다: {robot_name}"
 
-        conn.commit()
-        conn.close()
-        return True, f"로봇 {robot_name}이 할당되었습니다"
+    def write(conn, user_id, robot_id, robot_name):
+        robot_ids = _assign_robot(conn, user_id, robot_id, robot_name)
+        return (True, f"로봇 {robot_name}이 할당되었습니다"), robot_ids
 
+    try:
+        return robot_catalog.write(write, user_id, robot_id, robot_name)
     except Exception as e:
         return False, f"로봇 할당 오류: {e}"
 
-def deactivate_robot_assignment(robot_id):
-    """로봇 할당을 비활성화"""
+def deactivate_robot_assignment(robot_id, defer=False):
+    """로봇 할당을 비활성화 (defer=True면 쓰기 지연 큐로 기록)"""
+    def write(conn, robot_id):
+        conn.execute(DEACTIVATE_ROBOT_SQL, (robot_id,))
+        return True, [robot_id]
+
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE user_robot_assignments
-            SET is_active = FALSE
-            WHERE robot_id = ?
-        ''', (robot_id,))
-        
-        conn.commit()
-        conn.close()
+        if defer:
+            robot_catalog.defer(write, robot_id)
+        else:
+            robot_catalog.write(write, robot_id)
         print(f"로봇 {robot_id} 할당이 비활성화되었습니다")
         return True
     except Exception as e:
@@ -358,19 +412,193 @@ def deactivate_robot_assignment(robot_id):
 def is_robot_exist(robot_id):
     """로봇이 데이터베이스에 존재하는지 확인"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        return robot_catalog.exists(robot_id)
+    except Exception as e:
+        print(f"로봇 존재 확인 오류: {e}")
+        return False
+
+def delete_robot_from_db(robot_id):
+    """로봇 할당 정보 삭제, 삭제된 행 수 반환"""
+    def write(conn, robot_id):
+        cursor = conn.execute(DELETE_ROBOT_SQL, (robot_id,))
+        return cursor.rowcount, [robot_id]
+
+    try:
+        return robot_catalog.write(write, robot_id)
+    except Exception as e:
+        print(f"데이터베이스 로봇 삭제 오류: {e}")
+        return 0
 
-        cursor.execute('''
-            SELECT id FROM user_robot_assignments
-            WHERE robot_id = ?
-        ''', (robot_id,))
+##############################################################################
 
-        existing_robot = cursor.fetchone()
-        conn.close()
+# 관리자 페이지 조회 (로봇/세션 수에 관계없이 쿼리 수가 일정한 집합 단위 조회)
 
-        return existing_robot is not None
+USER_COLUMNS = ('id', 'username', 'email', 'role', 'created_at', 'last_login')
+SQLITE_MAX_VARIABLES = 900      # IN (...) 한 번에 넣을 최대 파라미터 수
+USERS_BY_IDS_SQL = f"SELECT {', '.join(USER_COLUMNS)} FROM users WHERE id IN ({{}})"     # {}: id 수만큼 ?
 
+def get_active_assignments():
+    """활성 할당 전체 [(user_id, robot_id), ...] (최근 할당 순)"""
+    try:
+        return robot_catalog.active_assignments()
     except Exception as e:
-        print(f"로봇 존재 확인 오류: {e}")
-        return False
\ No newline at end of file
+        print(f"데이터베이스 로봇 할당 조회 오류: {e}")
+        return []
+
+@offload
+def get_users_page(search=None, role=None, limit=None, offset=0):
+    """사용자 목록 페이지 조회, (필터 적용 전체 수, 사용자 dict 목록) 반환
+
+    Args:
+        search: 사용자명/이메일 부분 일치
+        role: 역할 일치
+        limit: 최대 개수 (None이면 전체)
+        offset: 건너뛸 개수
+    """
+    where, params = [], []
+    if search:
+        where.append("(username LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\')")
+        pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        params += [pattern, pattern]
+    if role:
+        where.append("role = ?")
+        params.append(role)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+
+    try:
+        with auth_db.connection() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM users {where_sql}", params).fetchone()[0]
+            rows = conn.execute(f'''
+                SELECT {', '.join(USER_COLUMNS)} FROM users {where_sql}
+                ORDER BY id
+                LIMIT ? OFFSET ?
+            ''', params + [-1 if limit is None else limit, offset]).fetchall()
+        return total, [dict(zip(USER_COLUMNS, row)) for row in rows]
+    except Exception as e:
+        print(f"데이터베이스 사용자 조회 오류: {e}")
+        return 0, []
+
+@offload
+def get_users_by_ids(user_ids):
+    """사용자 ID 목록 -> {user_id: 사용자 dict}"""
+    user_ids = list(user_ids)
+    users = {}
+    try:
+        with auth_db.connection() as conn:
+            for i in range(0, len(user_ids), SQLITE_MAX_VARIABLES):
+                chunk = user_ids[i:i + SQLITE_MAX_VARIABLES]
+                rows = conn.execute(USERS_BY_IDS_SQL.format(', '.join('?' * len(chunk))), chunk).fetchall()
+                for row in rows:
+                    users[row[0]] = dict(zip(USER_COLUMNS, row))
+    except Exception as e:
+        print(f"데이터베이스 사용자 조회 오류: {e}")
+    return users
+
+##############################################################################
+
+# 일괄 계정 생성 (수업용 사용자 + 로봇 할당)
+
+PROVISION_MAX_ROWS = 1000       # 요청당 최대 행 수
+PROVISION_ROLES = ('user', 'admin')
+EXISTING_USERNAMES_SQL = "SELECT username FROM users WHERE username IN ({})"     # {}: 사용자명 수만큼 ?
+
+@offload
+def get_existing_usernames(usernames):
+    """이미 사용 중인 사용자명 집합"""
+    usernames = list(usernames)
+    existing = set()
+    with auth_db.connection() as conn:
+        for i in range(0, len(usernames), SQLITE_MAX_VARIABLES):
+            chunk = usernames[i:i + SQLITE_MAX_VARIABLES]
+            existing.update(row[0] for row in conn.execute(
+                EXISTING_USERNAMES_SQL.format(', '.join('?' * len(chunk))), chunk))
+    return existing
+
+def _check_provision_row(row, existing, seen_usernames, seen_robots):
+    """행 검증, (오류 메시지 또는 None, robot_id, robot_name) 반환"""
+    username = row.get('username')
+    if not username or not row.get('password'):
+        return "사용자명과 비밀번호가 필요합니다.", None, None
+    if len(row['password']) < 6:
+        return "비밀번호는 6자 이상이어야 합니다.", None, None
+    if (row.get('role') or 'user') not in PROVISION_ROLES:
+        return f"역할은 {', '.join(PROVISION_ROLES)} 중 하나여야 합니다.", None, None
+    if username in existing or username in seen_usernames:
+        return "이미 존재하는 사용자명입니다.", None, None
+
+    robot_id = row.get('robot_id')
+    robot_name = row.get('robot_name')
+    if robot_id:
+        if not robot_catalog.exists(robot_id):
+            return f"등록된 로봇을 찾을 수 없습니다: {robot_id}", None, None
+        robot_name = robot_catalog.name(robot_id)
+    elif robot_name:
+        robot_id = robot_catalog.robot_id_by_name(robot_name)
+        if not robot_id:
+            return f"등록된 로봇을 찾을 수 없습니다: {robot_name}", None, None
+    if robot_id and robot_id in seen_robots:
+        return f"같은 로봇이 여러 사용자에게 할당되어 있습니다: {robot_id}", None, None
+    return None, robot_id, robot_name
+
+def provision_users(rows):
+    """사용자/로봇 할당 목록을 검증 후 한 트랜잭션으로 생성하고 행별 결과 반환
+
+    비밀번호 해시는 password_pool에서 병렬로 계산하고, 행마다 SAVEPOINT를 두어 실패한 행만 되돌린다.
+
+    Args:
+        rows: [{"username", "password", "email", "role", "robot_id" 또는 "robot_name"}, ...]
+    Returns:
+        [{"row": 행 번호, "username", "status": "created" | "error", "user_id", "robot_id", "error"}, ...]
+    """
+    results = [{"row": index, "username": row.get('username'), "status": "error"}
+               for index, row in enumerate(rows, 1)]
+    existing = get_existing_usernames({row['username'] for row in rows if row.get('username')})
+
+    valid = []      # (결과, 행, robot_id, robot_name)
+    seen_usernames, seen_robots = set(), set()
+    for result, row in zip(results, rows):
+        error, robot_id, robot_name = _check_provision_row(row, existing, seen_usernames, seen_robots)
+        if error:
+            result["error"] = error
+            continue
+        seen_usernames.add(row['username'])
+        if robot_id:
+            seen_robots.add(robot_id)
+        valid.append((result, row, robot_id, robot_name))
+
+    if not valid:
+        return results
+
+    password_hashes = password_pool.map(hash_password, [row['password'] for _, row, _, _ in valid])
+
+    def write(conn, entries):
+        conn.execute('BEGIN')   # 행별 SAVEPOINT를 감싸는 하나의 트랜잭션
+        outcomes, robot_ids = [], []
+        for row, password_hash, robot_id, robot_name in entries:
+            conn.execute('SAVEPOINT provision_row')
+            try:
+                user_id = conn.execute('''
+                    INSERT INTO users (username, password_hash, email, role)
+                    VALUES (?, ?, ?, ?)
+                ''', (row['username'], password_hash, row.get('email') or None, row.get('role') or 'user')).lastrowid
+                if robot_id:
+                    robot_ids += _assign_robot(conn, user_id, robot_id, robot_name)
+                conn.execute('RELEASE provision_row')
+                outcomes.append((user_id, None))
+            except sqlite3.Error as e:
+                conn.execute('ROLLBACK TO provision_row')
+                conn.execute('RELEASE provision_row')
+                outcomes.append((None, "이미 존재하는 사용자명입니다." if isinstance(e, sqlite3.IntegrityError) else str(e)))
+        return outcomes, robot_ids
+
+    entries = [(row, password_hash, robot_id, robot_name)
+               for (_, row, robot_id, robot_name), password_hash in zip(valid, password_hashes)]
+    outcomes = robot_catalog.write(write, entries)
+
+    for (result, _, robot_id, _), (user_id, error) in zip(valid, outcomes):
+        if error:
+            result["error"] = error
+            continue
+        user_cache.invalidate(str(user_id))
+        result.update(status="created", user_id=user_id, robot_id=robot_id)
+    return results
@@ -2,220 +2,283 @@
 관리자 페이지 관련 블루프린트
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_login import login_required, current_user
-import sqlite3
-import time
+from collections import Counter
 from datetime import datetime
-from pathlib import Path
-
-# 데이터베이스 경로
-DB_PATH = Path(__file__).parent.parent / "static" / "db" / "auth.db"
+import csv
+import io
+import json
+from auth import default_robot_name, get_active_assignments, get_users_page, get_users_by_ids
+from auth import provision_users, PROVISION_MAX_ROWS
 
 admin_bp = Blueprint('admin_bp', __name__)
 
+ADMIN_SECTIONS = ('sessions', 'robots', 'users')
+PROVISION_FIELDS = ('username', 'password', 'email', 'role', 'robot_id', 'robot_name')
+
 # 전역 변수들을 import하기 위한 함수들
 def get_global_variables():
-    """전역 변수들을 가져오는 함수"""
-    from app import integrated_mapping, registered_robots
-    from auth import get_robot_name_from_db
-    
+    """전역 변수들을 가져오는 함수 (app.py와 같은 레지스트리 인스턴스)"""
     return {
-        'integrated_mapping': integrated_mapping,
-        'registered_robots': registered_robots,
-        'get_robot_name_from_db': get_robot_name_from_db
+        'integrated_mapping': current_app.config.get('integrated_mapping', {}),
+        'registered_robots': current_app.config.get('registered_robots', {})
     }
 
+def get_page_args(section):
+    """섹션별 페이지 파라미터 ({section}_limit / {section}_offset, 없으면 limit / offset)"""
+    limit = request.args.get(f'{section}_limit', request.args.get('limit'))
+    offset = request.args.get(f'{section}_offset', request.args.get('offset', 0))
+    limit = int(limit) if limit not in (None, '') else None
+    offset = int(offset or 0)
+    if (limit is not None and limit < 0) or offset < 0:
+        raise ValueError(f"{section} limit/offset은 0 이상이어야 합니다.")
+    return limit, offset
+
+def get_bool_arg(name):
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+def paginate(items, limit, offset):
+    return items[offset:] if limit is None else items[offset:offset + limit]
+
+def robot_status(robot_info):
+    """레지스트리의 로봇 정보 -> (온라인 여부, 마지막 하트비트 ISO 문자열)"""
+    last_seen = robot_info.get('last_heartbeat', 0)
+    is_online = robot_info.get('status') != 'offline'
+    return is_online, datetime.fromtimestamp(last_seen).isoformat() if last_seen else None
+
 @admin_bp.route('/api/admin/status', methods=['GET'])
 @login_required
 def get_admin_status():
-    """관리자 페이지용 전체 상태 정보 조회"""
+    """관리자 페이지용 전체 상태 정보 조회
+
+    Query:
+        include: 포함할 섹션 (sessions,robots,users - 기본 전체)
+        limit / offset: 모든 섹션 공통 페이지 크기 / 시작 위치 (기본 전체)
+        {sessions|robots|users}_limit / _offset: 섹션별 페이지 지정
+        q: 사용자명/이메일/로봇 ID/로봇 이름 부분 일치
+        online: 로봇(세션은 할당 로봇) 온라인 여부
+        role: 사용자 역할
+    """
+    try:
+        include = request.args.get('include')
+        include = set(include.split(',')) if include else set(ADMIN_SECTIONS)
+        search = (request.args.get('q') or '').strip().lower()
+        online = get_bool_arg('online')
+        role = request.args.get('role') or None
+        pages = {section: get_page_args(section) for section in ADMIN_SECTIONS}
+    except ValueError as e:
+        return jsonify({"error": f"잘못된 파라미터: {e}"}), 400
+
     try:
         # 전역 변수들 가져오기
         globals_dict = get_global_variables()
         integrated_mapping = globals_dict['integrated_mapping']
         registered_robots = globals_dict['registered_robots']
-        get_robot_name_from_db = globals_dict['get_robot_name_from_db']
-        
-        # 현재 시간
-        current_time = time.time()
 
-        # 활성 세션 정보
-        active_sessions = []
-        for sid, session_data in integrated_mapping.items():
-            user_info = {k: v for k, v in session_data.items() if k != "assigned_robot"}
-            robot_id = session_data.get("assigned_robot")
-
-            # SocketIO 세션에 할당된 로봇이 없으면 데이터베이스에서 확인
-            if not robot_id:
-                try:
-                    conn = sqlite3.connect(DB_PATH)
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        SELECT robot_id FROM user_robot_assignments
-                        WHERE user_id = ? AND is_active = TRUE
-                        ORDER BY assigned_at DESC
-                        LIMIT 1
-                    ''', (user_info.get('user_id'),))
-                    result = cursor.fetchone()
-                    if result:
-                        robot_id = result[0]
-                    conn.close()
-                except Exception as e:
-                    print(f"사용자 {user_info.get('username')}의 할당된 로봇 조회 오류: {e}")
-
-            robot_info = registered_robots.get(robot_id, {}) if robot_id else {}
-
-            # 로봇 온라인 상태 확인
-            is_robot_online = False
-            robot_last_seen = None
-            if robot_id in registered_robots:
-                last_seen = registered_robots[robot_id].get('last_heartbeat', 0)
-                is_robot_online = (current_time - last_seen) < 30
-                robot_last_seen = datetime.fromtimestamp(last_seen).isoformat() if last_seen else None
-
-            # 로봇 이름 가져오기
-            robot_name = "Unknown"
-            if robot_id:
-                if robot_id in registered_robots:
-                    robot_name = registered_robots[robot_id].get('name', f"Robot {robot_id}")
-                else:
-                    robot_name = get_robot_name_from_db(robot_id)
-
-            active_sessions.append({
-                "session_id": sid,
-                "user": user_info,
-                "assigned_robot": robot_id,
-                "robot_name": robot_name,
-                "robot_online": is_robot_online,
-                "robot_last_seen": robot_last_seen
-            })
+        # 레지스트리 스냅샷 (이후 조회는 모두 메모리에서)
+        robots = dict(registered_robots.items())
+        sessions = list(integrated_mapping.items())
 
-        # 모든 로봇 정보 수집 (SocketIO 연결된 로봇 + 데이터베이스에만 있는 로봇)
-        registered_robots_info = []
-        all_robot_ids = set(registered_robots.keys())
-
-        # 데이터베이스에서 모든 로봇 ID 가져오기
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT DISTINCT robot_id FROM user_robot_assignments
-                WHERE is_active = TRUE
-            ''')
-            db_robot_ids = [row[0] for row in cursor.fetchall()]
-            all_robot_ids.update(db_robot_ids)
-            conn.close()
-        except Exception as e:
-            print(f"데이터베이스 로봇 조회 오류: {e}")
-
-        # 모든 로봇 정보 처리
-        for robot_id in all_robot_ids:
-            # SocketIO 연결된 로봇인지 확인
-            if robot_id in registered_robots:
-                robot_info = registered_robots[robot_id]
-                last_seen = robot_info.get('last_heartbeat', 0)
-                is_online = (current_time - last_seen) < 30
-                hardware_enabled = robot_info.get('hardware_enabled', False)
-                last_seen_str = datetime.fromtimestamp(last_seen).isoformat() if last_seen else None
-                robot_name = robot_info.get('name', 'Unknown')
-            else:
-                # 데이터베이스에만 있는 로봇
-                robot_name = get_robot_name_from_db(robot_id)
-                is_online = False
-                hardware_enabled = False
-                last_seen_str = None
-
-            # 이 로봇을 사용하는 사용자 찾기
-            assigned_users = []
-
-            # 1. SocketIO 연결된 세션에서 할당된 사용자 찾기
-            for sid, session_data in integrated_mapping.items():
-                if session_data.get("assigned_robot") == robot_id:
-                    user_info = {k: v for k, v in session_data.items() if k != "assigned_robot"}
-                    assigned_users.append(user_info)
-
-            # 2. 데이터베이스에서 할당된 사용자 찾기 (SocketIO 연결되지 않은 사용자 포함)
-            try:
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT u.id, u.username, u.email, u.role
-                    FROM users u
-                    JOIN user_robot_assignments ura ON u.id = ura.user_id
-                    WHERE ura.robot_id = ? AND ura.is_active = TRUE
-                ''', (robot_id,))
-
-                db_assigned_users = cursor.fetchall()
-                conn.close()
-
-                # 데이터베이스에서 찾은 사용자들을 추가 (중복 제거)
-                for user_row in db_assigned_users:
-                    user_id, username, email, role = user_row
-                    # 이미 SocketIO 세션에서 추가된 사용자가 아닌 경우만 추가
-                    if not any(user.get('user_id') == user_id for user in assigned_users):
-                        assigned_users.append({
-                            'user_id': user_id,
-                            'username': username,
-                            'email': email,
-                            'role': role
-                        })
-            except Exception as e:
-                print(f"데이터베이스에서 할당된 사용자 조회 오류: {e}")
-
-            registered_robots_info.append({
-                "robot_id": robot_id,
-                "name": robot_name,
-                "online": is_online,
-                "last_seen": last_seen_str,
-                "hardware_enabled": hardware_enabled,
-                "assigned_users": assigned_users
-            })
+        # 활성 할당 1회 조회 -> 사용자별 최근 로봇 / 로봇별 사용자 / 사용자별 할당 수
+        latest_robot_by_user = {}
+        user_ids_by_robot = {}
+        assigned_count_by_user = Counter()
+        for user_id, robot_id in get_active_assignments():
+            latest_robot_by_user.setdefault(user_id, robot_id)
+            user_ids_by_robot.setdefault(robot_id, []).append(user_id)
+            assigned_count_by_user[user_id] += 1
 
-        # 데이터베이스 사용자 정보
-        db_users = []
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT u.id, u.username, u.email, u.role, u.created_at, u.last_login,
-                       COUNT(ura.robot_id) as assigned_robots
-                FROM users u
-                LEFT JOIN user_robot_assignments ura ON u.id = ura.user_id AND ura.is_active = TRUE
-                GROUP BY u.id, u.username, u.email, u.role, u.created_at, u.last_login
-            ''')
-
-            for row in cursor.fetchall():
-                db_users.append({
-                    "id": row[0],
-                    "username": row[1],
-                    "email": row[2],
-                    "role": row[3],
-                    "created_at": row[4],
-                    "last_login": row[5],
-                    "assigned_robots_count": row[6]
-                })
-            conn.close()
-        except Exception as e:
-            print(f"데이터베이스 사용자 조회 오류: {e}")
+        def robot_name(robot_id):
+            if robot_id in robots:
+                return robots[robot_id].get('name', f"Robot {robot_id}")
+            return default_robot_name(robot_id)
 
-        return jsonify({
+        # 모든 로봇 (SocketIO 연결된 로봇 + 데이터베이스에만 있는 로봇)
+        all_robot_ids = sorted(set(robots) | set(user_ids_by_robot))
+        online_robot_ids = {robot_id for robot_id, info in robots.items() if info.get('status') != 'offline'}
+
+        result = {
             "current_user": {
                 "id": current_user.id,
                 "username": current_user.username,
                 "email": current_user.email,
                 "role": current_user.role
             },
-            "active_sessions": active_sessions,
-            "registered_robots": registered_robots_info,
-            "db_users": db_users,
+            "pagination": {},
             "stats": {
-                "total_sessions": len(integrated_mapping),
-                "total_robots": len(registered_robots_info),
-                "online_robots": len([r for r in registered_robots_info if r['online']]),
-                "total_db_users": len(db_users)
+                "total_sessions": len(sessions),
+                "total_robots": len(all_robot_ids),
+                "online_robots": len(online_robot_ids),
+                "total_db_users": 0
             }
-        })
+        }
+
+        # 활성 세션 정보
+        if 'sessions' in include:
+            active_sessions = []
+            for sid, session_data in sessions:
+                user_info = {k: v for k, v in session_data.items() if k != "assigned_robot"}
+                # SocketIO 세션에 할당된 로봇이 없으면 데이터베이스 할당 사용
+                robot_id = session_data.get("assigned_robot") or latest_robot_by_user.get(user_info.get('user_id'))
+
+                is_robot_online, robot_last_seen = robot_status(robots[robot_id]) if robot_id in robots else (False, None)
+                name = robot_name(robot_id) if robot_id else "Unknown"
+
+                if role and user_info.get('role') != role:
+                    continue
+                if online is not None and is_robot_online != online:
+                    continue
+                if search and search not in f"{user_info.get('username', '')}\n{user_info.get('email') or ''}\n{robot_id or ''}\n{name}".lower():
+                    continue
+
+                active_sessions.append({
+                    "session_id": sid,
+                    "user": user_info,
+                    "assigned_robot": robot_id,
+                    "robot_name": name,
+                    "robot_online": is_robot_online,
+                    "robot_last_seen": robot_last_seen
+                })
+
+            limit, offset = pages['sessions']
+            result["pagination"]["sessions"] = {"total": len(active_sessions), "limit": limit, "offset": offset}
+            result["active_sessions"] = paginate(active_sessions, limit, offset)
+
+        # 로봇 정보
+        if 'robots' in include:
+            robot_ids = [
+                robot_id for robot_id in all_robot_ids
+                if (online is None or (robot_id in online_robot_ids) == online)
+                and (not search or search in f"{robot_id}\n{robot_name(robot_id)}".lower())
+            ]
+            limit, offset = pages['robots']
+            page_robot_ids = paginate(robot_ids, limit, offset)
 
+            # 페이지에 포함된 로봇의 DB 할당 사용자만 한 번에 조회
+            db_users_by_id = get_users_by_ids({
+                user_id for robot_id in page_robot_ids for user_id in user_ids_by_robot.get(robot_id, ())
+            })
+
+            registered_robots_info = []
+            for robot_id in page_robot_ids:
+                if robot_id in robots:
+                    is_online, last_seen_str = robot_status(robots[robot_id])
+                    hardware_enabled = robots[robot_id].get('hardware_enabled', False)
+                    name = robots[robot_id].get('name', 'Unknown')
+                else:
+                    # 데이터베이스에만 있는 로봇
+                    is_online, last_seen_str, hardware_enabled = False, None, False
+                    name = default_robot_name(robot_id)
+
+                # 1. SocketIO 연결된 세션에서 할당된 사용자 (로봇 -> 세션 인덱스)
+                assigned_users = []
+                seen_user_ids = set()
+                for sid in integrated_mapping.sids_for_robot(robot_id):
+                    session_data = integrated_mapping.get(sid)
+                    if session_data:
+                        assigned_users.append({k: v for k, v in session_data.items() if k != "assigned_robot"})
+                        seen_user_ids.add(session_data.get('user_id'))
+
+                # 2. 데이터베이스에서 할당된 사용자 (SocketIO 연결되지 않은 사용자 포함, 중복 제거)
+                for user_id in user_ids_by_robot.get(robot_id, ()):
+                    db_user = db_users_by_id.get(user_id)
+                    if db_user and user_id not in seen_user_ids:
+                        seen_user_ids.add(user_id)
+                        assigned_users.append({
+                            'user_id': user_id,
+                            'username': db_user['username'],
+                            'email': db_user['email'],
+                            'role': db_user['role']
+                        })
+
+                registered_robots_info.append({
+                    "robot_id": robot_id,
+                    "name": name,
+                    "online": is_online,
+                    "last_seen": last_seen_str,
+                    "hardware_enabled": hardware_enabled,
+                    "assigned_users": assigned_users
+                })
+
+            result["pagination"]["robots"] = {"total": len(robot_ids), "limit": limit, "offset": offset}
+            result["registered_robots"] = registered_robots_info
+
+        # 데이터베이스 사용자 정보 (필터/페이지는 SQL에서 처리)
+        if 'users' in include:
+            limit, offset = pages['users']
+            total_users, db_users = get_users_page(search or None, role, limit, offset)
+            for user in db_users:
+                user["assigned_robots_count"] = assigned_count_by_user.get(user["id"], 0)
+            result["pagination"]["users"] = {"total": total_users, "limit": limit, "offset": offset}
+            result["db_users"] = db_users
+
+        total_db_users = result["pagination"]["users"]["total"] if 'users' in include and not (search or role) else None
+        if total_db_users is None:
+            total_db_users, _ = get_users_page(limit=0)
+        result["stats"]["total_db_users"] = total_db_users
+
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def get_provision_rows():
+    """요청 본문 -> 계정 행 목록 (JSON 목록/{"users": [...]}, CSV 본문, 업로드한 CSV/JSON 파일)"""
+    upload = request.files.get('file')
+    if upload is not None:
+        text = upload.read().decode('utf-8-sig')
+        is_csv = not upload.filename.lower().endswith('.json')
+    elif request.is_json:
+        text, is_csv = None, False
+    else:
+        text, is_csv = request.get_data(as_text=True), True
+
+    if is_csv:
+        rows = [{k.strip(): (v or '').strip() for k, v in row.items() if k}
+                for row in csv.DictReader(io.StringIO(text))]
+    else:
+        data = request.get_json() if text is None else json.loads(text)
+        rows = data.get('users') if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("users 목록이 필요합니다.")
+    return [{field: str(row[field]) for field in PROVISION_FIELDS if row.get(field) not in (None, '')}
+            for row in rows]
+
+@admin_bp.route('/api/admin/provision', methods=['POST'])
+@login_required
+def provision_accounts():
+    """사용자 계정 + 로봇 할당 일괄 생성 (관리자만)
+
+    Body: JSON 목록 또는 {"users": [...]}, CSV(text/csv), 또는 multipart 파일(file)
+          열: username, password, email, role, robot_id 또는 robot_name
+    Returns: 행별 결과 (status: created | error)
+    """
+    if current_user.role != 'admin':
+        return jsonify({"error": "관리자 권한이 필요합니다"}), 403
+
+    try:
+        rows = get_provision_rows()
+    except (ValueError, csv.Error) as e:
+        return jsonify({"error": f"잘못된 입력: {e}"}), 400
+    if not rows:
+        return jsonify({"error": "생성할 사용자가 없습니다."}), 400
+    if len(rows) > PROVISION_MAX_ROWS:
+        return jsonify({"error": f"한 번에 최대 {PROVISION_MAX_ROWS}명까지 생성할 수 있습니다."}), 400
+
+    try:
+        results = provision_users(rows)
+        created = sum(1 for result in results if result["status"] == "created")
+        print(f"계정 일괄 생성: {created}/{len(results)}명 ({current_user.username})")
+        return jsonify({
+            "success": created == len(results),
+            "created": created,
+            "failed": len(results) - created,
+            "results": results
+        })
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        print(f"계정 일괄 생성 오류: {e}")
+        return jsonify({"error": str(e)}), 500
@@ -1,23 +1,66 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, abort
+from flask_login import login_required, current_user
+from datetime import datetime, timezone
+from hashlib import sha1
 from pathlib import Path
+from db import code_db
+from codeindex import CodeIndex, CodeQuotaError
 
 custom_code_bp = Blueprint('custom_code_bp', __name__, url_prefix='/api/custom-code')
 CUSTOM_CODE_DIR = Path(__file__).parent.parent / "static" / "custom_code"
 
+# 코드 저장소 (사용자별 네임스페이스, 내용 주소 저장 + 파일 인덱스, app.py 시작 시 디렉터리에서 가져오기)
+code_index = CodeIndex(code_db, CUSTOM_CODE_DIR)
+
+def get_owner_id() -> int:
+    """요청 대상 네임스페이스 - 본인, 관리자는 ?user_id=로 다른 사용자(0: 공용 파일) 지정 가능"""
+    user_id = request.args.get('user_id')
+    if user_id in (None, ''):
+        return int(current_user.id)
+    if current_user.role != 'admin':
+        abort(403)
+    try:
+        return int(user_id)
+    except ValueError:
+        abort(400)
+
 @custom_code_bp.route("/files")
+@login_required
 def get_files():
-    files = []
-    for file_path in CUSTOM_CODE_DIR.glob("*.py"):
-        files.append({
-            "name": file_path.name,
-            "path": str(file_path),
-            "size": file_path.stat().st_size,
-            "mtime": int(file_path.stat().st_mtime)
-        })
-    files = sorted(files, key=lambda x: x["mtime"], reverse=True)
-    return jsonify({"files": files})
+    """내 코드 파일 + 공용 파일(예제/이전 저장 파일, shared: true) 목록 (최근 수정 순) + 사용량/할당량
+
+    Query:
+        prefix: 파일명 앞부분 (영문 대소문자 무시)
+        limit / offset: 페이지 크기 / 시작 위치 (기본 전체)
+    ETag / If-None-Match 지원 (목록이 바뀌지 않았으면 304)
+    """
+    try:
+        limit = request.args.get('limit')
+        limit = int(limit) if limit not in (None, '') else None
+        offset = int(request.args.get('offset') or 0)
+        if (limit is not None and limit < 0) or offset < 0:
+            raise ValueError("limit/offset은 0 이상이어야 합니다.")
+    except ValueError as e:
+        return jsonify({"error": f"잘못된 파라미터: {e}"}), 400
+
+    owner_id = get_owner_id()
+    total, entries = code_index.page(owner_id, request.args.get('prefix') or None, limit, offset)
+    files = [{
+        "name": entry["name"],
+        "size": entry["size"],
+        "mtime": entry["mtime_ns"] // 1_000_000_000,
+        "sha256": entry["sha256"],
+        "shared": entry["shared"]
+    } for entry in entries]
+
+    response = jsonify({"files": files, "total": total, "limit": limit, "offset": offset,
+                        "usage": code_index.usage(owner_id)})
+    response.set_etag(sha1(response.get_data()).hexdigest())
+    response.headers['Cache-Control'] = 'private, no-cache'     # 사용자별 응답, 매번 ETag로 재검증
+    return response.make_conditional(request)
 
 @custom_code_bp.route("/save", methods=["POST"])
+@login_required
 def save_file():
     data = request.get_json()
     filename = data.get("filename", "").strip()
@@ -28,23 +71,89 @@ def save_file():
     else:
         filename += ".py"
 
-    file_path = CUSTOM_CODE_DIR / filename
-    file_path.write_text(code, encoding="utf-8")
+    try:
+        # 내용이 이전 저장과 같으면 아무것도 쓰지 않음
+        entry, changed = code_index.write(get_owner_id(), filename, code)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except CodeQuotaError as e:
+        return jsonify({"success": False, "error": str(e), "usage": e.usage}), 403
 
-    return jsonify({"success": True, "filename": filename})
+    return jsonify({"success": True, "filename": filename, "sha256": entry["sha256"], "changed": changed})
 
 @custom_code_bp.route("/load/<filename>")
+@login_required
 def load_file(filename):
+    """코드 로드 (ETag = 내용 SHA-256, Last-Modified, 클라이언트가 같은 내용을 가지고 있으면 304)
+
+    Query:
+        version: 불러올 이전 버전의 sha256 (/versions 목록 참고)
+    """
+    if not filename.endswith(".py"):
+        filename += ".py"
+    owner_id = get_owner_id()
+    try:
+        # 내 파일이 없으면 공용 파일
+        entry = code_index.lookup(owner_id, filename)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if entry is None:
+        return jsonify({"success": False, "error": f"파일을 찾을 수 없습니다: {filename}"}), 404
+
+    sha256 = request.args.get("version") or entry["sha256"]
+    if sha256 != entry["sha256"] and sha256 not in {v["sha256"] for v in code_index.versions(entry["owner_id"], filename)}:
+        return jsonify({"success": False, "error": f"버전을 찾을 수 없습니다: {sha256}"}), 404
+
+    # 내용을 읽기 전에 조건부 요청 확인 (ETag가 내용 해시이므로 같으면 본문 불필요)
+    if request.if_none_match.contains(sha256):
+        response = Response(status=304)
+        set_cache_validators(response, sha256, entry)
+        return response
+
+    code = code_index.content(sha256)
+    if code is None:
+        return jsonify({"success": False, "error": f"파일 내용을 찾을 수 없습니다: {filename}"}), 404
+
+    response = jsonify({"success": True, "code": code, "filename": filename, "sha256": sha256,
+                        "shared": entry["shared"]})
+    set_cache_validators(response, sha256, entry)
+    return response.make_conditional(request)
+
+@custom_code_bp.route("/versions/<filename>")
+@login_required
+def get_versions(filename):
+    """파일의 저장 기록 (최근 순, 내 파일이 없으면 공용 파일)"""
     if not filename.endswith(".py"):
         filename += ".py"
-    file_path = CUSTOM_CODE_DIR / filename
-    code = file_path.read_text(encoding="utf-8")
-    return jsonify({"success": True, "code": code, "filename": filename})
+    try:
+        entry = code_index.lookup(get_owner_id(), filename)
+        versions = code_index.versions(entry["owner_id"], filename) if entry else []
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "filename": filename, "versions": [{
+        "sha256": version["sha256"],
+        "size": version["size"],
+        "saved_at": version["saved_at_ns"] // 1_000_000_000
+    } for version in versions]})
+
+def set_cache_validators(response, sha256, entry):
+    response.set_etag(sha256)
+    if sha256 == entry["sha256"]:
+        response.last_modified = datetime.fromtimestamp(entry["mtime_ns"] / 1e9, tz=timezone.utc)
+    response.headers['Cache-Control'] = 'private, no-cache'     # 사용자별 응답, 매번 ETag로 재검증
 
 @custom_code_bp.route("/delete/<filename>", methods=["DELETE"])
+@login_required
 def delete_file(filename):
     if not filename.endswith(".py"):
         filename += ".py"
-    file_path = CUSTOM_CODE_DIR / filename
-    file_path.unlink()
+    owner_id = get_owner_id()
+    try:
+        if not code_index.delete(owner_id, filename):
+            # 공용 파일은 읽기 전용 (관리자는 ?user_id=0으로 삭제)
+            if code_index.lookup(owner_id, filename):
+                return jsonify({"success": False, "error": f"공용 파일은 삭제할 수 없습니다: {filename}"}), 403
+            return jsonify({"success": False, "error": f"파일을 찾을 수 없습니다: {filename}"}), 404
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     return jsonify({"success": True})
@@ -5,17 +5,11 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 from datetime import datetime
-import time
-import sqlite3
-from pathlib import Path
-from auth import get_user_robots, assign_robot_to_user, get_robot_name_from_db
+from auth import get_user_robots, assign_robot_to_user, get_robot_name_from_db, delete_robot_from_db
 
 # Blueprint 생성
 robot_bp = Blueprint('robot', __name__, url_prefix='/api')
 
-# 데이터베이스 경로
-DB_PATH = Path(__file__).parent.parent / "static" / "db" / "auth.db"
-
 # 전역 변수들을 current_app에서 가져오는 헬퍼 함수들
 def get_registered_robots():
     """등록된 로봇 딕셔너리 반환"""
@@ -29,13 +23,21 @@ def get_socketio():
     """SocketIO 인스턴스 반환"""
     return current_app.config.get('socketio')
 
+def discard_robot_state(robot_id):
+    """로봇 제어 이벤트 전송률 제한 슬롯, 하트비트 추적 정리"""
+    control_throttle = current_app.config.get('control_throttle')
+    if control_throttle:
+        control_throttle.discard_robot(robot_id)
+    heartbeat_sweeper = current_app.config.get('heartbeat_sweeper')
+    if heartbeat_sweeper:
+        heartbeat_sweeper.forget(robot_id)
+
 #region Robot Management API
 @robot_bp.route('/robots', methods=['GET'])
 @login_required
 def get_robots():
     """사용자에게 할당된 로봇 목록 조회"""
     try:
-        current_time = time.time()
         robots = []
 
         # 사용자에게 할당된 로봇 ID 목록 조회
@@ -49,7 +51,7 @@ def get_robots():
             if robot_id in registered_robots:
                 robot_info = registered_robots[robot_id]
                 last_seen = robot_info.get('last_heartbeat', 0)
-                is_online = (current_time - last_seen) < 30  # 30초 이내에 하트비트가 있으면 온라인
+                is_online = robot_info.get('status') != 'offline'  # 하트비트 스위퍼가 타임아웃 시 offline으로 변경
                 hardware_enabled = robot_info.get("hardware_enabled", False)
                 last_seen_str = datetime.fromtimestamp(last_seen).isoformat() if last_seen else None
             else:
@@ -139,12 +141,12 @@ def register_robot():
 
         # 로봇 등록
         registered_robots = get_registered_robots()
-        registered_robots[robot_id] = {
+        registered_robots.register(robot_id, {
             "name": robot_name,
             "status": "offline",
             "last_seen": None,
             "registered_at": datetime.now().isoformat()
-        }
+        })
 
         # 하트비트는 로봇 등록 시 자동으로 초기화됨
 
@@ -158,15 +160,10 @@ def unregister_robot(robot_id):
     """로봇 등록 해제"""
     try:
         registered_robots = get_registered_robots()
-        if robot_id in registered_robots:
-            del registered_robots[robot_id]
-
+        if registered_robots.remove(robot_id) is not None:
             # 해당 로봇을 사용하는 사용자 세션 정리
-            integrated_mapping = get_integrated_mapping()
-            sessions_to_remove = [sid for sid, session_data in integrated_mapping.items() 
-                                if session_data.get('assigned_robot') == robot_id]
-            for sid in sessions_to_remove:
-                integrated_mapping[sid]['assigned_robot'] = None
+            get_integrated_mapping().unassign_robot(robot_id)
+            discard_robot_state(robot_id)
 
             return jsonify({"success": True, "message": f"로봇 {robot_id}이 등록 해제되었습니다"})
         else:
@@ -197,11 +194,8 @@ def assign_robot_to_session(robot_id):
             # HTTP 요청에서는 세션 ID를 직접 가져올 수 없으므로,
             # 사용자의 모든 활성 세션에 로봇 할당
             integrated_mapping = get_integrated_mapping()
-            user_sessions = [sid for sid, session_data in integrated_mapping.items()
-                           if session_data.get('user_id') == current_user.id]
-
-            for sid in user_sessions:
-                integrated_mapping[sid]['assigned_robot'] = robot_id
+            for sid in integrated_mapping.sids_for_user(current_user.id):
+                integrated_mapping.assign_robot(sid, robot_id)
                 print(f"사용자 {current_user.username}의 세션 {sid}에 로봇 {robot_id} 할당")
 
             # 로봇 이름 가져오기
@@ -241,34 +235,19 @@ def delete_robot(robot_id):
             robot_name = get_robot_name_from_db(robot_id)
 
         # 등록된 로봇에서 제거 (있는 경우에만)
-        if robot_id in registered_robots:
-            del registered_robots[robot_id]
+        if registered_robots.remove(robot_id) is not None:
             print(f"등록된 로봇에서 {robot_id} 제거")
+        discard_robot_state(robot_id)
 
         # 하트비트는 registered_robots에서 자동으로 제거됨
 
         # 해당 로봇을 사용하는 사용자 세션 정리
-        integrated_mapping = get_integrated_mapping()
-        sessions_to_remove = [sid for sid, session_data in integrated_mapping.items() 
-                            if session_data.get('assigned_robot') == robot_id]
-        for sid in sessions_to_remove:
-            integrated_mapping[sid]['assigned_robot'] = None
+        for sid in get_integrated_mapping().unassign_robot(robot_id):
             print(f"사용자 세션 {sid}에서 로봇 {robot_id} 할당 해제")
 
         # 데이터베이스에서 로봇 할당 정보 삭제
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute('''
-                DELETE FROM user_robot_assignments
-                WHERE robot_id = ?
-            ''', (robot_id,))
-            deleted_count = cursor.rowcount
-            conn.commit()
-            conn.close()
-            print(f"데이터베이스에서 로봇 {robot_id} 할당 정보 삭제 완료 (삭제된 행: {deleted_count})")
-        except Exception as e:
-            print(f"데이터베이스 로봇 삭제 오류: {e}")
+        deleted_count = delete_robot_from_db(robot_id)
+        print(f"데이터베이스에서 로봇 {robot_id} 할당 정보 삭제 완료 (삭제된 행: {deleted_count})")
 
         return jsonify({
             "success": True,
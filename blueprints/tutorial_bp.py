@@ -1,26 +1,34 @@
 from flask import Blueprint, request, jsonify
-from pathlib import Path
-import sqlite3
+from flask_login import login_required, current_user
+from hashlib import sha1
+from concurrency import run_blocking
+from db import tutorial_db, TUTORIAL_DB_PATH
+from writebehind import tutorial_writes
+from migrations import migrate, TUTORIAL_MIGRATIONS
 
 tutorial_bp = Blueprint('tutorial_bp', __name__, url_prefix='/api/tutorial')
-TUTORIAL_DB_PATH = Path(__file__).parent.parent / "static" / "db" / "tutorial.db"
 
-def db_tutorial_init():
-    """튜토리얼 데이터베이스 초기화"""
-    conn = sqlite3.connect(TUTORIAL_DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tutorial_progress (
-            tutorial_id TEXT PRIMARY KEY,
-            completed BOOLEAN NOT NULL,
-            completed_at TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+TUTORIAL_BULK_MAX = 500     # 일괄 저장 요청당 최대 항목 수
+
+# 진행상황 쿼리 (util/check_query_plans.py가 같은 문자열로 인덱스 사용 여부를 확인)
+PROGRESS_UPSERT_SQL = '''
+    INSERT INTO user_tutorial_progress (user_id, tutorial_id, completed_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT (user_id, tutorial_id) DO UPDATE SET
+        completed_at = excluded.completed_at,
+        updated_at = CURRENT_TIMESTAMP
+'''
+PROGRESS_DELETE_SQL = 'DELETE FROM user_tutorial_progress WHERE user_id = ? AND tutorial_id = ?'
+PROGRESS_SELECT_SQL = '''
+    SELECT tutorial_id, completed_at FROM user_tutorial_progress
+    WHERE user_id = ?
+    ORDER BY tutorial_id
+'''
+PROGRESS_RESET_SQL = 'DELETE FROM user_tutorial_progress WHERE user_id = ?'
 
-    conn.commit()
-    conn.close()
+def db_tutorial_init():
+    """튜토리얼 데이터베이스 초기화 (스키마 마이그레이션)"""
+    migrate(tutorial_db, TUTORIAL_MIGRATIONS)
 
 # Blueprint 생성 시 데이터베이스 초기화
 def init_tutorial_db():
@@ -30,70 +38,123 @@ def init_tutorial_db():
 # Blueprint 등록 시 자동으로 데이터베이스 초기화
 init_tutorial_db()
 
+def save_tutorial_progress(conn, user_id, items):
+    """사용자의 진행상황 [(tutorial_id, completed, completed_at), ...] 저장 (호출한 쪽의 트랜잭션 안에서)"""
+    completed = [(user_id, tutorial_id, completed_at) for tutorial_id, done, completed_at in items if done]
+    removed = [(user_id, tutorial_id) for tutorial_id, done, _ in items if not done]
+    if completed:
+        # 완료 상태로 저장/업데이트
+        conn.executemany(PROGRESS_UPSERT_SQL, completed)
+    if removed:
+        # 미완료 상태로 변경 (삭제)
+        conn.executemany(PROGRESS_DELETE_SQL, removed)
+
+def save_tutorial_progress_bulk(user_id, items):
+    """여러 항목을 한 트랜잭션으로 저장"""
+    with tutorial_db.connection() as conn:
+        save_tutorial_progress(conn, user_id, items)
+
+def parse_progress_item(data):
+    """요청 항목 -> (tutorial_id, completed, completed_at), tutorial_id가 없거나 completed가 불리언이 아니면 ValueError"""
+    if not isinstance(data, dict) or not data.get("tutorial_id"):
+        raise ValueError("tutorial_id가 필요합니다")
+    # "false"/0 같은 값을 완료로 저장하지 않도록 JSON true/false만 허용 (생략하면 미완료)
+    completed = data.get("completed", False)
+    if not isinstance(completed, bool):
+        raise ValueError("completed는 true 또는 false여야 합니다")
+    return str(data["tutorial_id"]), completed, data.get("completed_at")
+
 
 
 @tutorial_bp.route("/progress", methods=["GET"])
+@login_required
 def api_tutorial_progress_get():
+    """현재 사용자의 진행상황 조회 (ETag / If-None-Match 지원)"""
     try:
-        conn = sqlite3.connect(TUTORIAL_DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute('SELECT tutorial_id, completed, completed_at FROM tutorial_progress WHERE completed = 1')
-        rows = cursor.fetchall()
+        # 아직 commit되지 않은 진행상황 저장을 먼저 반영 (대기 중인 쓰기가 없으면 즉시 반환)
+        tutorial_writes.flush()
+        rows = run_blocking(tutorial_db.fetchall, PROGRESS_SELECT_SQL, (str(current_user.id),))
 
         progress = {}
         for row in rows:
             progress[row[0]] = {
-                "completed": bool(row[1]),
-                "completed_at": row[2]
+                "completed": True,
+                "completed_at": row[1]
             }
 
-        conn.close()
-        return jsonify(progress)
+        response = jsonify(progress)
+        response.set_etag(sha1(response.get_data()).hexdigest())
+        response.headers['Cache-Control'] = 'private, no-cache'     # 매번 ETag로 재검증
+        return response.make_conditional(request)
     except Exception as e:
         print(f"튜토리얼 진행상황 조회 실패: {e}")
         return jsonify({"error": str(e)}), 500
 
 @tutorial_bp.route("/progress", methods=["POST"])
+@login_required
 def api_tutorial_progress_post():
     try:
-        data = request.get_json()
-        tutorial_id = data.get("tutorial_id")
-        completed = data.get("completed")
-        completed_at = data.get("completed_at")
-
-        if not tutorial_id:
-            return jsonify({"success": False, "error": "tutorial_id가 필요합니다"}), 400
-
-        conn = sqlite3.connect(TUTORIAL_DB_PATH)
-        cursor = conn.cursor()
-
-        if completed:
-            # 완료 상태로 저장/업데이트
-            cursor.execute('''
-                INSERT OR REPLACE INTO tutorial_progress (tutorial_id, completed, completed_at)
-                VALUES (?, ?, ?)
-            ''', (tutorial_id, 1, completed_at))
-        else:
-            # 미완료 상태로 변경 (삭제)
-            cursor.execute('DELETE FROM tutorial_progress WHERE tutorial_id = ?', (tutorial_id,))
-
-        conn.commit()
-        conn.close()
+        try:
+            item = parse_progress_item(request.get_json())
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        # 쓰기 지연 큐로 기록 (백그라운드에서 다른 저장과 묶어 commit)
+        tutorial_writes.submit(save_tutorial_progress, str(current_user.id), [item])
 
         return jsonify({"success": True})
     except Exception as e:
         print(f"튜토리얼 진행상황 저장 실패: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@tutorial_bp.route("/progress/bulk", methods=["POST"])
+@login_required
+def api_tutorial_progress_bulk():
+    """진행상황 일괄 저장 - {"items": [{tutorial_id, completed, completed_at}, ...]} (또는 목록)를 한 트랜잭션으로"""
+    try:
+        data = request.get_json(silent=True)
+        records = data.get("items") if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            return jsonify({"success": False, "error": "items 목록이 필요합니다"}), 400
+        if len(records) > TUTORIAL_BULK_MAX:
+            return jsonify({"success": False, "error": f"한 번에 최대 {TUTORIAL_BULK_MAX}개까지 저장할 수 있습니다"}), 400
+
+        try:
+            # 같은 tutorial_id가 여러 번 오면 마지막 값 사용
+            items = list({item[0]: item for item in map(parse_progress_item, records)}.values())
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        # 앞서 큐에 들어간 단건 저장이 이 요청을 덮어쓰지 않도록 먼저 commit
+        tutorial_writes.flush()
+        run_blocking(save_tutorial_progress_bulk, str(current_user.id), items)
+
+        return jsonify({"success": True, "saved": len(items)})
+    except Exception as e:
+        print(f"튜토리얼 진행상황 일괄 저장 실패: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @tutorial_bp.route("/reset", methods=["POST"])
+@login_required
 def api_tutorial_reset():
-    """튜토리얼 데이터베이스 완전 초기화"""
+    """현재 사용자의 튜토리얼 진행상황 초기화 (관리자가 {"all": true}로 요청하면 데이터베이스 완전 초기화)"""
     try:
-        # 데이터베이스 파일이 존재하면 삭제
-        if TUTORIAL_DB_PATH.exists():
-            TUTORIAL_DB_PATH.unlink()
-            print(f"튜토리얼 데이터베이스 삭제됨: {TUTORIAL_DB_PATH}")
+        data = request.get_json(silent=True) or {}
+        # 대기 중인 저장을 먼저 commit
+        tutorial_writes.flush()
+
+        if not (data.get("all") and current_user.role == 'admin'):
+            run_blocking(tutorial_db.execute, PROGRESS_RESET_SQL, (str(current_user.id),))
+            return jsonify({"success": True, "message": "튜토리얼 진행상황이 초기화되었습니다."})
+
+        # 풀의 커넥션을 닫고 데이터베이스 파일(WAL 파일 포함)이 존재하면 삭제
+        tutorial_db.close_all()
+        for path in (TUTORIAL_DB_PATH,
+                     TUTORIAL_DB_PATH.with_name(TUTORIAL_DB_PATH.name + '-wal'),
+                     TUTORIAL_DB_PATH.with_name(TUTORIAL_DB_PATH.name + '-shm')):
+            if path.exists():
+                path.unlink()
+                print(f"튜토리얼 데이터베이스 삭제됨: {path}")
 
         # 데이터베이스 재생성
         db_tutorial_init()
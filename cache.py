@@ -0,0 +1,56 @@
+"""
+크기 제한 + TTL 메모리 캐시 (LRU)
+
+OrderedDict의 개별 연산(get/pop/move_to_end/popitem)은 GIL 아래에서 원자적이므로
+lock 없이 사용한다. eventlet/gevent 모드에서 @offload된 함수(네이티브 스레드)가
+무효화해도 패치된 lock에 걸리지 않는다.
+"""
+
+from __future__ import annotations
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl              # 항목 유효 시간 (초), None이면 만료 없음
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()   # key -> (만료 시각, 값)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None or (entry[0] is not None and entry[0] < time.monotonic()):
+            if entry is not None:
+                self._data.pop(key, None)
+            self.misses += 1
+            return default
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            pass  # 그 사이 다른 스레드가 무효화
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            try:
+                self._data.popitem(last=False)
+            except KeyError:
+                break
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
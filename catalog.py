@@ -0,0 +1,147 @@
+"""
+로봇 카탈로그 - user_robot_assignments 테이블의 메모리 사본 (write-through)
+
+시작 시 한 번 전체를 읽어 두고 이름/소유/할당 조회는 메모리에서 처리한다.
+쓰기는 write()로 DB 트랜잭션을 실행한 뒤, 같은 트랜잭션에서 영향받은 robot_id의
+행을 다시 읽어 메모리를 교체하므로 메모리와 DB가 로봇 단위로 항상 같다.
+
+DB 작업은 run_blocking(네이티브 스레드 풀)에서, 메모리 갱신은 호출한 스레드에서 한다.
+defer()로 등록한 쓰기는 쓰기 지연 큐가 commit한 뒤 메모리에 반영되며, write()는 순서를
+지키기 위해 대기 중인 지연 쓰기를 먼저 commit한다.
+멀티 워커 모드에서는 다른 워커의 쓰기를 refresh_interval마다 전체 재적재로 반영한다.
+"""
+
+from __future__ import annotations
+import threading
+import time
+
+from concurrency import run_blocking
+
+ROW_COLUMNS = ('id', 'user_id', 'robot_name', 'robot_id', 'assigned_at', 'is_active')
+SQLITE_MAX_VARIABLES = 900
+# 영향받은 로봇의 행 다시 읽기 ({}: robot_id 수만큼 ?)
+ROBOT_ROWS_SQL = f"SELECT {', '.join(ROW_COLUMNS)} FROM user_robot_assignments WHERE robot_id IN ({{}})"
+
+
+class RobotCatalog:
+    def __init__(self, db, refresh_interval: float | None = None, write_behind=None):
+        self.db = db
+        self.write_behind = write_behind            # defer()에 사용할 WriteBehindQueue
+        self.refresh_interval = refresh_interval    # 전체 재적재 주기 (초), None이면 재적재 안 함
+        self._rows: dict[int, dict] = {}            # row id -> 행
+        self._by_robot: dict[str, set[int]] = {}    # robot_id -> row id 집합
+        self._by_user: dict[int, set[int]] = {}     # user_id -> row id 집합
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    #region 적재
+    def load(self):
+        """DB 전체 적재"""
+        rows = run_blocking(self.db.fetchall, f"SELECT {', '.join(ROW_COLUMNS)} FROM user_robot_assignments")
+        with self._lock:
+            self._rows, self._by_robot, self._by_user = {}, {}, {}
+            for row in rows:
+                self._add(dict(zip(ROW_COLUMNS, row)))
+            self._loaded_at = time.monotonic()
+        print(f"로봇 카탈로그 적재: {len(rows)}개 행")
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or (
+                self.refresh_interval is not None and time.monotonic() - self._loaded_at > self.refresh_interval):
+            self.load()
+
+    def _add(self, row: dict):
+        self._rows[row['id']] = row
+        self._by_robot.setdefault(row['robot_id'], set()).add(row['id'])
+        self._by_user.setdefault(row['user_id'], set()).add(row['id'])
+
+    def _discard(self, row_id: int):
+        row = self._rows.pop(row_id, None)
+        if row is None:
+            return
+        for index, key in ((self._by_robot, row['robot_id']), (self._by_user, row['user_id'])):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(row_id)
+                if not ids:
+                    del index[key]
+    #endregion
+
+    #region 조회 (메모리)
+    def robot_ids_for_user(self, user_id) -> list[str]:
+        """사용자에게 할당된(활성 여부 무관) 로봇 ID 목록"""
+        self._ensure_loaded()
+        with self._lock:
+            return list(dict.fromkeys(self._rows[i]['robot_id'] for i in sorted(self._by_user.get(user_id, ()))))
+
+    def exists(self, robot_id: str) -> bool:
+        self._ensure_loaded()
+        return robot_id in self._by_robot
+
+    def name(self, robot_id: str) -> str | None:
+        """가장 최근에 기록된 로봇 이름"""
+        self._ensure_loaded()
+        with self._lock:
+            rows = [self._rows[i] for i in self._by_robot.get(robot_id, ())]
+        named = [row for row in rows if row['robot_name']]
+        return max(named, key=_recency)['robot_name'] if named else None
+
+    def robot_id_by_name(self, robot_name: str) -> str | None:
+        """해당 이름으로 가장 최근에 등록된 로봇 ID"""
+        self._ensure_loaded()
+        with self._lock:
+            rows = [row for row in self._rows.values() if row['robot_name'] == robot_name]
+        return max(rows, key=_recency)['robot_id'] if rows else None
+
+    def active_assignments(self) -> list[tuple]:
+        """활성 할당 전체 [(user_id, robot_id), ...] (최근 할당 순)"""
+        self._ensure_loaded()
+        with self._lock:
+            rows = [row for row in self._rows.values() if row['is_active']]
+        rows.sort(key=_recency, reverse=True)
+        return [(row['user_id'], row['robot_id']) for row in rows]
+    #endregion
+
+    #region 쓰기 (write-through)
+    def write(self, func, *args):
+        """func(conn, *args) -> (결과, 영향받은 robot_id 목록)을 한 트랜잭션으로 실행하고 메모리 반영"""
+        self._ensure_loaded()
+        if self.write_behind is not None:
+            self.write_behind.flush()
+        return self._apply(run_blocking(self._write_txn, func, args))
+
+    def defer(self, func, *args):
+        """write()와 같지만 쓰기 지연 큐에서 다른 쓰기와 함께 commit (결과 없음)"""
+        self.write_behind.submit(self._run_write, func, args, on_done=self._apply)
+
+    def _write_txn(self, func, args):
+        with self.db.connection() as conn:
+            return self._run_write(conn, func, args)
+
+    def _run_write(self, conn, func, args):
+        """func 실행 후 영향받은 로봇의 행을 같은 트랜잭션에서 다시 읽음"""
+        result, robot_ids = func(conn, *args)
+        robot_ids = list(dict.fromkeys(robot_ids))
+        rows = []
+        for i in range(0, len(robot_ids), SQLITE_MAX_VARIABLES):
+            chunk = robot_ids[i:i + SQLITE_MAX_VARIABLES]
+            rows += conn.execute(ROBOT_ROWS_SQL.format(', '.join('?' * len(chunk))), chunk).fetchall()
+        return result, robot_ids, rows
+
+    def _apply(self, written):
+        """(결과, robot_id 목록, 다시 읽은 행) -> 해당 로봇의 메모리 행 교체 후 결과 반환"""
+        if written is None:
+            return None  # 지연 쓰기 실패 (DB 변경 없음)
+        result, robot_ids, rows = written
+        with self._lock:
+            for robot_id in robot_ids:
+                for row_id in list(self._by_robot.get(robot_id, ())):
+                    self._discard(row_id)
+            for row in rows:
+                self._add(dict(zip(ROW_COLUMNS, row)))
+        return result
+    #endregion
+
+
+def _recency(row: dict):
+    return row['assigned_at'] or '', row['id']
@@ -0,0 +1,83 @@
+"""
+execute_code 전달 전 서버 측 문법 검사 (컴파일만 하고 실행하지 않음)
+
+로봇(Pi Zero 2 W)은 프로그램을 시작해서 파싱한 뒤에야 SyntaxError를 보고하므로, 서버에서 먼저
+compile()로 검사해 시작할 수 없는 코드는 로봇까지 보내지 않는다. 결과는 코드 SHA-256으로
+캐시하고(같은 코드를 다시 실행하면 컴파일하지 않음), 컴파일은 동시 작업 수가 제한된 풀에서 실행한다.
+
+서버와 로봇의 Python 버전이 다르면 문법이 다를 수 있으므로 서버에서 통과한 코드도 로봇에서
+오류가 날 수 있다 (반대로 막히지 않도록 최상위 await도 허용).
+"""
+
+from __future__ import annotations
+import ast
+import hashlib
+import os
+import warnings
+
+from cache import TTLCache
+from concurrency import BoundedPool
+
+SYNTAX_CHECK_WORKERS = int(os.environ.get('PF_SYNTAX_CHECK_WORKERS', 2))     # 동시에 컴파일하는 최대 수
+SYNTAX_CHECK_CACHE_SIZE = 1024      # 코드 해시 -> 검사 결과
+SYNTAX_CHECK_FILENAME = '<robot_code>'
+
+# 잘못된 이스케이프 등 컴파일 경고는 서버 로그에 남기지 않음 (사용자 코드 문제)
+warnings.filterwarnings('ignore', category=SyntaxWarning, module=SYNTAX_CHECK_FILENAME)
+warnings.filterwarnings('ignore', category=DeprecationWarning, module=SYNTAX_CHECK_FILENAME)
+
+_MISS = object()
+
+
+def compile_check(code: str) -> dict | None:
+    """코드 컴파일 (실행하지 않음), 문법 오류면 {type, message, line, column, end_line, end_column, text}, 통과하면 None"""
+    try:
+        compile(code, SYNTAX_CHECK_FILENAME, 'exec', flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT, dont_inherit=True)
+    except SyntaxError as e:    # IndentationError/TabError 포함
+        text = e.text
+        if not text and e.lineno:   # 컴파일 단계 오류('return' outside function 등)는 줄 내용이 없음
+            lines = code.splitlines()
+            text = lines[e.lineno - 1] if e.lineno <= len(lines) else ''
+        return {
+            'type': type(e).__name__,
+            'message': e.msg,
+            'line': e.lineno,
+            'column': e.offset,
+            'end_line': getattr(e, 'end_lineno', None),
+            'end_column': getattr(e, 'end_offset', None),
+            'text': (text or '').rstrip('\r\n')
+        }
+    except ValueError as e:     # 이전 Python 버전의 null 바이트 오류
+        return {'type': 'ValueError', 'message': str(e), 'line': None, 'column': None,
+                'end_line': None, 'end_column': None, 'text': ''}
+    except (MemoryError, RecursionError) as e:  # '-'*100000+'1' 같은 과도한 중첩 (파서/컴파일러 한도 초과)
+        return {'type': type(e).__name__, 'message': '코드가 너무 깊게 중첩되어 있습니다', 'line': None,
+                'column': None, 'end_line': None, 'end_column': None, 'text': ''}
+    return None
+
+
+def format_syntax_error(error: dict) -> str:
+    """검사 결과 -> 한 줄 메시지"""
+    if error['line'] is None:
+        return f"{error['type']}: {error['message']}"
+    return f"{error['type']} ({error['line']}행 {error['column']}열): {error['message']}"
+
+
+class SyntaxChecker:
+    """코드 해시 기준 캐시 + 제한된 풀에서 compile_check
+
+    모듈 import 시가 아니라 monkey_patch() 이후에 생성한다 (BoundedPool).
+    """
+
+    def __init__(self, workers: int = SYNTAX_CHECK_WORKERS, cache_size: int = SYNTAX_CHECK_CACHE_SIZE):
+        self.pool = BoundedPool(workers)
+        self.cache = TTLCache(maxsize=cache_size, ttl=None)     # 코드가 같으면 결과도 같으므로 만료 없음
+
+    def check(self, code: str) -> dict | None:
+        """문법 오류 dict 또는 None (통과)"""
+        key = hashlib.sha256(code.encode('utf-8', 'surrogatepass')).hexdigest()
+        result = self.cache.get(key, _MISS)
+        if result is _MISS:
+            result = self.pool.run(compile_check, code)
+            self.cache.set(key, result)
+        return result
@@ -0,0 +1,369 @@
+"""
+사용자 저장 코드 저장소 (내용 주소 저장 + 파일 인덱스, custom_code.db)
+
+  - custom_code_blobs    : SHA-256 -> 내용 (같은 내용은 사용자와 관계없이 한 번만 저장)
+  - custom_code_files    : (사용자, 파일명) -> 현재 해시/크기/수정 시각 (목록/검색/페이지)
+  - custom_code_versions : 파일별 저장 기록 (최근 history_limit개, 오래된 기록과 참조 없는 내용은 정리)
+  - custom_code_usage    : 사용자별 파일 수/바이트 (저장/삭제와 같은 트랜잭션에서 갱신, 할당량 확인용)
+
+파일명은 사용자(owner_id)별 네임스페이스이며, owner_id 0은 사용자 구분 이전에 저장된 파일과
+예제 코드를 담는 공용 네임스페이스다. 공용 파일은 모든 사용자의 목록/로드에 함께 보이고(같은 이름의
+내 파일이 있으면 내 파일 우선), 사용자는 읽기만 할 수 있다 (저장하면 내 네임스페이스에 복사본이 생김).
+모든 조회/변경은 (owner_id, 파일명) 인덱스만 사용하고 할당량은 카운터로 확인하므로
+비용이 전체 파일 수와 관계없다 (목록은 내 파일 + 공용 파일 수에 비례).
+
+내용이 바뀌지 않은 저장은 아무것도 쓰지 않는다. 읽기는 해시 기준 LRU 캐시를 먼저 보며,
+내용이 해시로 고정되어 있으므로 캐시 항목은 무효화할 필요가 없다.
+
+static/custom_code 디렉터리는 가져오기 위치로 사용한다 (공용 파일은 최상위, 사용자 파일은
+<sha1(user_id) 앞 2자리>/<user_id>/). 서버 시작 시 sync()가 디렉터리의 *.py 중 저장소에 없거나
+저장소 기록보다 나중에 수정된 파일을 새 버전으로 가져온다.
+
+파일/DB 작업은 run_blocking(네이티브 스레드 풀)에서, 캐시는 호출한 스레드에서 사용한다.
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import time
+from pathlib import Path
+
+from cache import TTLCache
+from concurrency import run_blocking
+
+CODE_FILE_SUFFIX = '.py'
+CODE_FILE_COLUMNS = ('name', 'size', 'mtime_ns', 'sha256')
+CODE_HISTORY_LIMIT = 20         # 파일별 보관할 버전 수
+CODE_CACHE_SIZE = 256           # 메모리에 보관할 내용 수 (자주 여는 예제 코드 등)
+CODE_QUOTA_FILES = int(os.environ.get('PF_CODE_QUOTA_FILES', 500))                 # 사용자별 파일 수
+CODE_QUOTA_BYTES = int(os.environ.get('PF_CODE_QUOTA_BYTES', 10 * 1024 * 1024))    # 사용자별 현재 파일 크기 합
+SHARED_OWNER_ID = 0             # 사용자 구분 이전의 공용 파일
+
+# 조회/변경 쿼리 (util/check_query_plans.py가 같은 문자열로 인덱스 사용 여부를 확인)
+ENTRY_SQL = f'''
+    SELECT {', '.join(CODE_FILE_COLUMNS)} FROM custom_code_files WHERE owner_id = ? AND name = ?
+'''
+# 내 파일 우선, 없으면 공용 파일 (owner_id, 파일명, 공용 owner_id 2번)
+LOOKUP_SQL = f'''
+    SELECT owner_id, {', '.join(CODE_FILE_COLUMNS)} FROM custom_code_files
+    WHERE owner_id IN (?, ?) AND name = ?
+    ORDER BY owner_id = ?
+    LIMIT 1
+'''
+CONTENT_SQL = 'SELECT content FROM custom_code_blobs WHERE sha256 = ?'
+VERSIONS_SQL = '''
+    SELECT sha256, size, saved_at_ns FROM custom_code_versions
+    WHERE owner_id = ? AND name = ?
+    ORDER BY saved_at_ns DESC
+'''
+USAGE_SQL = 'SELECT files, bytes FROM custom_code_usage WHERE owner_id = ?'
+CURRENT_SQL = f'''
+    SELECT {', '.join('f.' + column for column in CODE_FILE_COLUMNS)}, b.sha256 IS NOT NULL
+    FROM custom_code_files f
+    LEFT JOIN custom_code_blobs b ON b.sha256 = f.sha256
+    WHERE f.owner_id = ? AND f.name = ?
+'''
+INSERT_BLOB_SQL = 'INSERT OR IGNORE INTO custom_code_blobs (sha256, content) VALUES (?, ?)'
+UPSERT_FILE_SQL = f'''
+    INSERT INTO custom_code_files (owner_id, {', '.join(CODE_FILE_COLUMNS)})
+    VALUES (:owner_id, :name, :size, :mtime_ns, :sha256)
+    ON CONFLICT (owner_id, name) DO UPDATE SET
+        size = excluded.size,
+        mtime_ns = excluded.mtime_ns,
+        sha256 = excluded.sha256
+'''
+INSERT_VERSION_SQL = '''
+    INSERT OR REPLACE INTO custom_code_versions (owner_id, name, saved_at_ns, sha256, size)
+    VALUES (:owner_id, :name, :mtime_ns, :sha256, :size)
+'''
+# 보관 개수(마지막 ?)를 넘은 오래된 버전
+EXPIRED_VERSIONS_SQL = '''
+    SELECT saved_at_ns, sha256 FROM custom_code_versions
+    WHERE owner_id = ? AND name = ?
+    ORDER BY saved_at_ns DESC
+    LIMIT -1 OFFSET ?
+'''
+DELETE_VERSION_SQL = 'DELETE FROM custom_code_versions WHERE owner_id = ? AND name = ? AND saved_at_ns = ?'
+VERSION_SHAS_SQL = 'SELECT sha256 FROM custom_code_versions WHERE owner_id = ? AND name = ?'
+DELETE_VERSIONS_SQL = 'DELETE FROM custom_code_versions WHERE owner_id = ? AND name = ?'
+FILE_SIZE_SQL = 'SELECT size FROM custom_code_files WHERE owner_id = ? AND name = ?'
+DELETE_FILE_SQL = 'DELETE FROM custom_code_files WHERE owner_id = ? AND name = ?'
+ADD_USAGE_SQL = '''
+    INSERT INTO custom_code_usage (owner_id, files, bytes) VALUES (?, ?, ?)
+    ON CONFLICT (owner_id) DO UPDATE SET
+        files = files + excluded.files,
+        bytes = bytes + excluded.bytes
+'''
+# 어떤 버전도 참조하지 않는 내용 (sha256 2번)
+COLLECT_SQL = '''
+    DELETE FROM custom_code_blobs
+    WHERE sha256 = ? AND NOT EXISTS (SELECT 1 FROM custom_code_versions WHERE sha256 = ?)
+'''
+
+
+def page_sql(owner_id: int, prefix: str | None = None) -> tuple[str | None, str, dict]:
+    """파일 목록 쿼리 (전체 수 SQL - 공용 네임스페이스 전체면 None(사용량 카운터 사용), 목록 SQL, 파라미터)
+
+    목록 SQL의 :limit / :offset은 호출한 쪽에서 채운다.
+    """
+    params = {'owner_id': owner_id, 'shared_id': SHARED_OWNER_ID}
+    name_filter = ''
+    if prefix:
+        name_filter = " AND name LIKE :prefix ESCAPE '\\'"
+        params['prefix'] = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    if owner_id == SHARED_OWNER_ID:
+        where = f"WHERE owner_id = :owner_id{name_filter}"
+    else:
+        # 내 파일 + 같은 이름의 내 파일이 없는 공용 파일
+        where = f'''
+            WHERE (owner_id = :owner_id{name_filter})
+               OR (owner_id = :shared_id{name_filter} AND NOT EXISTS (
+                   SELECT 1 FROM custom_code_files own WHERE own.owner_id = :owner_id AND own.name = f.name))
+        '''
+    count_sql = None
+    if prefix or owner_id != SHARED_OWNER_ID:
+        count_sql = f"SELECT COUNT(*) FROM custom_code_files f {where}"
+    rows_sql = f'''
+        SELECT owner_id, {', '.join(CODE_FILE_COLUMNS)} FROM custom_code_files f {where}
+        ORDER BY mtime_ns DESC, name
+        LIMIT :limit OFFSET :offset
+    '''
+    return count_sql, rows_sql, params
+
+
+class CodeQuotaError(Exception):
+    """사용자 할당량 초과"""
+
+    def __init__(self, message: str, usage: dict):
+        super().__init__(message)
+        self.usage = usage
+
+
+class CodeIndex:
+    def __init__(self, db, directory: Path, history_limit: int = CODE_HISTORY_LIMIT,
+                 cache_size: int = CODE_CACHE_SIZE, max_files: int = CODE_QUOTA_FILES,
+                 max_bytes: int = CODE_QUOTA_BYTES):
+        self.db = db
+        self.directory = Path(directory)
+        self.history_limit = history_limit
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.cache = TTLCache(maxsize=cache_size, ttl=None)     # sha256 -> 내용 (str)
+
+    def check_name(self, name: str) -> str:
+        """파일명 검증 (하위/상위 디렉터리를 가리키는 이름은 ValueError)"""
+        if Path(name).name != name or not name.endswith(CODE_FILE_SUFFIX) or name == CODE_FILE_SUFFIX:
+            raise ValueError(f"잘못된 파일명입니다: {name}")
+        return name
+
+    def owner_dir(self, owner_id: int) -> Path:
+        """사용자의 가져오기 디렉터리 (user_id 해시 앞 2자리로 나눠 한 디렉터리에 항목이 몰리지 않게 함)"""
+        if owner_id == SHARED_OWNER_ID:
+            return self.directory
+        shard = hashlib.sha1(str(owner_id).encode()).hexdigest()[:2]
+        return self.directory / shard / str(owner_id)
+
+    #region 조회
+    def page(self, owner_id: int, prefix: str | None = None, limit: int | None = None,
+             offset: int = 0) -> tuple[int, list[dict]]:
+        """사용자의 최근 수정 순 파일 목록 (공용 파일 포함, prefix: 파일명 앞부분, 영문 대소문자 무시)
+
+        (전체 수, 파일 dict 목록) 반환, 파일 dict의 shared는 공용 파일 여부
+        """
+        return run_blocking(self._page, owner_id, prefix, limit, offset)
+
+    def _page(self, owner_id, prefix, limit, offset):
+        count_sql, rows_sql, params = page_sql(owner_id, prefix)
+        params.update(limit=-1 if limit is None else limit, offset=offset)
+        with self.db.connection() as conn:
+            if count_sql:
+                total = conn.execute(count_sql, params).fetchone()[0]
+            else:
+                total = self._usage(conn, owner_id)[0]
+            rows = conn.execute(rows_sql, params).fetchall()
+        return total, [dict(zip(CODE_FILE_COLUMNS, row[1:]), shared=row[0] != owner_id) for row in rows]
+
+    def entry(self, owner_id: int, name: str) -> dict | None:
+        """파일의 현재 항목 (name/size/mtime_ns/sha256), 없으면 None"""
+        row = run_blocking(self.db.fetchone, ENTRY_SQL, (owner_id, self.check_name(name)))
+        return dict(zip(CODE_FILE_COLUMNS, row)) if row else None
+
+    def lookup(self, owner_id: int, name: str) -> dict | None:
+        """내 파일, 없으면 공용 파일의 현재 항목 (entry + owner_id/shared), 둘 다 없으면 None"""
+        row = run_blocking(self.db.fetchone, LOOKUP_SQL,
+                           (owner_id, SHARED_OWNER_ID, self.check_name(name), SHARED_OWNER_ID))
+        if row is None:
+            return None
+        return dict(zip(CODE_FILE_COLUMNS, row[1:]), owner_id=row[0], shared=row[0] != owner_id)
+
+    def content(self, sha256: str) -> str | None:
+        """해시 -> 내용 (캐시에 없으면 DB에서 읽어 캐시), 없으면 None"""
+        code = self.cache.get(sha256)
+        if code is None:
+            row = run_blocking(self.db.fetchone, CONTENT_SQL, (sha256,))
+            if row is None:
+                return None
+            code = row[0].decode('utf-8')
+            self.cache.set(sha256, code)
+        return code
+
+    def versions(self, owner_id: int, name: str) -> list[dict]:
+        """파일의 저장 기록 (최근 순) [{sha256, size, saved_at_ns}, ...]"""
+        rows = run_blocking(self.db.fetchall, VERSIONS_SQL, (owner_id, self.check_name(name)))
+        return [{'sha256': row[0], 'size': row[1], 'saved_at_ns': row[2]} for row in rows]
+
+    def usage(self, owner_id: int) -> dict:
+        """사용자의 사용량/할당량 {files, bytes, max_files, max_bytes}"""
+        files, size = run_blocking(self._usage_row, owner_id)
+        return self._usage_dict(files, size)
+
+    def _usage_row(self, owner_id):
+        with self.db.connection() as conn:
+            return self._usage(conn, owner_id)
+
+    @staticmethod
+    def _usage(conn, owner_id) -> tuple[int, int]:
+        row = conn.execute(USAGE_SQL, (owner_id,)).fetchone()
+        return tuple(row) if row else (0, 0)
+
+    def _usage_dict(self, files, size):
+        return {'files': files, 'bytes': size, 'max_files': self.max_files, 'max_bytes': self.max_bytes}
+    #endregion
+
+    #region 변경
+    def write(self, owner_id: int, name: str, code: str) -> tuple[dict, bool]:
+        """내용 저장, (현재 항목, 실제로 바뀌었는지) 반환 - 내용이 같으면 아무것도 쓰지 않음
+
+        할당량(파일 수/바이트)을 넘으면 CodeQuotaError
+        """
+        data = code.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+        entry, changed = run_blocking(self._write, owner_id, self.check_name(name), data, sha256, time.time_ns())
+        self.cache.set(sha256, code)
+        return entry, changed
+
+    def _write(self, owner_id, name, data, sha256, mtime_ns):
+        with self.db.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')     # 사용량 확인과 갱신 사이에 다른 저장이 끼지 않도록
+            return self._store(conn, owner_id, name, data, sha256, mtime_ns, enforce_quota=True)
+
+    def _store(self, conn, owner_id, name, data, sha256, mtime_ns, enforce_quota=False):
+        """(호출한 쪽의 트랜잭션 안에서) 내용/이름/버전/사용량 기록, 오래된 버전 정리"""
+        current = conn.execute(CURRENT_SQL, (owner_id, name)).fetchone()
+        if current and current[3] == sha256 and current[4]:
+            return dict(zip(CODE_FILE_COLUMNS, current)), False
+
+        added_files = 0 if current else 1
+        added_bytes = len(data) - (current[1] if current else 0)
+        if enforce_quota:
+            files, size = self._usage(conn, owner_id)
+            if files + added_files > self.max_files:
+                raise CodeQuotaError(f"파일 수 할당량({self.max_files}개)을 초과했습니다.", self._usage_dict(files, size))
+            if added_bytes > 0 and size + added_bytes > self.max_bytes:
+                raise CodeQuotaError(f"저장 용량 할당량({self.max_bytes} bytes)을 초과했습니다.",
+                                     self._usage_dict(files, size))
+
+        entry = {'owner_id': owner_id, 'name': name, 'size': len(data), 'mtime_ns': mtime_ns, 'sha256': sha256}
+        conn.execute(INSERT_BLOB_SQL, (sha256, data))
+        conn.execute(UPSERT_FILE_SQL, entry)
+        conn.execute(INSERT_VERSION_SQL, entry)
+        self._add_usage(conn, owner_id, added_files, added_bytes)
+
+        # 보관 개수를 넘은 오래된 버전 삭제
+        expired = conn.execute(EXPIRED_VERSIONS_SQL, (owner_id, name, self.history_limit)).fetchall()
+        conn.executemany(DELETE_VERSION_SQL, [(owner_id, name, saved_at_ns) for saved_at_ns, _ in expired])
+        self._collect(conn, {sha for _, sha in expired})
+        del entry['owner_id']
+        return entry, True
+
+    def delete(self, owner_id: int, name: str) -> bool:
+        """파일(이름, 버전 기록, 가져오기 디렉터리의 파일) 삭제, 없던 파일이면 False"""
+        return run_blocking(self._delete, owner_id, self.check_name(name))
+
+    def _delete(self, owner_id, name) -> bool:
+        with self.db.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            shas = {row[0] for row in conn.execute(VERSION_SHAS_SQL, (owner_id, name))}
+            conn.execute(DELETE_VERSIONS_SQL, (owner_id, name))
+            existed = self._remove_file(conn, owner_id, name)
+            self._collect(conn, shas)
+        # 다음 sync()에서 다시 가져오지 않도록 디렉터리의 파일도 삭제
+        try:
+            (self.owner_dir(owner_id) / name).unlink()
+            existed = True
+        except FileNotFoundError:
+            pass
+        return existed
+
+    def _remove_file(self, conn, owner_id, name) -> bool:
+        """파일 항목 삭제 + 사용량 반영, 없던 항목이면 False"""
+        row = conn.execute(FILE_SIZE_SQL, (owner_id, name)).fetchone()
+        if row is None:
+            return False
+        conn.execute(DELETE_FILE_SQL, (owner_id, name))
+        self._add_usage(conn, owner_id, -1, -row[0])
+        return True
+
+    @staticmethod
+    def _add_usage(conn, owner_id, files, size):
+        if files or size:
+            conn.execute(ADD_USAGE_SQL, (owner_id, files, size))
+
+    @staticmethod
+    def _collect(conn, shas):
+        """어떤 버전도 참조하지 않는 내용 삭제"""
+        conn.executemany(COLLECT_SQL, [(sha, sha) for sha in shas])
+    #endregion
+
+    #region 디렉터리 가져오기
+    def sync(self) -> tuple[int, int]:
+        """가져오기 디렉터리 대조, (가져온 파일 수, 내용을 잃어 삭제한 항목 수) 반환"""
+        imported, removed = run_blocking(self._sync)
+        print(f"코드 저장소 디렉터리 대조: 가져옴 {imported}개, 삭제 {removed}개")
+        return imported, removed
+
+    def _owner_dirs(self):
+        """(owner_id, 디렉터리) - 공용(최상위)과 <shard>/<user_id>/"""
+        yield SHARED_OWNER_ID, self.directory
+        with os.scandir(self.directory) as shards:
+            shard_dirs = [shard.path for shard in shards if shard.is_dir() and len(shard.name) == 2]
+        for shard_dir in shard_dirs:
+            with os.scandir(shard_dir) as owners:
+                for owner in owners:
+                    if owner.is_dir() and owner.name.isdigit():
+                        yield int(owner.name), Path(owner.path)
+
+    def _sync(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.db.connection() as conn:
+            indexed = {(owner_id, name): (mtime_ns, has_blob) for owner_id, name, mtime_ns, has_blob in conn.execute('''
+                SELECT f.owner_id, f.name, f.mtime_ns, b.sha256 IS NOT NULL FROM custom_code_files f
+                LEFT JOIN custom_code_blobs b ON b.sha256 = f.sha256
+            ''')}
+
+        # 저장소에 없거나, 내용이 없거나, 저장소 기록보다 나중에 수정된 파일만 읽음
+        files, seen = [], set()
+        for owner_id, directory in self._owner_dirs():
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(CODE_FILE_SUFFIX) or not entry.is_file():
+                        continue
+                    seen.add((owner_id, entry.name))
+                    mtime_ns, has_blob = indexed.get((owner_id, entry.name), (None, False))
+                    st = entry.stat()
+                    if not has_blob or st.st_mtime_ns > mtime_ns:
+                        with open(entry.path, 'rb') as f:
+                            data = f.read()
+                        files.append((owner_id, entry.name, data, hashlib.sha256(data).hexdigest(), st.st_mtime_ns))
+
+        # 내용이 없는 항목(이전 버전의 파일 인덱스)인데 디렉터리에도 파일이 없으면 삭제
+        lost = [key for key, (_, has_blob) in indexed.items() if not has_blob and key not in seen]
+        imported = 0
+        with self.db.connection() as conn:
+            # 디렉터리에서 가져오는 파일은 관리자가 둔 것이므로 할당량은 확인하지 않음 (사용량에는 반영)
+            for owner_id, name, data, sha256, mtime_ns in files:
+                imported += self._store(conn, owner_id, name, data, sha256, mtime_ns)[1]
+            for owner_id, name in lost:
+                self._remove_file(conn, owner_id, name)
+        return imported, len(lost)
+    #endregion
@@ -0,0 +1,102 @@
+"""
+로봇 코드 전송 최적화 (해시 참조 / 줄 단위 delta)
+
+실행할 때마다 전체 코드를 보내는 대신, 로봇 연결(세션)별로 마지막으로 보낸 프로그램을 기억해 두고
+  - 같은 코드       : {'code_ref': sha256}
+  - 일부만 바뀐 코드 : {'code_delta': {'base': 이전 sha256, 'ops': [...]}}
+  - 그 외          : {'code': 전체 코드}
+를 보낸다 (모두 'code_sha256' 포함). robot_connected에서 code_cache: true를 보낸 로봇에만 사용하고,
+로봇은 받은 프로그램을 해시로 보관하다가 참조/기준 버전이 없거나 적용 결과의 해시가 다르면
+code_cache_miss를 보내며, 서버는 전체 코드로 다시 보낸다.
+
+delta ops: [시작, 끝] = 이전 코드의 해당 줄 범위(splitlines(keepends=True)) 그대로, 문자열 = 새 내용.
+apply_delta()는 표준 라이브러리만 사용하므로 로봇 클라이언트에서 그대로 쓸 수 있다.
+
+상태는 워커 프로세스 메모리에만 있다 (멀티 워커에서 다른 워커가 보낸 코드는 모르므로 전체 전송 또는
+기준 버전 불일치 -> code_cache_miss로 처리됨).
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+from difflib import SequenceMatcher
+
+CODE_DELTA_MAX_RATIO = 0.7      # delta가 전체 코드의 이 비율 이상이면 전체 전송
+CODE_DELTA_MAX_LINES = 5000     # 이보다 긴 코드는 비교하지 않고 전체 전송 (비교 비용 제한)
+
+
+def code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def make_delta(base: str, code: str) -> list:
+    """base -> code 줄 단위 delta ops"""
+    old = base.splitlines(keepends=True)
+    new = code.splitlines(keepends=True)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j1 < j2:   # replace / insert (delete는 복사하지 않는 것으로 충분)
+            ops.append(''.join(new[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, ops: list) -> str:
+    """delta ops 적용 (로봇 측), 결과 해시는 호출한 쪽에서 code_sha256과 비교"""
+    old = base.splitlines(keepends=True)
+    return ''.join(''.join(old[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+class CodeSync:
+    """로봇 세션별 마지막 전송 프로그램 + 전송 방식 선택"""
+
+    def __init__(self, max_ratio: float = CODE_DELTA_MAX_RATIO, max_lines: int = CODE_DELTA_MAX_LINES):
+        self.max_ratio = max_ratio
+        self.max_lines = max_lines
+        self._last: dict[str, tuple[str, str, str]] = {}    # 로봇 session_id -> (sha256, 코드, 실행한 브라우저 session_id)
+        self.sent = {'full': 0, 'ref': 0, 'delta': 0}
+        self.misses = 0
+        self.bytes_saved = 0    # 전체 전송 대비 줄인 코드 크기 (대략, 문자 수)
+
+    def prepare(self, robot_sid: str, code: str, session_id: str) -> dict:
+        """로봇에 보낼 execute_code payload (session_id 제외), 보낸 코드와 실행한 브라우저 세션을 기록"""
+        sha256 = code_hash(code)
+        last = self._last.get(robot_sid)
+        self._last[robot_sid] = (sha256, code, session_id)
+
+        if last and last[0] == sha256:
+            self._count('ref', len(code) - len(sha256))
+            return {'code_ref': sha256, 'code_sha256': sha256}
+
+        if last and code.count('\n') <= self.max_lines and last[1].count('\n') <= self.max_lines:
+            ops = make_delta(last[1], code)
+            size = len(json.dumps(ops, ensure_ascii=False))
+            if size < len(code) * self.max_ratio:
+                self._count('delta', len(code) - size)
+                return {'code_delta': {'base': last[0], 'ops': ops}, 'code_sha256': sha256}
+
+        self._count('full', 0)
+        return {'code': code, 'code_sha256': sha256}
+
+    def resend(self, robot_sid: str, sha256: str) -> dict | None:
+        """로봇이 code_cache_miss를 보냈을 때 전체 코드 payload (session_id는 기록된 브라우저 세션)
+
+        그 사이 다른 코드를 보냈으면 None - 이전 실행은 이미 새 실행으로 대체되었고,
+        새 실행이 같은 기준 프로그램을 참조했다면 그 실행의 code_cache_miss로 다시 보낸다.
+        """
+        self.misses += 1
+        last = self._last.get(robot_sid)
+        if not last or last[0] != sha256:
+            self._last.pop(robot_sid, None)     # 로봇 상태를 알 수 없으므로 다음 실행은 전체 전송
+            return None
+        self._count('full', 0)
+        return {'code': last[1], 'code_sha256': sha256, 'session_id': last[2]}
+
+    def discard(self, robot_sid: str):
+        """로봇 연결 해제/재등록 시 기록 삭제 (로봇 쪽 보관 프로그램도 없어졌을 수 있음)"""
+        self._last.pop(robot_sid, None)
+
+    def _count(self, kind: str, saved: int):
+        self.sent[kind] += 1
+        self.bytes_saved += max(0, saved)
@@ -0,0 +1,105 @@
+"""
+서버 비동기 모드 설정 및 블로킹 작업 오프로딩
+
+PF_ASYNC_MODE 환경변수로 SocketIO 비동기 모드를 선택한다.
+  - threading : 기본값, 웹소켓마다 OS 스레드 1개 (개발용 Werkzeug 서버)
+  - eventlet  : 그린 스레드 (eventlet.wsgi 서버)
+  - gevent    : 그린 스레드 (gevent pywsgi + gevent-websocket)
+
+그린 스레드 모드에서는 sqlite3 같은 C 확장 호출이 이벤트 루프 전체를 멈추므로
+DB 함수는 @offload로 감싸 네이티브 스레드 풀에서 실행한다.
+"""
+
+import os
+from functools import wraps
+
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+ASYNC_MODE = os.environ.get('PF_ASYNC_MODE', 'threading')
+if ASYNC_MODE not in ASYNC_MODES:
+    raise ValueError(f"PF_ASYNC_MODE는 {ASYNC_MODES} 중 하나여야 합니다: {ASYNC_MODE}")
+
+
+def monkey_patch():
+    """그린 스레드 모드의 표준 라이브러리 패치 (다른 모듈 import 전에 호출)"""
+    if ASYNC_MODE == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif ASYNC_MODE == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+
+def run_blocking(func, *args, **kwargs):
+    """블로킹 함수를 이벤트 루프 밖(네이티브 스레드 풀)에서 실행하고 결과 반환"""
+    if ASYNC_MODE == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args, **kwargs)
+    if ASYNC_MODE == 'gevent':
+        import gevent
+        return gevent.get_hub().threadpool.apply(func, args, kwargs)
+    return func(*args, **kwargs)
+
+
+def map_blocking(func, items, workers: int = 4, runner=None) -> list:
+    """items 각각에 func를 네이티브 스레드 최대 workers개로 병렬 실행하고 결과 목록 반환 (순서 유지)
+
+    CPU를 많이 쓰는 작업(비밀번호 해시 등)용. runner는 항목 하나를 실행할 함수 (기본 run_blocking).
+    요청/백그라운드 태스크에서만 호출한다 (run_blocking/@offload로 실행 중인 함수 안에서 호출하지 않음).
+    """
+    runner = runner or run_blocking
+    items = list(items)
+    if ASYNC_MODE == 'eventlet':
+        import eventlet
+        return list(eventlet.GreenPool(workers).imap(lambda item: runner(func, item), items))
+    if ASYNC_MODE == 'gevent':
+        from gevent.pool import Pool
+        return Pool(workers).map(lambda item: runner(func, item), items)
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda item: runner(func, item), items))
+
+
+class BoundedPool:
+    """동시에 실행되는 작업을 workers개로 제한하는 run_blocking
+
+    비밀번호 해시처럼 CPU를 오래 쓰는 작업이 몰려도 네이티브 스레드 풀(DB 오프로딩과 공유)과
+    CPU를 모두 차지하지 않도록 한다. 초과한 호출은 호출한 (그린) 스레드에서 차례를 기다린다.
+    모듈 import 시가 아니라 monkey_patch() 이후에 생성한다 (그린 스레드용 세마포어 사용).
+    """
+
+    def __init__(self, workers: int):
+        import threading
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers)
+        self._count_lock = threading.Lock()
+        self.waiting = 0    # 차례를 기다리는 호출 수
+        self.running = 0    # 실행 중인 작업 수
+
+    def run(self, func, *args, **kwargs):
+        self._count(waiting=1)
+        self._slots.acquire()
+        self._count(waiting=-1, running=1)
+        try:
+            return run_blocking(func, *args, **kwargs)
+        finally:
+            self._count(running=-1)
+            self._slots.release()
+
+    def _count(self, waiting: int = 0, running: int = 0):
+        with self._count_lock:
+            self.waiting += waiting
+            self.running += running
+
+    def map(self, func, items) -> list:
+        return map_blocking(func, items, self.workers, runner=self.run)
+
+
+def offload(func):
+    """run_blocking으로 실행되도록 감싸는 데코레이터 (threading 모드에서는 그대로 호출)"""
+    if ASYNC_MODE == 'threading':
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return run_blocking(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,89 @@
+"""
+SQLite 데이터 접근 계층 (커넥션 풀 + WAL)
+
+요청마다 sqlite3.connect()/close() 하지 않고 열어 둔 커넥션을 재사용한다.
+  - WAL 저널 모드: 읽기와 쓰기가 서로 막지 않음
+  - busy_timeout: 쓰기가 겹치면 바로 'database is locked'를 내지 않고 대기
+  - 커넥션별 statement 캐시: 같은 SQL 문자열은 다시 파싱하지 않음
+
+풀은 deque(append/pop이 원자적)라 lock이 필요 없다. eventlet/gevent 모드에서
+@offload로 네이티브 스레드 풀에서 호출되어도 (패치된 threading.local/Lock 없이) 안전하다.
+"""
+
+from __future__ import annotations
+import sqlite3
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+DB_DIR = Path(__file__).parent / "static" / "db"
+AUTH_DB_PATH = DB_DIR / "auth.db"
+TUTORIAL_DB_PATH = DB_DIR / "tutorial.db"
+CODE_DB_PATH = DB_DIR / "custom_code.db"
+
+POOL_SIZE = 8               # 유휴 상태로 유지할 최대 커넥션 수
+BUSY_TIMEOUT = 5.0          # 잠금 대기 시간 (초)
+STATEMENT_CACHE_SIZE = 128  # 커넥션별 prepared statement 캐시 크기
+
+
+class Database:
+    def __init__(self, path: Path, pool_size: int = POOL_SIZE, busy_timeout: float = BUSY_TIMEOUT):
+        self.path = Path(path)
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self._idle: deque[sqlite3.Connection] = deque()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path,
+                               timeout=self.busy_timeout,
+                               check_same_thread=False,     # 풀에서 여러 스레드가 번갈아 사용
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """커넥션 대여 - 블록이 정상 종료되면 commit, 예외면 rollback 후 풀에 반납"""
+        try:
+            conn = self._idle.pop()
+        except IndexError:
+            conn = self._connect()
+
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+            else:
+                conn.close()
+
+    def fetchone(self, sql: str, params: tuple = ()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: tuple = ()) -> list:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """쓰기 쿼리 실행 후 commit (반환된 cursor는 rowcount/lastrowid 확인용)"""
+        with self.connection() as conn:
+            return conn.execute(sql, params)
+
+    def close_all(self):
+        """유휴 커넥션 모두 닫기 (DB 파일 삭제/교체 전 호출)"""
+        while self._idle:
+            try:
+                self._idle.pop().close()
+            except IndexError:
+                break
+
+
+auth_db = Database(AUTH_DB_PATH)
+tutorial_db = Database(TUTORIAL_DB_PATH)
+code_db = Database(CODE_DB_PATH)
@@ -0,0 +1,143 @@
+"""
+로봇 하트비트 기반 생존 확인(liveness) 스위퍼
+"""
+
+from __future__ import annotations
+import heapq
+import threading
+import time
+
+from relay import robot_room
+
+
+class HeartbeatSweeper:
+    """마지막 하트비트 시각을 min-heap으로 관리하며 만료된 로봇을 주기적으로 정리
+
+    - timeout 동안 하트비트가 없으면 status를 'offline'으로 바꾸고,
+      로봇이 할당된 세션의 할당을 해제한 뒤 'robot_offline' 이벤트를 보낸다.
+    - offline 상태로 evict_after가 더 지나면 registered_robots에서 제거한다.
+
+    하트비트는 last_seen만 갱신(O(1))하고 heap은 건드리지 않는다.
+    heap에서 꺼낸 항목의 기한이 그 사이 연장되었으면 새 기한으로 다시 넣으므로
+    스위프 비용은 기한이 된 항목 수에 비례하고, heap에는 로봇당 유효한 항목이 1개만 있다.
+
+    heap은 워커마다 따로 있지만 offline/제거는 공유 레지스트리를 바꾸므로, 실행 전에 레지스트리의
+    last_heartbeat를 다시 확인한다. 로봇이 다른 워커로 재연결해 하트비트를 보내고 있으면
+    이 워커는 아무것도 바꾸지 않고 공유 기록 기준으로 다시 추적한다.
+    """
+
+    def __init__(self, socketio, registered_robots, integrated_mapping,
+                 timeout: float = 30, evict_after: float = 600, interval: float = 1.0):
+        self.socketio = socketio
+        self.registered_robots = registered_robots
+        self.integrated_mapping = integrated_mapping
+        self.timeout = timeout          # 하트비트 없이 이 시간이 지나면 offline (초)
+        self.evict_after = evict_after  # offline 이후 이 시간이 더 지나면 레지스트리에서 제거 (초)
+        self.interval = interval        # 스위프 주기 (초)
+        self._heap: list[tuple[float, str]] = []
+        self._deadline: dict[str, float] = {}   # 로봇별 유효한 heap 항목의 기한 (다르면 무시할 항목)
+        self._last_seen: dict[str, float] = {}
+        self._offline: dict[str, float] = {}    # offline 로봇 -> offline 전환 시각
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        """백그라운드 스위프 태스크 시작 (한 번만)"""
+        if not self._started:
+            self._started = True
+            self.socketio.start_background_task(self._run)
+
+    def beat(self, robot_id: str, now: float | None = None):
+        """하트비트(또는 로봇 연결) 기록"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._last_seen[robot_id] = now
+            if robot_id not in self._deadline or self._offline.pop(robot_id, None) is not None:
+                self._schedule(robot_id, now + self.timeout)
+
+    def forget(self, robot_id: str):
+        """로봇 등록 해제/삭제 시 추적 중단 (남은 heap 항목은 꺼낼 때 무시됨)"""
+        with self._lock:
+            self._deadline.pop(robot_id, None)
+            self._last_seen.pop(robot_id, None)
+            self._offline.pop(robot_id, None)
+
+    def sweep(self, now: float | None = None) -> list[str]:
+        """기한이 지난 항목 처리, offline으로 전환된 robot_id 목록 반환"""
+        now = time.time() if now is None else now
+        expired, evicted = [], []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, robot_id = heapq.heappop(self._heap)
+                if self._deadline.get(robot_id) != deadline:
+                    continue  # 이후에 다시 예약되었거나 forget()된 로봇의 항목
+
+                if robot_id in self._offline:
+                    # offline 상태로 evict_after 경과
+                    del self._deadline[robot_id]
+                    del self._last_seen[robot_id]
+                    del self._offline[robot_id]
+                    evicted.append(robot_id)
+                    continue
+
+                next_deadline = self._last_seen[robot_id] + self.timeout
+                if next_deadline <= now:
+                    self._offline[robot_id] = now
+                    expired.append(robot_id)
+                    next_deadline = now + self.evict_after
+                self._schedule(robot_id, next_deadline)
+
+        # 레지스트리 확인은 lock 밖에서 (Redis 레지스트리는 네트워크 호출)
+        expired = [robot_id for robot_id in expired if not self._alive_elsewhere(robot_id, now)]
+        for robot_id in expired:
+            self._expire(robot_id)
+        for robot_id in evicted:
+            if self._alive_elsewhere(robot_id, now, evict=True):
+                continue
+            self.registered_robots.remove(robot_id)
+            print(f"🤖 로봇 {robot_id}: 장시간 offline 상태로 레지스트리에서 제거")
+        return expired
+
+    def _alive_elsewhere(self, robot_id: str, now: float, evict: bool = False) -> bool:
+        """공유 레지스트리의 last_heartbeat가 이 워커의 기록보다 최근이면 다시 추적하고 True (처리 생략)"""
+        info = self.registered_robots.get(robot_id)
+        if info is None:
+            self.forget(robot_id)   # 이미 제거됨
+            return True
+        last = info.get('last_heartbeat') or 0
+        if last + self.timeout > now:
+            self.beat(robot_id, last)   # 다른 워커에서 하트비트 수신 중
+            return True
+        if evict and last + self.timeout + self.evict_after > now:
+            # offline 이후 다른 워커에서 잠시 살아났던 로봇: 그 시각 기준으로 제거를 미룸
+            with self._lock:
+                self._last_seen[robot_id] = last
+                self._offline[robot_id] = last + self.timeout
+                self._schedule(robot_id, last + self.timeout + self.evict_after)
+            return True
+        return False
+
+    def _schedule(self, robot_id: str, deadline: float):
+        self._deadline[robot_id] = deadline
+        heapq.heappush(self._heap, (deadline, robot_id))
+
+    def _expire(self, robot_id: str):
+        """offline 전환 - 상태 변경, 세션 할당 해제, offline 이벤트 전송"""
+        if robot_id not in self.registered_robots:
+            return
+        self.registered_robots.update(robot_id, status='offline')
+        self.registered_robots.set_session(robot_id, None)
+
+        payload = {'robot_id': robot_id, 'message': f'로봇 {robot_id}의 연결이 끊어졌습니다.'}
+        for sid in self.integrated_mapping.unassign_robot(robot_id):
+            self.socketio.emit('robot_offline', payload, room=sid)
+        self.socketio.emit('robot_offline', payload, room=robot_room(robot_id))
+        print(f"🤖 로봇 {robot_id}: 하트비트 없음 - offline 처리")
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"하트비트 스위프 오류: {e}")
@@ -0,0 +1,216 @@
+"""
+Socket.IO 핸들러 / HTTP 라우트 성능 지표 (Prometheus 텍스트 형식)
+
+외부 의존성 없이 카운터/게이지/히스토그램만 구현한다.
+관측 1회는 lock 한 번 + bisect 한 번이라 운영 환경에서 켜 두어도 부담이 작다.
+멀티 워커 모드에서는 워커마다 자기 지표만 노출한다.
+"""
+
+from __future__ import annotations
+import bisect
+import inspect
+import threading
+import time
+from functools import wraps
+
+from flask import Response, request
+
+# 지연 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Gauge:
+    """스크레이프 시점에 함수를 호출해 값을 읽는 게이지 (kind='counter'면 외부 누적 카운터)"""
+
+    def __init__(self, name: str, help_text: str, func, kind: str = 'gauge'):
+        self.name = name
+        self.help = help_text
+        self.func = func
+        self.kind = kind
+
+    def render(self) -> list[str]:
+        try:
+            value = self.func()
+        except Exception as e:
+            print(f"지표 {self.name} 조회 오류: {e}")
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", f"{self.name} {value}"]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._values: dict[tuple, list] = {}    # labels -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(data)) for key, data in self._values.items()]
+        for key, data in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {data[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {data[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {data[-1]}")
+        return lines
+
+
+class Metrics:
+    """지표 저장소 + Flask/SocketIO 계측"""
+
+    def __init__(self):
+        self._metrics: list = []
+
+        self.socketio_events = self.counter('pf_socketio_events_total', 'Socket.IO 이벤트 처리 수')
+        self.socketio_errors = self.counter('pf_socketio_errors_total', 'Socket.IO 핸들러 예외 수')
+        self.socketio_bytes = self.counter('pf_socketio_received_bytes_total', 'Socket.IO 이벤트로 수신한 페이로드 바이트 수')
+        self.socketio_latency = self.histogram('pf_socketio_handler_seconds', 'Socket.IO 핸들러 처리 시간')
+        self.http_requests = self.counter('pf_http_requests_total', 'HTTP 요청 수')
+        self.http_errors = self.counter('pf_http_errors_total', 'HTTP 5xx 응답 수')
+        self.http_latency = self.histogram('pf_http_request_seconds', 'HTTP 요청 처리 시간')
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help_text: str, func, kind: str = 'gauge') -> Gauge:
+        metric = Gauge(name, help_text, func, kind)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    #region Socket.IO 계측
+    def instrument_socketio(self, socketio):
+        """socketio.on 데코레이터를 감싸 이후 등록되는 모든 핸들러를 계측 (핸들러 정의 전에 호출)"""
+        original_on = socketio.on
+
+        def on(message, namespace=None):
+            register = original_on(message, namespace)
+
+            def decorator(handler):
+                register(self._timed_handler(message, handler))
+                return handler
+            return decorator
+
+        socketio.on = on
+
+    def _timed_handler(self, event: str, handler):
+        # Flask-SocketIO는 connect 핸들러를 인자 개수에 맞춰 재호출(TypeError fallback)하므로
+        # 인자 개수가 맞지 않는 호출은 계측 전에 같은 TypeError로 돌려준다
+        params = inspect.signature(handler).parameters.values()
+        varargs = any(p.kind == p.VAR_POSITIONAL for p in params)
+        max_args = sum(1 for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD))
+
+        @wraps(handler)
+        def wrapper(*args):
+            if not varargs and len(args) > max_args:
+                raise TypeError(f"{handler.__name__}() takes {max_args} positional arguments")
+            self.socketio_events.inc(event=event)
+            if args:
+                self.socketio_bytes.inc(payload_size(args[0]), event=event)
+            start = time.perf_counter()
+            try:
+                return handler(*args)
+            except Exception:
+                self.socketio_errors.inc(event=event)
+                raise
+            finally:
+                self.socketio_latency.observe(time.perf_counter() - start, event=event)
+        return wrapper
+    #endregion
+
+    #region HTTP 계측
+    def instrument_flask(self, app, endpoint: str = '/metrics'):
+        """모든 라우트(blueprint 포함) 계측 + 지표 엔드포인트 등록"""
+
+        @app.before_request
+        def _metrics_start():
+            request._metrics_start = time.perf_counter()
+
+        # 처리되지 않은 예외도 Flask가 500 응답으로 만든 뒤 after_request를 거친다
+        @app.after_request
+        def _metrics_end(response):
+            start = getattr(request, '_metrics_start', None)
+            if start is not None:
+                labels = {'endpoint': request.endpoint or 'unknown', 'method': request.method}
+                self.http_requests.inc(**labels)
+                if response.status_code >= 500:
+                    self.http_errors.inc(**labels)
+                self.http_latency.observe(time.perf_counter() - start, **labels)
+            return response
+
+        @app.route(endpoint)
+        def metrics_endpoint():
+            return Response(self.render(), mimetype='text/plain; version=0.0.4')
+    #endregion
+
+
+def payload_size(data) -> int:
+    """이벤트 페이로드의 대략적인 바이트 수 (1단계 dict/list만 확인)"""
+    if isinstance(data, (bytes, bytearray, str)):
+        return len(data)
+    if isinstance(data, dict):
+        data = data.values()
+    elif not isinstance(data, (list, tuple)):
+        return 0
+    return sum(len(v) for v in data if isinstance(v, (bytes, bytearray, str)))
@@ -0,0 +1,221 @@
+"""
+SQLite 스키마 마이그레이션 (PRAGMA user_version 기반)
+
+각 DB의 마이그레이션은 (버전, 설명, SQL 목록)의 리스트이며, 현재 user_version보다
+높은 버전만 순서대로 하나의 트랜잭션에서 실행한 뒤 user_version을 올린다.
+기존 DB(user_version 0)도 v1이 CREATE ... IF NOT EXISTS라 그대로 올라간다.
+
+새 마이그레이션은 목록 끝에 다음 버전 번호로 추가한다 (이미 배포된 항목은 수정하지 않음).
+인덱스 사용 여부 확인: python util/check_query_plans.py
+"""
+
+from __future__ import annotations
+
+from db import auth_db, tutorial_db, code_db
+
+AUTH_MIGRATIONS = [
+    (1, "users / user_robot_assignments 테이블", [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            email TEXT,
+            role TEXT DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_robot_assignments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER DEFAULT 0 NOT NULL,
+            robot_name TEXT NOT NULL,
+            robot_id TEXT NOT NULL,
+            assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_active BOOLEAN DEFAULT TRUE,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+    ]),
+    (2, "user_robot_assignments 조회 인덱스", [
+        # 사용자별 로봇 목록 / 사용자의 최근 활성 할당 / 사용자 할당 비활성화
+        '''
+        CREATE INDEX IF NOT EXISTS idx_ura_user_active
+        ON user_robot_assignments (user_id, is_active, assigned_at)
+        ''',
+        # 로봇별 할당 비활성화/삭제/재할당, 미할당 로봇(user_id = 0) 조회
+        '''
+        CREATE INDEX IF NOT EXISTS idx_ura_robot_user
+        ON user_robot_assignments (robot_id, user_id, is_active)
+        ''',
+        # 활성 할당 전체 (최근 할당 순)
+        '''
+        CREATE INDEX IF NOT EXISTS idx_ura_active_assigned
+        ON user_robot_assignments (is_active, assigned_at)
+        ''',
+        # 로봇 이름으로 최근 등록 로봇 찾기
+        '''
+        CREATE INDEX IF NOT EXISTS idx_ura_name_assigned
+        ON user_robot_assignments (robot_name, assigned_at)
+        ''',
+    ]),
+    (3, "미할당 로봇 행 UNIQUE (로봇 등록 UPSERT)", [
+        # 동시 등록으로 생긴 중복 미할당 행은 가장 최근 것만 남김
+        '''
+        DELETE FROM user_robot_assignments
+        WHERE user_id = 0 AND id NOT IN (
+            SELECT MAX(id) FROM user_robot_assignments WHERE user_id = 0 GROUP BY robot_id
+        )
+        ''',
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_ura_unassigned_robot
+        ON user_robot_assignments (robot_id) WHERE user_id = 0
+        ''',
+    ]),
+]
+
+TUTORIAL_MIGRATIONS = [
+    (1, "tutorial_progress 테이블", [
+        '''
+        CREATE TABLE IF NOT EXISTS tutorial_progress (
+            tutorial_id TEXT PRIMARY KEY,
+            completed BOOLEAN NOT NULL,
+            completed_at TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    # 기존 tutorial_progress는 사용자 구분이 없어 옮기지 않음 (사용하지 않는 테이블로 남김)
+    (2, "사용자별 tutorial_progress", [
+        '''
+        CREATE TABLE IF NOT EXISTS user_tutorial_progress (
+            user_id TEXT NOT NULL,
+            tutorial_id TEXT NOT NULL,
+            completed_at TEXT,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, tutorial_id)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+]
+
+CODE_MIGRATIONS = [
+    (1, "custom_code_files 인덱스 테이블", [
+        '''
+        CREATE TABLE IF NOT EXISTS custom_code_files (
+            name TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            sha256 TEXT NOT NULL
+        )
+        ''',
+        # 최근 수정 순 목록
+        '''
+        CREATE INDEX IF NOT EXISTS idx_ccf_mtime
+        ON custom_code_files (mtime_ns DESC, name)
+        ''',
+    ]),
+    # 코드 내용은 SHA-256으로 한 번만 저장, custom_code_files는 이름 -> 현재 해시
+    (2, "내용 주소 저장소 / 버전 기록", [
+        '''
+        CREATE TABLE IF NOT EXISTS custom_code_blobs (
+            sha256 TEXT PRIMARY KEY,
+            content BLOB NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS custom_code_versions (
+            name TEXT NOT NULL,
+            saved_at_ns INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            PRIMARY KEY (name, saved_at_ns)
+        ) WITHOUT ROWID
+        ''',
+        # 참조가 없어진 내용 정리
+        '''
+        CREATE INDEX IF NOT EXISTS idx_ccv_sha256
+        ON custom_code_versions (sha256)
+        ''',
+    ]),
+    # 사용자별 네임스페이스 (기존 파일은 공용 owner_id 0), 할당량은 사용량 카운터로 확인
+    (3, "사용자별 코드 네임스페이스 / 사용량", [
+        '''
+        CREATE TABLE custom_code_files_v3 (
+            owner_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            PRIMARY KEY (owner_id, name)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT INTO custom_code_files_v3 (owner_id, name, size, mtime_ns, sha256)
+        SELECT 0, name, size, mtime_ns, sha256 FROM custom_code_files
+        ''',
+        'DROP TABLE custom_code_files',
+        'ALTER TABLE custom_code_files_v3 RENAME TO custom_code_files',
+        # 사용자별 최근 수정 순 목록
+        '''
+        CREATE INDEX idx_ccf_owner_mtime
+        ON custom_code_files (owner_id, mtime_ns DESC, name)
+        ''',
+        '''
+        CREATE TABLE custom_code_versions_v3 (
+            owner_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            saved_at_ns INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            PRIMARY KEY (owner_id, name, saved_at_ns)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT INTO custom_code_versions_v3 (owner_id, name, saved_at_ns, sha256, size)
+        SELECT 0, name, saved_at_ns, sha256, size FROM custom_code_versions
+        ''',
+        'DROP TABLE custom_code_versions',
+        'ALTER TABLE custom_code_versions_v3 RENAME TO custom_code_versions',
+        '''
+        CREATE INDEX idx_ccv_sha256
+        ON custom_code_versions (sha256)
+        ''',
+        '''
+        CREATE TABLE custom_code_usage (
+            owner_id INTEGER PRIMARY KEY,
+            files INTEGER NOT NULL,
+            bytes INTEGER NOT NULL
+        )
+        ''',
+        '''
+        INSERT INTO custom_code_usage (owner_id, files, bytes)
+        SELECT owner_id, COUNT(*), SUM(size) FROM custom_code_files GROUP BY owner_id
+        ''',
+    ]),
+]
+
+
+def migrate(db, migrations: list) -> int:
+    """대기 중인 마이그레이션 실행, 최종 스키마 버전 반환"""
+    with db.connection() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+
+    for target, description, statements in migrations:
+        if target <= version:
+            continue
+        with db.connection() as conn:
+            conn.execute('BEGIN')   # DDL도 한 트랜잭션으로 (실패 시 버전 유지)
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(f'PRAGMA user_version = {int(target)}')
+        print(f"DB 마이그레이션 {db.path.name} v{target}: {description}")
+        version = target
+    return version
+
+
+def migrate_all():
+    migrate(auth_db, AUTH_MIGRATIONS)
+    migrate(tutorial_db, TUTORIAL_MIGRATIONS)
+    migrate(code_db, CODE_MIGRATIONS)
@@ -0,0 +1,478 @@
+"""
+세션/로봇 레지스트리
+
+app.py와 모든 blueprint가 같은 인스턴스를 공유한다 (app.config['registered_robots'], app.config['integrated_mapping']).
+읽기는 dict처럼(Mapping) 사용하고, 변경은 반드시 메서드로 수행한다.
+(Redis 레지스트리는 조회 결과가 복사본이므로 필드를 직접 바꾸면 반영되지 않음)
+
+create_registries(redis_url)
+  - redis_url 없음 : 프로세스 메모리 레지스트리 (단일 프로세스)
+  - redis_url 있음 : Redis 레지스트리 (여러 워커 프로세스가 공유)
+"""
+
+from __future__ import annotations
+import json
+import threading
+from collections.abc import Mapping
+
+
+class RobotRegistry(Mapping):
+    """연결된 로봇 정보 저장소 (robot_id -> 로봇 정보 dict)
+
+    로봇 SocketIO 세션 ID -> robot_id 역인덱스를 함께 유지한다.
+    """
+
+    def __init__(self):
+        self._robots: dict[str, dict] = {}
+        self._by_session: dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def __getitem__(self, robot_id):
+        return self._robots[robot_id]
+
+    def __iter__(self):
+        return iter(list(self._robots))
+
+    def __len__(self):
+        return len(self._robots)
+
+    def items(self):
+        # 다른 스레드의 등록/해제와 겹쳐도 안전하도록 스냅샷 반환
+        return list(self._robots.items())
+
+    def register(self, robot_id: str, info: dict):
+        """로봇 정보 등록 (기존 정보는 교체)"""
+        with self._lock:
+            self._unindex(robot_id)
+            self._robots[robot_id] = info
+            session_id = info.get('session_id')
+            if session_id:
+                self._by_session[session_id] = robot_id
+
+    def remove(self, robot_id: str) -> dict | None:
+        """로봇 정보 제거 후 반환 (없으면 None)"""
+        with self._lock:
+            self._unindex(robot_id)
+            return self._robots.pop(robot_id, None)
+
+    def update(self, robot_id: str, **fields):
+        """로봇 정보 필드 변경 (session_id는 set_session 사용)"""
+        with self._lock:
+            info = self._robots.get(robot_id)
+            if info is not None:
+                info.update(fields)
+
+    def set_session(self, robot_id: str, session_id: str | None):
+        """로봇의 SocketIO 세션 ID 변경 (None이면 세션 해제)"""
+        with self._lock:
+            info = self._robots.get(robot_id)
+            if info is None:
+                return
+            self._unindex(robot_id)
+            info['session_id'] = session_id
+            if session_id:
+                self._by_session[session_id] = robot_id
+
+    def robot_for_session(self, session_id: str) -> str | None:
+        """로봇 SocketIO 세션 ID로 robot_id 조회"""
+        return self._by_session.get(session_id)
+
+    def _unindex(self, robot_id: str):
+        info = self._robots.get(robot_id)
+        if info:
+            session_id = info.get('session_id')
+            if session_id and self._by_session.get(session_id) == robot_id:
+                del self._by_session[session_id]
+
+
+class SessionRegistry(Mapping):
+    """웹 세션 정보 저장소 (sid -> 세션 정보 dict)
+
+    user_id -> sids, robot_id(assigned_robot) -> sids 보조 인덱스를 함께 유지한다.
+    """
+
+    def __init__(self, robots: RobotRegistry):
+        self.robots = robots
+        self._sessions: dict[str, dict] = {}
+        self._by_user: dict[object, set[str]] = {}
+        self._by_robot: dict[str, set[str]] = {}
+        self._lock = threading.RLock()
+
+    def __getitem__(self, sid):
+        return self._sessions[sid]
+
+    def __iter__(self):
+        return iter(list(self._sessions))
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def items(self):
+        # 다른 스레드의 접속/해제와 겹쳐도 안전하도록 스냅샷 반환
+        return list(self._sessions.items())
+
+    def add(self, sid: str, data: dict):
+        """세션 등록 (기존 세션은 교체)"""
+        with self._lock:
+            self._unindex(sid)
+            self._sessions[sid] = data
+            self._by_user.setdefault(data.get('user_id'), set()).add(sid)
+            robot_id = data.get('assigned_robot')
+            if robot_id:
+                self._by_robot.setdefault(robot_id, set()).add(sid)
+
+    def remove(self, sid: str) -> dict | None:
+        """세션 제거 후 반환 (없으면 None)"""
+        with self._lock:
+            self._unindex(sid)
+            return self._sessions.pop(sid, None)
+
+    def assign_robot(self, sid: str, robot_id: str | None):
+        """세션에 로봇 할당 (None이면 할당 해제)"""
+        with self._lock:
+            data = self._sessions.get(sid)
+            if data is None:
+                return
+            self._discard(self._by_robot, data.get('assigned_robot'), sid)
+            data['assigned_robot'] = robot_id
+            if robot_id:
+                self._by_robot.setdefault(robot_id, set()).add(sid)
+
+    def unassign_robot(self, robot_id: str) -> list[str]:
+        """해당 로봇이 할당된 모든 세션에서 할당 해제, 해제된 sid 목록 반환"""
+        with self._lock:
+            sids = list(self._by_robot.pop(robot_id, ()))
+            for sid in sids:
+                self._sessions[sid]['assigned_robot'] = None
+            return sids
+
+    def sids_for_user(self, user_id) -> list[str]:
+        """사용자의 활성 세션 목록"""
+        return list(self._by_user.get(user_id, ()))
+
+    def sids_for_robot(self, robot_id: str) -> list[str]:
+        """로봇이 할당된 세션 목록"""
+        return list(self._by_robot.get(robot_id, ()))
+
+    def resolve_robot(self, sid: str) -> tuple[str | None, str | None]:
+        """sid -> (할당된 robot_id, 로봇 SocketIO 세션 ID)
+
+        할당된 로봇이 없거나 등록되지 않은 로봇이면 (None, None),
+        로봇은 등록되어 있지만 연결 세션이 없으면 (robot_id, None)
+        """
+        data = self._sessions.get(sid)
+        robot_id = data.get('assigned_robot') if data else None
+        if not robot_id:
+            return None, None
+        robot_info = self.robots.get(robot_id)
+        if robot_info is None:
+            return None, None
+        return robot_id, robot_info.get('session_id')
+
+    def _unindex(self, sid: str):
+        data = self._sessions.get(sid)
+        if data:
+            self._discard(self._by_user, data.get('user_id'), sid)
+            self._discard(self._by_robot, data.get('assigned_robot'), sid)
+
+    @staticmethod
+    def _discard(index: dict, key, sid: str):
+        sids = index.get(key)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del index[key]
+
+
+class RedisRobotRegistry(Mapping):
+    """Redis에 저장되는 RobotRegistry (여러 워커 프로세스 공유)
+
+    pf:robot_ids            set   등록된 robot_id
+    pf:robot:<id>           hash  필드 -> 값 JSON (필드 단위로 바꾸므로 다른 워커의 변경을 덮어쓰지 않음)
+    pf:robot_by_session     hash  로봇 SocketIO 세션 ID -> robot_id
+
+    읽은 값에 따라 쓰는 변경(등록 교체/세션 변경/제거)은 로봇 hash를 WATCH한 트랜잭션으로 실행한다
+    (그 사이 다른 워커가 바꾸면 redis-py가 다시 실행).
+    """
+
+    def __init__(self, redis, prefix: str = 'pf'):
+        self.redis = redis
+        self._ids_key = f"{prefix}:robot_ids"
+        self._by_session_key = f"{prefix}:robot_by_session"
+        self._prefix = prefix
+
+    def _robot_key(self, robot_id):
+        return f"{self._prefix}:robot:{robot_id}"
+
+    def __getitem__(self, robot_id):
+        info = _decode_hash(self.redis.hgetall(self._robot_key(robot_id))) if robot_id else None
+        if not info:
+            raise KeyError(robot_id)
+        return info
+
+    def __contains__(self, robot_id):
+        return bool(robot_id) and bool(self.redis.exists(self._robot_key(robot_id)))
+
+    def __iter__(self):
+        return iter([k.decode() for k in self.redis.smembers(self._ids_key)])
+
+    def __len__(self):
+        return self.redis.scard(self._ids_key)
+
+    def items(self):
+        robot_ids = list(self)
+        pipe = self.redis.pipeline(transaction=False)
+        for robot_id in robot_ids:
+            pipe.hgetall(self._robot_key(robot_id))
+        # 목록을 읽은 뒤 제거된 로봇은 제외
+        return [(robot_id, _decode_hash(raw)) for robot_id, raw in zip(robot_ids, pipe.execute()) if raw]
+
+    def register(self, robot_id: str, info: dict):
+        """로봇 정보 등록 (기존 정보는 교체)"""
+        key = self._robot_key(robot_id)
+
+        def txn(pipe):
+            old_session = _decode_value(pipe.hget(key, 'session_id'))
+            pipe.multi()
+            if old_session:
+                pipe.hdel(self._by_session_key, old_session)
+            pipe.delete(key)
+            if info:
+                pipe.hset(key, mapping=_encode_fields(info))
+            pipe.sadd(self._ids_key, robot_id)
+            if info.get('session_id'):
+                pipe.hset(self._by_session_key, info['session_id'], robot_id)
+
+        self.redis.transaction(txn, key)
+
+    def remove(self, robot_id: str) -> dict | None:
+        """로봇 정보 제거 후 반환 (없으면 None)"""
+        key = self._robot_key(robot_id)
+
+        def txn(pipe):
+            old = _decode_hash(pipe.hgetall(key))
+            pipe.multi()
+            if old.get('session_id'):
+                pipe.hdel(self._by_session_key, old['session_id'])
+            pipe.delete(key)
+            pipe.srem(self._ids_key, robot_id)
+            return old or None
+
+        return self.redis.transaction(txn, key, value_from_callable=True)
+
+    def update(self, robot_id: str, **fields):
+        """로봇 정보 필드 변경 (session_id는 set_session 사용), 바꾸지 않는 필드는 건드리지 않음"""
+        if not fields:
+            return
+        key = self._robot_key(robot_id)
+
+        def txn(pipe):
+            # 그 사이 제거된 로봇을 일부 필드만으로 다시 만들지 않음
+            if not pipe.exists(key):
+                return
+            pipe.multi()
+            pipe.hset(key, mapping=_encode_fields(fields))
+
+        self.redis.transaction(txn, key)
+
+    def set_session(self, robot_id: str, session_id: str | None):
+        """로봇의 SocketIO 세션 ID 변경 (None이면 세션 해제)"""
+        key = self._robot_key(robot_id)
+
+        def txn(pipe):
+            if not pipe.exists(key):
+                return
+            old_session = _decode_value(pipe.hget(key, 'session_id'))
+            pipe.multi()
+            if old_session:
+                pipe.hdel(self._by_session_key, old_session)
+            pipe.hset(key, 'session_id', json.dumps(session_id))
+            if session_id:
+                pipe.hset(self._by_session_key, session_id, robot_id)
+
+        self.redis.transaction(txn, key)
+
+    def robot_for_session(self, session_id: str) -> str | None:
+        """로봇 SocketIO 세션 ID로 robot_id 조회"""
+        robot_id = self.redis.hget(self._by_session_key, session_id)
+        return robot_id.decode() if robot_id else None
+
+
+class RedisSessionRegistry(Mapping):
+    """Redis에 저장되는 SessionRegistry (여러 워커 프로세스 공유)
+
+    pf:sids                  set   등록된 sid
+    pf:session:<sid>         hash  필드 -> 값 JSON
+    pf:sids_by_user:<id>     set   user_id -> sids
+    pf:sids_by_robot:<id>    set   robot_id -> sids
+
+    변경은 RedisRobotRegistry와 같이 세션 hash를 WATCH한 트랜잭션으로 실행한다.
+    """
+
+    def __init__(self, redis, robots: RedisRobotRegistry, prefix: str = 'pf'):
+        self.redis = redis
+        self.robots = robots
+        self._sids_key = f"{prefix}:sids"
+        self._prefix = prefix
+
+    def _session_key(self, sid):
+        return f"{self._prefix}:session:{sid}"
+
+    def _user_key(self, user_id):
+        return f"{self._prefix}:sids_by_user:{user_id}"
+
+    def _robot_key(self, robot_id):
+        return f"{self._prefix}:sids_by_robot:{robot_id}"
+
+    def __getitem__(self, sid):
+        data = _decode_hash(self.redis.hgetall(self._session_key(sid))) if sid else None
+        if not data:
+            raise KeyError(sid)
+        return data
+
+    def __contains__(self, sid):
+        return bool(sid) and bool(self.redis.exists(self._session_key(sid)))
+
+    def __iter__(self):
+        return iter([k.decode() for k in self.redis.smembers(self._sids_key)])
+
+    def __len__(self):
+        return self.redis.scard(self._sids_key)
+
+    def items(self):
+        sids = list(self)
+        pipe = self.redis.pipeline(transaction=False)
+        for sid in sids:
+            pipe.hgetall(self._session_key(sid))
+        return [(sid, _decode_hash(raw)) for sid, raw in zip(sids, pipe.execute()) if raw]
+
+    def add(self, sid: str, data: dict):
+        """세션 등록 (기존 세션은 교체)"""
+        key = self._session_key(sid)
+
+        def txn(pipe):
+            old = _decode_hash(pipe.hgetall(key))
+            pipe.multi()
+            if old:
+                self._unindex(pipe, sid, old)
+            pipe.delete(key)
+            if data:
+                pipe.hset(key, mapping=_encode_fields(data))
+            pipe.sadd(self._sids_key, sid)
+            pipe.sadd(self._user_key(data.get('user_id')), sid)
+            if data.get('assigned_robot'):
+                pipe.sadd(self._robot_key(data['assigned_robot']), sid)
+
+        self.redis.transaction(txn, key)
+
+    def remove(self, sid: str) -> dict | None:
+        """세션 제거 후 반환 (없으면 None)"""
+        key = self._session_key(sid)
+
+        def txn(pipe):
+            old = _decode_hash(pipe.hgetall(key))
+            if not old:
+                return None
+            pipe.multi()
+            self._unindex(pipe, sid, old)
+            pipe.delete(key)
+            pipe.srem(self._sids_key, sid)
+            return old
+
+        return self.redis.transaction(txn, key, value_from_callable=True)
+
+    def assign_robot(self, sid: str, robot_id: str | None):
+        """세션에 로봇 할당 (None이면 할당 해제)"""
+        key = self._session_key(sid)
+
+        def txn(pipe):
+            if not pipe.exists(key):
+                return
+            old_robot = _decode_value(pipe.hget(key, 'assigned_robot'))
+            pipe.multi()
+            if old_robot:
+                pipe.srem(self._robot_key(old_robot), sid)
+            pipe.hset(key, 'assigned_robot', json.dumps(robot_id))
+            if robot_id:
+                pipe.sadd(self._robot_key(robot_id), sid)
+
+        self.redis.transaction(txn, key)
+
+    def unassign_robot(self, robot_id: str) -> list[str]:
+        """해당 로봇이 할당된 모든 세션에서 할당 해제, 해제된 sid 목록 반환"""
+        unassigned = []
+        for sid in self.sids_for_robot(robot_id):
+            key = self._session_key(sid)
+
+            def txn(pipe, sid=sid, key=key):
+                # 그 사이 다른 로봇으로 바뀐 세션은 그대로 둠
+                assigned = _decode_value(pipe.hget(key, 'assigned_robot'))
+                pipe.multi()
+                pipe.srem(self._robot_key(robot_id), sid)
+                if assigned != robot_id:
+                    return False
+                pipe.hset(key, 'assigned_robot', json.dumps(None))
+                return True
+
+            if self.redis.transaction(txn, key, value_from_callable=True):
+                unassigned.append(sid)
+        return unassigned
+
+    def sids_for_user(self, user_id) -> list[str]:
+        """사용자의 활성 세션 목록"""
+        return [sid.decode() for sid in self.redis.smembers(self._user_key(user_id))]
+
+    def sids_for_robot(self, robot_id: str) -> list[str]:
+        """로봇이 할당된 세션 목록"""
+        return [sid.decode() for sid in self.redis.smembers(self._robot_key(robot_id))]
+
+    def resolve_robot(self, sid: str) -> tuple[str | None, str | None]:
+        """sid -> (할당된 robot_id, 로봇 SocketIO 세션 ID) (SessionRegistry.resolve_robot와 동일)"""
+        robot_id = _decode_value(self.redis.hget(self._session_key(sid), 'assigned_robot')) if sid else None
+        if not robot_id:
+            return None, None
+        robot_info = self.robots.get(robot_id)
+        if robot_info is None:
+            return None, None
+        return robot_id, robot_info.get('session_id')
+
+    def _unindex(self, pipe, sid: str, data: dict):
+        pipe.srem(self._user_key(data.get('user_id')), sid)
+        if data.get('assigned_robot'):
+            pipe.srem(self._robot_key(data['assigned_robot']), sid)
+
+
+def _encode_fields(fields: dict) -> dict:
+    return {name: json.dumps(value) for name, value in fields.items()}
+
+
+def _decode_value(raw):
+    return json.loads(raw) if raw is not None else None
+
+
+def _decode_hash(raw: dict) -> dict:
+    return {name.decode(): json.loads(value) for name, value in raw.items()}
+
+
+def clear_redis_registries(redis_url: str, prefix: str = 'pf'):
+    """이전 실행에서 남은 Redis 레지스트리 키 삭제 (워커 시작 전 1회 호출)"""
+    import redis
+    client = redis.Redis.from_url(redis_url)
+    keys = list(client.scan_iter(match=f"{prefix}:*"))
+    if keys:
+        client.delete(*keys)
+
+
+def create_registries(redis_url: str | None = None):
+    """(RobotRegistry, SessionRegistry) 생성 - redis_url이 있으면 Redis 레지스트리"""
+    if not redis_url:
+        robots = RobotRegistry()
+        return robots, SessionRegistry(robots)
+
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError("Redis 레지스트리를 사용하려면 redis 패키지가 필요합니다: pip install redis")
+    client = redis.Redis.from_url(redis_url)
+    robots = RedisRobotRegistry(client)
+    return robots, RedisSessionRegistry(client, robots)
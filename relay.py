@@ -0,0 +1,432 @@
+"""
+로봇 ↔ 브라우저 스트림/제어 중계 유틸리티
+"""
+
+from __future__ import annotations
+import threading
+import time
+
+
+def robot_room(robot_id: str) -> str:
+    """로봇 스트림 관전(spectator)용 SocketIO room 이름"""
+    return f"robot:{robot_id}"
+
+
+# 스트림 품질 단계 (0이 최고 품질). 로봇은 stream_hint를 받아 fps/JPEG 품질/해상도 배율을 맞춘다.
+STREAM_LEVELS = [
+    {'max_fps': 30, 'quality': 70, 'scale': 1.0},
+    {'max_fps': 15, 'quality': 60, 'scale': 1.0},
+    {'max_fps': 10, 'quality': 50, 'scale': 0.75},
+    {'max_fps': 5, 'quality': 40, 'scale': 0.5},
+]
+
+
+class _ImageSlot:
+    """(session_id, widget_id) 하나에 대한 중계 슬롯"""
+    __slots__ = ('pending', 'in_flight', 'sent_at', 'sent', 'dropped', 'source',
+                 'level', 'rtt', 'window_start', 'window_pushed', 'window_dropped', 'good_since')
+
+    def __init__(self):
+        self.pending = None     # 전송 대기 중인 최신 프레임 (없으면 None)
+        self.in_flight = False  # 브라우저 ack 대기 중인 프레임 존재 여부
+        self.sent_at = 0.0      # 마지막 전송 시각 (monotonic)
+        self.sent = 0           # 이 슬롯에서 전송한 프레임 수 (누적)
+        self.dropped = 0        # 이 슬롯에서 새 프레임으로 대체되어 버린 프레임 수 (누적)
+        # 적응형 스트림 상태
+        self.source = None      # 프레임을 보내는 로봇의 SocketIO 세션 ID (stream_hint 대상)
+        self.level = 0          # 현재 STREAM_LEVELS 단계
+        self.rtt = 0.0          # 전송 → ack 지연 EWMA (초)
+        self.window_start = 0.0
+        self.window_pushed = 0  # 현재 측정 구간에 도착한 프레임 수
+        self.window_dropped = 0 # 현재 측정 구간에 버려진 프레임 수
+        self.good_since = None  # 연결 상태가 양호해진 시각 (단계 복구 판단용)
+
+
+class ImageRelay:
+    """최신 프레임 우선(latest-frame-wins) 이미지 중계기
+
+    위젯마다 브라우저로 나가는 프레임은 최대 1개만 ack 대기 상태로 두고,
+    그 사이에 도착한 프레임은 슬롯에 최신 것 하나만 보관한다.
+    덮어써진 프레임은 전송되지 않고 슬롯별(slot.dropped, stream_hint에 포함)과
+    전체(totals['dropped'], /metrics)로 집계된다. /metrics는 세션이 바뀔 때마다 시계열이
+    늘어나지 않도록 전체 합계만 내보낸다.
+    느린 브라우저라도 서버에 쌓이는 프레임은 위젯당 1장으로 제한된다.
+
+    관전 room으로는 ack를 받을 수 없으므로 (room, widget_id)별 최대 fps로 제한해 한 번만 전송한다.
+
+    adaptive=True이면 슬롯마다 ack 지연(EWMA)과 드롭 비율을 측정 구간(window)마다 평가해
+    브라우저가 따라오지 못하면 품질 단계를 낮추고, recover_hold 동안 양호하면 한 단계씩 복구한다.
+    단계가 바뀔 때 프레임을 보낸 로봇 세션으로 'stream_hint'를 보낸다.
+    """
+
+    # 적응형 스트림 임계값
+    window = 2.0            # 평가 구간 (초)
+    degrade_rtt = 0.3       # ack 지연 EWMA가 이 값을 넘거나
+    degrade_drop = 0.3      # 드롭 비율이 이 값을 넘으면 품질 하향
+    recover_rtt = 0.1       # ack 지연 EWMA가 이 값 이하이고
+    recover_drop = 0.05     # 드롭 비율이 이 값 이하인 상태가
+    recover_hold = 5.0      # 이 시간(초) 지속되면 한 단계 복구
+
+    def __init__(self, socketio, ack_timeout: float = 1.0, room_max_fps: float = 15,
+                 adaptive: bool = True):
+        self.socketio = socketio
+        self.ack_timeout = ack_timeout  # ack가 오지 않으면 이전 프레임을 유실로 간주하는 시간(초)
+        self.room_interval = 1.0 / room_max_fps if room_max_fps else 0.0
+        self.adaptive = adaptive
+        self._slots: dict[str, dict[str, _ImageSlot]] = {}
+        self._room_sent_at: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        # 누적 카운트 (세션이 끝나도 유지): 전송/드롭 프레임 수, 품질 하향/복구 횟수
+        self.totals = {'sent': 0, 'dropped': 0, 'degraded': 0, 'recovered': 0}
+
+    def push(self, session_id: str, widget_id: str, image_data, source_sid: str | None = None) -> bool:
+        """프레임 중계 요청. 즉시 전송했으면 True, 슬롯에 보관(대기)했으면 False
+
+        source_sid: 프레임을 보낸 로봇의 SocketIO 세션 ID (stream_hint를 보낼 대상)
+        """
+        now = time.monotonic()
+        hint = None
+        with self._lock:
+            widgets = self._slots.setdefault(session_id, {})
+            slot = widgets.get(widget_id)
+            if slot is None:
+                slot = widgets[widget_id] = _ImageSlot()
+                slot.window_start = now
+            if source_sid:
+                slot.source = source_sid
+            slot.window_pushed += 1
+
+            if slot.in_flight and now - slot.sent_at < self.ack_timeout:
+                if slot.pending is not None:
+                    self._count_drop(slot)
+                slot.pending = image_data
+                send = False
+            else:
+                if slot.in_flight:
+                    # ack 타임아웃 - 지연 측정값으로 반영
+                    self._observe_rtt(slot, self.ack_timeout)
+                # 대기 중인 프레임보다 방금 도착한 프레임이 최신
+                if slot.pending is not None:
+                    self._count_drop(slot)
+                    slot.pending = None
+                slot.in_flight = True
+                slot.sent_at = now
+                slot.sent += 1
+                self.totals['sent'] += 1
+                send = True
+
+            if self.adaptive:
+                hint = self._adapt(slot, now)
+
+        if send:
+            self._send(session_id, widget_id, image_data)
+        if hint:
+            self._send_hint(slot.source, session_id, widget_id, hint)
+        return send
+
+    def broadcast(self, room: str, widget_id: str, image_data, skip_sid: str | None = None) -> bool:
+        """관전 room으로 프레임 전송 (직렬화 1회). fps 제한에 걸리면 False"""
+        now = time.monotonic()
+        key = (room, widget_id)
+        with self._lock:
+            if now - self._room_sent_at.get(key, 0.0) < self.room_interval:
+                return False
+            self._room_sent_at[key] = now
+
+        self.socketio.emit('image_data', {
+            'i': image_data,
+            'w': widget_id
+        }, room=room, skip_sid=skip_sid)
+        return True
+
+    def _send(self, session_id: str, widget_id: str, image_data):
+        self.socketio.emit('image_data', {
+            'i': image_data,
+            'w': widget_id
+        }, room=session_id, callback=lambda *args: self._on_ack(session_id, widget_id))
+
+    def _on_ack(self, session_id: str, widget_id: str):
+        """브라우저가 프레임 처리를 마쳤을 때 호출 - 대기 프레임이 있으면 이어서 전송"""
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(session_id, {}).get(widget_id)
+            if slot is None:
+                return
+            if slot.in_flight:
+                self._observe_rtt(slot, now - slot.sent_at)
+            image_data = slot.pending
+            if image_data is None:
+                slot.in_flight = False
+                return
+            slot.pending = None
+            slot.sent_at = now
+            slot.sent += 1
+            self.totals['sent'] += 1
+
+        self._send(session_id, widget_id, image_data)
+
+    def _count_drop(self, slot: _ImageSlot):
+        """대기 프레임이 새 프레임으로 대체됨 (lock 안에서 호출)"""
+        slot.dropped += 1
+        slot.window_dropped += 1
+        self.totals['dropped'] += 1
+
+    @staticmethod
+    def _observe_rtt(slot: _ImageSlot, rtt: float):
+        slot.rtt = rtt if slot.rtt == 0.0 else slot.rtt * 0.8 + rtt * 0.2
+
+    def _adapt(self, slot: _ImageSlot, now: float) -> dict | None:
+        """측정 구간이 끝났으면 품질 단계 재평가, 단계가 바뀌면 hint 반환 (lock 안에서 호출)"""
+        if now - slot.window_start < self.window or not slot.window_pushed:
+            return None
+        drop_ratio = slot.window_dropped / slot.window_pushed
+        slot.window_start = now
+        slot.window_pushed = slot.window_dropped = 0
+
+        level = slot.level
+        if slot.rtt > self.degrade_rtt or drop_ratio > self.degrade_drop:
+            slot.good_since = None
+            level = min(level + 1, len(STREAM_LEVELS) - 1)
+        elif slot.rtt <= self.recover_rtt and drop_ratio <= self.recover_drop:
+            if slot.good_since is None:
+                slot.good_since = now
+            elif level > 0 and now - slot.good_since >= self.recover_hold:
+                slot.good_since = now
+                level -= 1
+        else:
+            slot.good_since = None
+
+        if level == slot.level:
+            return None
+        self.totals['degraded' if level > slot.level else 'recovered'] += 1
+        slot.level = level
+        # 로봇이 어느 위젯이 얼마나 버려졌는지 알 수 있도록 슬롯 누적 카운트 포함
+        return {'level': level, **STREAM_LEVELS[level], 'sent': slot.sent, 'dropped': slot.dropped}
+
+    def _send_hint(self, robot_sid: str | None, session_id: str, widget_id: str, hint: dict):
+        """로봇에 스트림 품질 조정 요청"""
+        if not robot_sid:
+            return
+        self.socketio.emit('stream_hint', {
+            'session_id': session_id,
+            'widget_id': widget_id,
+            **hint
+        }, room=robot_sid)
+
+    def discard_session(self, session_id: str):
+        """브라우저 세션 종료 시 해당 세션의 슬롯 제거"""
+        with self._lock:
+            self._slots.pop(session_id, None)
+
+    def degraded_streams(self) -> int:
+        """현재 품질을 낮춘(level > 0) 슬롯 수"""
+        with self._lock:
+            return sum(slot.level > 0 for widgets in self._slots.values() for slot in widgets.values())
+
+
+class _OutputBuffer:
+    """세션 하나에 대한 stdout/stderr 배치 버퍼"""
+    __slots__ = ('chunks', 'size', 'first_at', 'in_flight', 'sent_at', 'dropped', 'timer', 'room')
+
+    def __init__(self):
+        self.chunks = []        # [stream, text] 목록 (도착 순서 유지)
+        self.size = 0           # 버퍼에 쌓인 문자열 길이 합
+        self.first_at = 0.0     # 버퍼의 첫 청크 도착 시각 (monotonic)
+        self.in_flight = False  # 브라우저 ack 대기 중인 배치 존재 여부
+        self.sent_at = 0.0      # 마지막 배치 전송 시각 (monotonic)
+        self.dropped = 0        # 버퍼 상한 초과로 버려진 길이 (다음 배치에서 알림)
+        self.timer = False      # 지연 flush 태스크 실행 여부
+        self.room = None        # 배치를 함께 받을 관전 room
+
+
+class OutputCoalescer:
+    """세션별 stdout/stderr 출력 배치 중계기
+
+    로봇이 보내는 출력 청크를 세션 버퍼에 모아 두었다가
+    배치 크기(batch_bytes) 또는 대기 시간(batch_delay)에 도달하면
+    'output_batch' 이벤트 하나로 전송한다. stdout/stderr 순서는 도착 순서 그대로 유지된다.
+    브라우저 ack 전에는 다음 배치를 보내지 않으며, 그동안 버퍼가
+    buffer_limit를 넘으면 초과분은 버리고 길이만 집계한다.
+    room이 지정되면 같은 배치를 관전 room에도 한 번 전송한다.
+    """
+
+    def __init__(self, socketio, batch_bytes: int = 16 * 1024, batch_delay: float = 0.05,
+                 buffer_limit: int = 256 * 1024, ack_timeout: float = 1.0):
+        self.socketio = socketio
+        self.batch_bytes = batch_bytes      # 이 크기 이상 쌓이면 즉시 전송
+        self.batch_delay = batch_delay      # 첫 청크 도착 후 이 시간(초)이 지나면 전송
+        self.buffer_limit = buffer_limit    # 세션당 버퍼 상한
+        self.ack_timeout = ack_timeout
+        self._buffers: dict[str, _OutputBuffer] = {}
+        self._lock = threading.Lock()
+
+    def push(self, session_id: str, stream: str, text: str, room: str | None = None):
+        """출력 청크 추가 (stream: 'stdout' 또는 'stderr')"""
+        start_timer = False
+        with self._lock:
+            buf = self._buffers.get(session_id)
+            if buf is None:
+                buf = self._buffers[session_id] = _OutputBuffer()
+            buf.room = room
+
+            if buf.size + len(text) > self.buffer_limit:
+                buf.dropped += len(text)
+            else:
+                if not buf.chunks:
+                    buf.first_at = time.monotonic()
+                buf.chunks.append([stream, text])
+                buf.size += len(text)
+
+            # 버린 길이만 있어도 생략 알림을 보내야 하므로 지연 flush 예약
+            if not buf.timer:
+                buf.timer = start_timer = True
+            flush_now = buf.size >= self.batch_bytes
+
+        if start_timer:
+            self.socketio.start_background_task(self._flush_later, session_id)
+        if flush_now:
+            self.flush(session_id)
+
+    def flush(self, session_id: str, force: bool = False):
+        """버퍼 전송. force=True이면 ack 대기 중이어도 전송 (실행 종료 직전 등)"""
+        with self._lock:
+            buf = self._buffers.get(session_id)
+            if buf is None or not (buf.chunks or buf.dropped):
+                return
+            now = time.monotonic()
+            if not force and buf.in_flight and now - buf.sent_at < self.ack_timeout:
+                return  # ack 도착 시 다시 시도
+
+            payload = {'o': buf.chunks}
+            if buf.dropped:
+                payload['dropped'] = buf.dropped
+            buf.chunks = []
+            buf.size = 0
+            buf.dropped = 0
+            buf.in_flight = True
+            buf.sent_at = now
+            room = buf.room
+
+        self.socketio.emit('output_batch', payload, room=session_id,
+                           callback=lambda *args: self._on_ack(session_id))
+        if room:
+            self.socketio.emit('output_batch', payload, room=room, skip_sid=session_id)
+
+    def _on_ack(self, session_id: str):
+        with self._lock:
+            buf = self._buffers.get(session_id)
+            if buf is None:
+                return
+            buf.in_flight = False
+            ready = buf.size >= self.batch_bytes or (
+                buf.chunks and time.monotonic() - buf.first_at >= self.batch_delay)
+        if ready:
+            self.flush(session_id)
+
+    def _flush_later(self, session_id: str):
+        """첫 청크 도착 후 batch_delay마다 flush, 버퍼가 비면 종료"""
+        while True:
+            self.socketio.sleep(self.batch_delay)
+            self.flush(session_id)
+            with self._lock:
+                buf = self._buffers.get(session_id)
+                if buf is None:
+                    return
+                if not (buf.chunks or buf.dropped):
+                    buf.timer = False
+                    return
+
+    def discard_session(self, session_id: str):
+        """브라우저 세션 종료 시 해당 세션의 버퍼 제거"""
+        with self._lock:
+            self._buffers.pop(session_id, None)
+
+
+class _ControlSlot:
+    """(로봇, 이벤트, widget_id) 하나에 대한 제어값 슬롯"""
+    __slots__ = ('pending', 'sent_at', 'timer', 'sent', 'conflated')
+
+    def __init__(self):
+        self.pending = None     # 전송 대기 중인 최신 (room, payload)
+        self.sent_at = 0.0      # 마지막 전송 시각 (monotonic)
+        self.timer = False      # 지연 전송 태스크 실행 여부
+        self.sent = 0           # 로봇으로 전송한 수
+        self.conflated = 0      # 더 최신 값으로 대체되어 전송되지 않은 수
+
+
+class ControlThrottle:
+    """웹 → 로봇 제어 이벤트의 최신 값 우선(latest-value-wins) 전송기
+
+    (robot_id, event, widget_id)마다 이벤트별 최대 전송률(max_rates, 초당 횟수)을 넘지 않도록
+    전송하고, 간격 안에 들어온 값은 최신 것 하나만 보관했다가 간격이 지나면 전송한다.
+    마지막 값은 항상 전달된다. max_rates에 없는 이벤트는 제한 없이 즉시 전송한다.
+    """
+
+    def __init__(self, socketio, max_rates: dict[str, float]):
+        self.socketio = socketio
+        self.max_rates = dict(max_rates)
+        self._slots: dict[str, dict[tuple, _ControlSlot]] = {}
+        self._lock = threading.Lock()
+
+    def push(self, robot_id: str, room: str, event: str, widget_id, payload: dict) -> bool:
+        """제어 이벤트 전송 요청. 즉시 전송했으면 True, 보관(대기)했으면 False"""
+        rate = self.max_rates.get(event)
+        if not rate:
+            self.socketio.emit(event, payload, room=room)
+            return True
+
+        interval = 1.0 / rate
+        now = time.monotonic()
+        key = (event, widget_id)
+        with self._lock:
+            slots = self._slots.setdefault(robot_id, {})
+            slot = slots.get(key)
+            if slot is None:
+                slot = slots[key] = _ControlSlot()
+
+            if slot.timer or now - slot.sent_at < interval:
+                if slot.pending is not None:
+                    slot.conflated += 1
+                slot.pending = (room, payload)
+                if not slot.timer:
+                    slot.timer = True
+                    self.socketio.start_background_task(
+                        self._send_later, robot_id, key, slot.sent_at + interval - now)
+                return False
+
+            slot.sent_at = now
+            slot.sent += 1
+
+        self.socketio.emit(event, payload, room=room)
+        return True
+
+    def _send_later(self, robot_id: str, key: tuple, delay: float):
+        """전송 간격이 지난 뒤 보관 중인 최신 값 전송"""
+        self.socketio.sleep(max(delay, 0.0))
+        with self._lock:
+            slot = self._slots.get(robot_id, {}).get(key)
+            if slot is None:
+                return
+            pending = slot.pending
+            slot.pending = None
+            slot.timer = False
+            if pending is None:
+                return
+            slot.sent_at = time.monotonic()
+            slot.sent += 1
+
+        room, payload = pending
+        self.socketio.emit(key[0], payload, room=room)
+
+    def discard_robot(self, robot_id: str):
+        """로봇 등록 해제/삭제 시 해당 로봇의 슬롯 제거"""
+        with self._lock:
+            self._slots.pop(robot_id, None)
+
+    def stats(self, robot_id: str) -> dict:
+        """이벤트/위젯별 전송/대체 카운트 조회"""
+        with self._lock:
+            return {
+                f"{event}:{widget_id}": {'sent': slot.sent, 'conflated': slot.conflated}
+                for (event, widget_id), slot in self._slots.get(robot_id, {}).items()
+            }
@@ -0,0 +1,92 @@
+"""
+운영용 서버 실행 스크립트
+
+    python run_server.py --async-mode eventlet
+    python run_server.py --async-mode gevent --port 8000
+    PF_ASYNC_MODE=eventlet python run_server.py
+    PF_REDIS_URL=redis://127.0.0.1:6379/0 python run_server.py --workers 4
+
+eventlet/gevent 모드는 그린 스레드 기반 서버로 실행되어 웹소켓마다 OS 스레드를 쓰지 않는다.
+threading 모드는 개발용 Werkzeug 서버로 실행된다 (python app.py와 동일).
+
+--workers N (N > 1) 이면 port, port+1, ... port+N-1 에 워커 프로세스를 하나씩 띄운다.
+워커들은 PF_REDIS_URL의 Redis를 SocketIO 메시지 큐와 세션/로봇 레지스트리로 공유하므로
+앞단 로드밸런서(sticky session, 예: nginx ip_hash)로 분산하면 된다.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+from secrets import token_hex
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='PF Python Web Editor 서버 실행')
+    parser.add_argument('--async-mode', choices=('threading', 'eventlet', 'gevent'),
+                        default=os.environ.get('PF_ASYNC_MODE', 'eventlet'),
+                        help='SocketIO 비동기 모드 (기본: PF_ASYNC_MODE 또는 eventlet)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=1, help='워커 프로세스 수 (2 이상이면 PF_REDIS_URL 필요)')
+    return parser.parse_args()
+
+
+def run_workers(args):
+    """워커 프로세스 N개 실행 (각각 --workers 1로 재실행)"""
+    redis_url = os.environ.get('PF_REDIS_URL')
+    if not redis_url:
+        sys.exit("--workers 2 이상은 PF_REDIS_URL(Redis 메시지 큐/공유 레지스트리)이 필요합니다.")
+
+    # 이전 실행에서 남은 세션/로봇 정보 정리
+    from registry import clear_redis_registries
+    clear_redis_registries(redis_url)
+
+    env = dict(os.environ)
+    env.setdefault('PF_SECRET_KEY', token_hex(32))  # 워커 간 로그인 쿠키 공유
+    procs = []
+    for i in range(args.workers):
+        port = args.port + i
+        procs.append(subprocess.Popen([
+            sys.executable, __file__,
+            '--async-mode', args.async_mode,
+            '--host', args.host,
+            '--port', str(port),
+            '--workers', '1'
+        ], env=env))
+        print(f"워커 {i} 시작: {args.host}:{port} (pid={procs[-1].pid})")
+
+    try:
+        for proc in procs:
+            proc.wait()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.terminate()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.workers > 1:
+        run_workers(args)
+        sys.exit(0)
+
+    # concurrency 모듈이 import 시점에 모드를 읽으므로 먼저 설정
+    os.environ['PF_ASYNC_MODE'] = args.async_mode
+    from concurrency import monkey_patch
+    monkey_patch()
+
+    from app import app, socketio
+
+    # SIGTERM(워커 종료, 서비스 중지)도 정상 종료로 처리해 atexit(쓰기 지연 큐 flush)가 실행되도록 함
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    print(f"서버 시작: {args.host}:{args.port} (async_mode={socketio.async_mode})")
+    if args.async_mode == 'threading':
+        print("⚠️ threading 모드는 개발용 Werkzeug 서버로 실행됩니다. 운영 환경에서는 eventlet 또는 gevent를 사용하세요.")
+        socketio.run(app, host=args.host, port=args.port, debug=False,
+                     allow_unsafe_werkzeug=True, log_output=False)
+    else:
+        socketio.run(app, host=args.host, port=args.port, debug=False, log_output=False)
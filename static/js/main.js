@@ -112,11 +112,13 @@ async function resetDatabase() {
     }
 
     try {
+        // 관리자는 전체 초기화, 일반 사용자는 본인 진행상황만 초기화됨
         const response = await fetch('/api/tutorial/reset', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-            }
+            },
+            body: JSON.stringify({ all: true })
         });
 
         if (response.ok) {
@@ -634,7 +634,7 @@ function initializeCodeFilePopover() {
                             <div style="display: flex; justify-content: space-between; align-items: center;">
                                 <div>
                                     <div style="font-weight: 600; color: #e2e8f0; margin-bottom: 4px;">
-                                        ${file.name}
+                                        ${file.name}${file.shared ? ' <span style="font-size: 11px; color: #a0aec0;">(공용)</span>' : ''}
                                     </div>
                                     <div style="font-size: 12px; color: #a0aec0;">
                                         ${new Date(file.mtime * 1000).toLocaleString()} • ${(file.size / 1024).toFixed(1)}KB
@@ -644,9 +644,9 @@ function initializeCodeFilePopover() {
                                     <button class="btn btn-small btn-success" onclick="loadCodeFile('${file.name}')">
                                         <i class="fas fa-download"></i> 불러오기
                                     </button>
-                                    <button class="btn btn-small btn-danger" onclick="deleteCodeFile('${file.name}')">
+                                    ${file.shared ? '' : `<button class="btn btn-small btn-danger" onclick="deleteCodeFile('${file.name}')">
                                         <i class="fas fa-trash"></i>
-                                    </button>
+                                    </button>`}
                                 </div>
                             </div>
                         `;
@@ -821,7 +821,7 @@ function initializeLoadCodePopover() {
                             <div style="display: flex; justify-content: space-between; align-items: center;">
                                 <div>
                                     <div style="font-weight: 600; color: #e2e8f0; margin-bottom: 4px;">
-                                        ${file.name}
+                                        ${file.name}${file.shared ? ' <span style="font-size: 11px; color: #a0aec0;">(공용)</span>' : ''}
                                     </div>
                                     <div style="font-size: 12px; color: #a0aec0;">
                                         ${new Date(file.mtime * 1000).toLocaleString()} • ${(file.size / 1024).toFixed(1)}KB
@@ -831,9 +831,9 @@ function initializeLoadCodePopover() {
                                     <button class="btn btn-small btn-success" onclick="loadCodeFile('${file.name}')">
                                         <i class="fas fa-download"></i> 불러오기
                                     </button>
-                                    <button class="btn btn-small btn-danger" onclick="deleteCodeFile('${file.name}')">
+                                    ${file.shared ? '' : `<button class="btn btn-small btn-danger" onclick="deleteCodeFile('${file.name}')">
                                         <i class="fas fa-trash"></i>
-                                    </button>
+                                    </button>`}
                                 </div>
                             </div>
                         `;
@@ -30,6 +30,12 @@ function initializeSocket() {
             updateConnectionStatus(false);
             showToast(messages.server_disconnected_msg, 'error', useConsoleDebug);
         });
+        socket.on('connect_error', function(err) {
+            // 서버가 접속 폭주로 입장을 미룬 경우 retry_after 후 재연결
+            if (err.data && err.data.retry_after) {
+                setTimeout(() => socket.connect(), err.data.retry_after * 1000);
+            }
+        });
         //#endregion
 
         //#region execution events
@@ -52,11 +58,26 @@ function initializeSocket() {
             showToast(messages.code_execution_completed_msg, 'success', useConsoleDebug);
             addOutput('execution ended', 'success');
         });
+        socket.on('robot_offline', function(data) {
+            codeRunning = false;
+            updateRunButtons(false);
+            updateExecutionStatus('로봇 연결 끊김');
+            showToast(data.message, 'warning', useConsoleDebug);
+        });
         socket.on('execution_error', function(data) {
             codeRunning = false;
             updateRunButtons(false);
             updateExecutionStatus('오류');
             showToast(messages.code_execution_error_msg + data.error, 'error', useConsoleDebug);
+            // 서버 문법 검사에서 막힌 코드: 오류 줄과 위치 표시
+            if (data.syntax_error) {
+                const err = data.syntax_error;
+                let text = data.error;
+                if (err.text) {
+                    text += '\n    ' + err.text + '\n    ' + ' '.repeat(Math.max(0, (err.column || 1) - 1)) + '^';
+                }
+                addOutput(text, 'error');
+            }
         });
         //#endregion
 
@@ -67,13 +88,26 @@ function initializeSocket() {
         socket.on('stderr', function(data) {
             addOutput(data.output, 'error');
         });
+        // 서버에서 묶어 보낸 stdout/stderr 배치 ([stream, text] 목록, 도착 순서 유지)
+        socket.on('output_batch', function(data, ack) {
+            try {
+                if (!data || !Array.isArray(data.o)) return;
+                const items = data.o.map(([stream, text]) => [text, stream === 'stderr' ? 'error' : 'info']);
+                if (data.dropped) {
+                    items.push([`... 출력이 너무 많아 ${data.dropped}자가 생략되었습니다 ...`, 'warning']);
+                }
+                addOutputBatch(items);
+            } finally {
+                if (typeof ack === 'function') ack();
+            }
+        });
         //#endregion
 
         //#region image_data event, custom_data event
-        socket.on('image_data', function(data) {
-            if (!data || !data.i) return;
-
+        socket.on('image_data', function(data, ack) {
             try {
+                if (!data || !data.i) return;
+
                 // JPEG 바이트 데이터를 Blob으로 변환하여 Blob URL 생성
                 const blob = new Blob([data.i], { type: 'image/jpeg' });
                 const blobUrl = URL.createObjectURL(blob);
@@ -82,12 +116,30 @@ function initializeSocket() {
                 handleImageUpdate(blobUrl, data.w, true);
             } catch (e) {
                 console.error('image_data handling failed:', e);
+            } finally {
+                // 서버는 ack를 받은 뒤에 해당 위젯의 다음(최신) 프레임을 보냄
+                if (typeof ack === 'function') ack();
             }
         });
         socket.on('text_data', function(data) {
             // console.log('Received text_data event:', data);
             if(data.text) {handleTextUpdate(data.text, data.widget_id);} // Widget.js
         });
+        //#endregion
+
+        //#region spectator events
+        socket.on('watch_started', function(data) {
+            showToast(`로봇 ${data.robot_id} 관전을 시작합니다.`, 'info', useConsoleDebug);
+        });
+        socket.on('watch_stopped', function(data) {
+            showToast(`로봇 ${data.robot_id} 관전을 종료했습니다.`, 'info', useConsoleDebug);
+        });
+        socket.on('watch_error', function(data) {
+            showToast(data.error, 'error', useConsoleDebug);
+        });
+        //#endregion
+
+        //#region llm events
         // Optional: backend can broadcast latest LLM answer
         socket.on('llm_answer', function(data){
             try { window.llmLastAnswer = data && data.answer ? String(data.answer) : ''; } catch(_) {}
@@ -97,4 +149,13 @@ function initializeSocket() {
     } catch (error) {
         showToast(messages.socketio_connecting_error_msg, 'error', useConsoleDebug);
     }
+}
+
+// 로봇 스트림 관전 (읽기 전용: 이미지/텍스트/출력/종료 이벤트만 수신)
+function watchRobot(robotId) {
+    if (socket) socket.emit('watch_robot', { robot_id: robotId });
+}
+
+function unwatchRobot(robotId) {
+    if (socket) socket.emit('unwatch_robot', { robot_id: robotId });
 }
\ No newline at end of file
@@ -104,35 +104,58 @@ async function loadTutorialProgress() {
     }
 }
 
-// 튜토리얼 진행상황 저장
-async function saveTutorialProgress(tutorialId, completed) {
+// 튜토리얼 진행상황 저장 (로컬/UI에 먼저 반영하고 서버에는 모아서 일괄 저장)
+const TUTORIAL_SAVE_DELAY = 500;
+let pendingTutorialProgress = {};
+let tutorialSaveTimer = null;
+
+function saveTutorialProgress(tutorialId, completed) {
+    const completedAt = new Date().toISOString();
+
+    // 로컬 상태 업데이트
+    if (completed) {
+        tutorialProgress[tutorialId] = {
+            completed: true,
+            completed_at: completedAt
+        };
+    } else {
+        delete tutorialProgress[tutorialId];
+    }
+
+    // UI 업데이트
+    updateTutorialItemUI(tutorialId, completed);
+
+    pendingTutorialProgress[tutorialId] = {
+        tutorial_id: tutorialId,
+        completed: completed,
+        completed_at: completedAt
+    };
+    clearTimeout(tutorialSaveTimer);
+    tutorialSaveTimer = setTimeout(flushTutorialProgress, TUTORIAL_SAVE_DELAY);
+}
+
+function takePendingTutorialProgress() {
+    clearTimeout(tutorialSaveTimer);
+    tutorialSaveTimer = null;
+    const items = Object.values(pendingTutorialProgress);
+    pendingTutorialProgress = {};
+    return items;
+}
+
+async function flushTutorialProgress() {
+    const items = takePendingTutorialProgress();
+    if (items.length === 0) return;
+
     try {
-        const response = await fetch('/api/tutorial/progress', {
+        const response = await fetch('/api/tutorial/progress/bulk', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({
-                tutorial_id: tutorialId,
-                completed: completed,
-                completed_at: new Date().toISOString()
-            })
+            body: JSON.stringify({ items: items })
         });
-        
-        if (response.ok) {
-            // 로컬 상태 업데이트
-            if (completed) {
-                tutorialProgress[tutorialId] = {
-                    completed: true,
-                    completed_at: new Date().toISOString()
-                };
-            } else {
-                delete tutorialProgress[tutorialId];
-            }
-            
-            // UI 업데이트
-            updateTutorialItemUI(tutorialId, completed);
-        } else {
+
+        if (!response.ok) {
             showToast('진행상황 저장에 실패했습니다.', 'error');
         }
     } catch (error) {
@@ -141,6 +164,15 @@ async function saveTutorialProgress(tutorialId, completed) {
     }
 }
 
+// 페이지를 떠날 때 남은 진행상황 전송
+window.addEventListener('pagehide', () => {
+    const items = takePendingTutorialProgress();
+    if (items.length > 0) {
+        navigator.sendBeacon('/api/tutorial/progress/bulk',
+            new Blob([JSON.stringify({ items: items })], { type: 'application/json' }));
+    }
+});
+
 // 튜토리얼 항목 UI 업데이트
 function updateTutorialItemUI(tutorialId, completed) {
     const tutorialItem = document.querySelector(`[data-tutorial-id="${tutorialId}"]`);
@@ -200,6 +200,22 @@ function addOutput(message, type = 'info') {
     outputContent.scrollTop = outputContent.scrollHeight;
 }
 
+function addOutputBatch(items) {
+    // [message, type] 목록을 한 번의 DOM 갱신/스크롤로 추가
+    const outputContent = document.getElementById('outputContent');
+    const fragment = document.createDocumentFragment();
+
+    for (const [message, type] of items) {
+        const outputItem = document.createElement('div');
+        outputItem.className = `output-item ${type}`;
+        outputItem.textContent = message;
+        fragment.appendChild(outputItem);
+    }
+    outputContent.appendChild(fragment);
+
+    outputContent.scrollTop = outputContent.scrollHeight;
+}
+
 function updateExecutionStatus(status) {
     // executionStatus 텍스트 업데이트
     const statusElement = document.getElementById('executionStatus');
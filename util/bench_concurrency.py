@@ -0,0 +1,104 @@
+"""
+SocketIO 동시 접속/중계 지연 벤치마크
+
+실행 중인 서버에 브라우저 역할 클라이언트 N개와 로봇 역할 클라이언트 1개를 연결하고,
+로봇이 각 브라우저 세션으로 robot_emit_text를 보냈을 때 text_data가 도착하기까지의
+지연(왕복 아님, 서버 중계 포함 단방향)을 측정한다.
+
+    # 터미널 1: 비교할 모드로 서버 실행
+    python run_server.py --async-mode eventlet --port 5000
+
+    # 터미널 2: 벤치마크 실행 (python-socketio[client] 필요)
+    python util/bench_concurrency.py --url http://127.0.0.1:5000 --clients 200 --rounds 20
+
+같은 --clients/--rounds로 threading, eventlet, gevent 모드를 차례로 측정해 비교한다.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import socketio
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def run(url, clients, rounds, interval, transport):
+    latencies = []
+    lock = threading.Lock()
+    browsers = []
+
+    # 1) 브라우저 역할 클라이언트 접속
+    connect_start = time.perf_counter()
+    for _ in range(clients):
+        sio = socketio.Client(reconnection=False)
+
+        def on_text(data, sio=sio):
+            sent_at = float(data.get('text', '0'))
+            with lock:
+                latencies.append(time.perf_counter() - sent_at)
+
+        sio.on('text_data', on_text)
+        sio.connect(url, transports=[transport])
+        browsers.append(sio)
+    connect_elapsed = time.perf_counter() - connect_start
+
+    # 2) 로봇 역할 클라이언트가 모든 브라우저 세션으로 텍스트 전송
+    robot = socketio.Client(reconnection=False)
+    robot.connect(url, transports=[transport])
+    sids = [b.get_sid() for b in browsers]
+
+    send_start = time.perf_counter()
+    for _ in range(rounds):
+        for sid in sids:
+            robot.emit('robot_emit_text', {
+                'session_id': sid,
+                'text': repr(time.perf_counter()),
+                'widget_id': 'Text_0'
+            })
+        time.sleep(interval)
+
+    expected = clients * rounds
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        with lock:
+            if len(latencies) >= expected:
+                break
+        time.sleep(0.05)
+    send_elapsed = time.perf_counter() - send_start
+
+    with lock:
+        ms = [v * 1000 for v in latencies]
+    print("=" * 60)
+    print(f"서버: {url} (transport={transport})")
+    print(f"클라이언트 {clients}개 접속 시간: {connect_elapsed:.2f}s")
+    print(f"수신 {len(ms)}/{expected}개, 처리량 {len(ms) / send_elapsed:.0f} msg/s")
+    if ms:
+        print(f"지연 p50={statistics.median(ms):.1f}ms p90={percentile(ms, 90):.1f}ms "
+              f"p99={percentile(ms, 99):.1f}ms max={max(ms):.1f}ms")
+    print("=" * 60, flush=True)
+
+    # 연결 종료는 측정에서 제외 (Werkzeug 서버는 WebSocket 종료가 느리므로 병렬로 닫음)
+    closers = [threading.Thread(target=sio.disconnect) for sio in browsers + [robot]]
+    for t in closers:
+        t.start()
+    for t in closers:
+        t.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='SocketIO 동시 접속/중계 지연 벤치마크')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.05, help='라운드 간 간격(초)')
+    parser.add_argument('--transport', choices=('websocket', 'polling'), default='websocket')
+    args = parser.parse_args()
+    run(args.url, args.clients, args.rounds, args.interval, args.transport)
@@ -0,0 +1,164 @@
+"""
+동시 로그인 폭주 벤치마크
+
+수업 시작처럼 N명이 동시에 로그인할 때의 로그인 처리량/지연(p50/p99)과, 그동안 Socket.IO 중계
+지연(robot_emit_text -> text_data)이 로그인 전과 비교해 얼마나 늘어나는지 측정한다.
+벤치마크 계정(bench_login_N)은 관리자 계정으로 /api/admin/provision을 통해 미리 만든다.
+
+    # 터미널 1 (해시 비용/작업 수는 환경변수로 조정)
+    PF_PASSWORD_HASH_ITERATIONS=200000 PF_PASSWORD_HASH_WORKERS=2 python run_server.py --port 5000
+
+    # 터미널 2 (python-socketio[client] 필요)
+    python util/bench_login.py --url http://127.0.0.1:5000 --admin admin --admin-password ... --logins 200
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.cookiejar import CookieJar
+
+import socketio
+
+BENCH_PASSWORD = 'bench-login-pw'
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def post_json(opener, url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                 headers={'Content-Type': 'application/json'}, method='POST')
+    try:
+        with opener.open(req) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b'{}')
+
+
+def new_opener():
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+
+def provision(url, admin, admin_password, count):
+    opener = new_opener()
+    status, data = post_json(opener, f"{url}/api/auth/login", {'username': admin, 'password': admin_password})
+    if status != 200:
+        raise SystemExit(f"관리자 로그인 실패 ({status}): {data.get('error')}")
+    users = [{'username': f"bench_login_{i}", 'password': BENCH_PASSWORD} for i in range(count)]
+    status, data = post_json(opener, f"{url}/api/admin/provision", {'users': users})
+    if status != 200:
+        raise SystemExit(f"벤치마크 계정 생성 실패 ({status}): {data.get('error')}")
+    print(f"벤치마크 계정: 새로 생성 {data['created']}명 (나머지는 기존 계정 사용)")
+
+
+class RelayProbe:
+    """로봇 역할 클라이언트가 브라우저 역할 클라이언트로 주기적으로 텍스트를 보내 중계 지연 측정"""
+
+    def __init__(self, url, interval):
+        self.interval = interval
+        self.samples = []   # (보낸 시각, 지연)
+        self._stop = threading.Event()
+        self.browser = socketio.Client(reconnection=False)
+        self.robot = socketio.Client(reconnection=False)
+        self.browser.on('text_data', self._on_text)
+        self.browser.connect(url, transports=['websocket'])
+        self.robot.connect(url, transports=['websocket'])
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _on_text(self, data):
+        sent_at = float(data.get('text', '0'))
+        self.samples.append((sent_at, time.perf_counter() - sent_at))
+
+    def _run(self):
+        sid = self.browser.get_sid()
+        while not self._stop.is_set():
+            self.robot.emit('robot_emit_text', {'session_id': sid, 'text': repr(time.perf_counter()),
+                                                'widget_id': 'Text_0'})
+            time.sleep(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        time.sleep(0.5)
+        self.browser.disconnect()
+        self.robot.disconnect()
+
+    def latencies_ms(self, start, end):
+        return [latency * 1000 for sent_at, latency in self.samples if start <= sent_at < end]
+
+
+def login_burst(url, count):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def login(i):
+        opener = new_opener()
+        barrier.wait()
+        start = time.perf_counter()
+        status, _ = post_json(opener, f"{url}/api/auth/login",
+                              {'username': f"bench_login_{i}", 'password': BENCH_PASSWORD})
+        results[i] = (status, time.perf_counter() - start)
+
+    threads = [threading.Thread(target=login, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def print_latency(label, ms):
+    if ms:
+        print(f"{label}: {len(ms)}개 p50={statistics.median(ms):.1f}ms p99={percentile(ms, 99):.1f}ms max={max(ms):.1f}ms")
+    else:
+        print(f"{label}: 측정값 없음")
+
+
+def run(url, admin, admin_password, logins, baseline, interval):
+    if admin:
+        provision(url, admin, admin_password, logins)
+
+    probe = RelayProbe(url, interval)
+    probe.start()
+    time.sleep(baseline)
+
+    burst_start = time.perf_counter()
+    results = login_burst(url, logins)
+    burst_end = time.perf_counter()
+    probe.stop()
+
+    ok = [elapsed * 1000 for status, elapsed in results if status == 200]
+    failed = len(results) - len(ok)
+
+    print("=" * 60)
+    print(f"서버: {url}, 동시 로그인 {logins}건")
+    print(f"로그인 성공 {len(ok)}, 실패 {failed}, 처리량 {len(ok) / (burst_end - burst_start):.1f} 로그인/s "
+          f"(전체 {burst_end - burst_start:.2f}s)")
+    print_latency("로그인 지연", ok)
+    print_latency("중계 지연 (로그인 전)", probe.latencies_ms(burst_start - baseline, burst_start))
+    print_latency("중계 지연 (로그인 중)", probe.latencies_ms(burst_start, burst_end))
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='동시 로그인 폭주 벤치마크')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--admin', help='벤치마크 계정을 만들 관리자 사용자명 (없으면 기존 계정 사용)')
+    parser.add_argument('--admin-password')
+    parser.add_argument('--logins', type=int, default=100, help='동시 로그인 수')
+    parser.add_argument('--baseline', type=float, default=2.0, help='로그인 전 중계 지연 측정 시간(초)')
+    parser.add_argument('--interval', type=float, default=0.01, help='중계 측정 메시지 간격(초)')
+    args = parser.parse_args()
+    run(args.url.rstrip('/'), args.admin, args.admin_password, args.logins, args.baseline, args.interval)
@@ -0,0 +1,133 @@
+"""
+로봇 재연결 폭주 벤치마크
+
+서버 재시작 직후처럼 로봇 N개가 동시에 접속해 robot_connected를 보내는 상황을 재현한다.
+입장이 미뤄진 로봇(robot_registered의 deferred/retry_after)은 안내받은 시간만큼 기다렸다가
+다시 보낸다. 모든 로봇이 등록될 때까지의 시간, 재시도 수, 등록 실패 수를 출력하고,
+--db를 주면 auth.db에 로봇이 빠짐없이(중복 없이) 기록되었는지 확인한다.
+
+    # 터미널 1
+    python run_server.py --async-mode eventlet --port 5000
+
+    # 터미널 2 (python-socketio[client] 필요)
+    python util/bench_reconnect.py --url http://127.0.0.1:5000 --robots 500 --waves 2 --db static/db/auth.db
+
+첫 번째 파(wave)는 새 로봇 등록(DB 쓰기), 이후 파는 같은 로봇의 재연결(DB 쓰기 없음)을 측정한다.
+"""
+
+import argparse
+import sqlite3
+import statistics
+import threading
+import time
+import uuid
+
+import socketio
+
+
+def connect_robot(url, robot_id, transport, barrier, result, timeout):
+    sio = socketio.Client(reconnection=False)
+    registered = threading.Event()
+    response = {}
+
+    @sio.on('robot_registered')
+    def on_registered(data):
+        response.update(data)
+        registered.set()
+
+    try:
+        sio.connect(url, transports=[transport])
+        barrier.wait()      # 모든 로봇이 접속한 뒤 동시에 등록 요청
+        start = time.perf_counter()
+        while True:
+            registered.clear()
+            response.clear()
+            sio.emit('robot_connected', {
+                'robot_id': robot_id,
+                'robot_name': f"bench-{robot_id[:8]}",
+                'hardware_enabled': False,
+                'robot_version': '1.1.2'
+            })
+            if not registered.wait(timeout):
+                result['error'] = 'timeout'
+                break
+            if response.get('success'):
+                break
+            if not response.get('deferred'):
+                result['error'] = response.get('error', 'unknown')
+                break
+            result['retries'] = result.get('retries', 0) + 1
+            time.sleep(response['retry_after'])
+        result['elapsed'] = time.perf_counter() - start
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        result['client'] = sio
+
+
+def run_wave(url, robot_ids, transport, timeout):
+    barrier = threading.Barrier(len(robot_ids))
+    results = [{} for _ in robot_ids]
+    threads = [threading.Thread(target=connect_robot, args=(url, robot_id, transport, barrier, result, timeout))
+               for robot_id, result in zip(robot_ids, results)]
+    wave_start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wave_elapsed = time.perf_counter() - wave_start
+
+    for result in results:
+        client = result.get('client')
+        if client is not None and client.connected:
+            client.disconnect()
+    return results, wave_elapsed
+
+
+def check_db(path, robot_ids):
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            f"SELECT robot_id, COUNT(*) FROM user_robot_assignments WHERE robot_id IN ({', '.join('?' * len(robot_ids))}) "
+            "GROUP BY robot_id", robot_ids).fetchall()
+    finally:
+        conn.close()
+    counts = dict(rows)
+    missing = [r for r in robot_ids if r not in counts]
+    duplicated = [r for r, n in counts.items() if n > 1]
+    return missing, duplicated
+
+
+def run(url, robots, waves, transport, timeout, db_path):
+    robot_ids = [uuid.uuid4().hex for _ in range(robots)]
+    for wave in range(1, waves + 1):
+        results, wave_elapsed = run_wave(url, robot_ids, transport, timeout)
+        done = [r['elapsed'] * 1000 for r in results if 'elapsed' in r and 'error' not in r]
+        errors = [r['error'] for r in results if 'error' in r]
+        retries = sum(r.get('retries', 0) for r in results)
+
+        print("=" * 60)
+        print(f"파 {wave}/{waves} ({'새 로봇 등록' if wave == 1 else '재연결'}) - 로봇 {robots}개, transport={transport}")
+        print(f"전체 소요 {wave_elapsed:.2f}s (접속 포함), 등록 성공 {len(done)}/{robots}, 실패 {len(errors)}, 재시도 {retries}")
+        if done:
+            print(f"등록 완료 시간 p50={statistics.median(done):.0f}ms max={max(done):.0f}ms")
+        for error in sorted(set(errors))[:5]:
+            print(f"  실패: {error}")
+
+    if db_path:
+        time.sleep(1)   # 쓰기 지연 큐 flush 대기
+        missing, duplicated = check_db(db_path, robot_ids)
+        print(f"DB 확인: 누락 {len(missing)}개, 중복 {len(duplicated)}개")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='로봇 재연결 폭주 벤치마크')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--robots', type=int, default=500)
+    parser.add_argument('--waves', type=int, default=2, help='같은 로봇으로 반복할 동시 접속 횟수')
+    parser.add_argument('--transport', choices=('websocket', 'polling'), default='websocket')
+    parser.add_argument('--timeout', type=float, default=30, help='robot_registered 응답 대기 시간(초)')
+    parser.add_argument('--db', help='등록 결과를 확인할 auth.db 경로 (서버와 같은 머신)')
+    args = parser.parse_args()
+    run(args.url, args.robots, args.waves, args.transport, args.timeout, args.db)
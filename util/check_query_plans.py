@@ -0,0 +1,143 @@
+"""
+주요 쿼리의 인덱스 사용 여부 확인 (EXPLAIN QUERY PLAN)
+
+임시 DB에 마이그레이션을 적용하고 샘플 데이터로 ANALYZE한 뒤, 자주 실행되는 쿼리가
+테이블 전체 스캔(SCAN ...) 없이 인덱스를 사용하는지 검사한다. 하나라도 실패하면 종료 코드 1.
+SQL은 각 모듈의 쿼리 상수(auth/catalog/codeindex/tutorial_bp)를 그대로 사용하므로, 모듈의
+쿼리를 바꾸면 이 검사도 같이 바뀐다 (파라미터만 여기서 채움).
+
+시작 시 한 번 실행하는 전체 적재(RobotCatalog.load, CodeIndex.sync)와 관리자 사용자 검색
+(부분 일치)은 의도적으로 전체를 읽으므로 검사하지 않는다.
+
+    python util/check_query_plans.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import db
+
+# 모듈 import 전에 공유 Database 객체를 임시 디렉터리로 옮김 (tutorial_bp는 import 시 마이그레이션 실행)
+tmp = tempfile.TemporaryDirectory()
+for database in (db.auth_db, db.tutorial_db, db.code_db):
+    database.path = Path(tmp.name) / database.path.name
+
+import auth
+import catalog
+import codeindex
+from blueprints import tutorial_bp
+from migrations import migrate_all
+
+
+def in_list(template, values):
+    """IN (...) 템플릿 쿼리 -> (SQL, 파라미터)"""
+    return template.format(', '.join('?' * len(values))), tuple(values)
+
+
+AUTH_QUERIES = {
+    "get_password_row": (auth.PASSWORD_ROW_SQL, ('u1',)),
+    "비밀번호 해시 교체": (auth.REPLACE_PASSWORD_HASH_SQL, ('x', 1, 'x')),
+    "get_user (id)": (auth.USER_BY_ID_SQL, (1,)),
+    "get_user (username)": (auth.USER_BY_USERNAME_SQL, ('u1',)),
+    "update_last_login": (auth.UPDATE_LAST_LOGIN_SQL, ('2024-01-01', 1)),
+    "append_robot_to_db (미할당 로봇 UPSERT)": (auth.UPSERT_UNASSIGNED_ROBOT_SQL, ('n1', 'r1')),
+    "register_robot (없는 로봇만 등록)": (auth.INSERT_ROBOT_IF_MISSING_SQL, ('n1', 'r1', 'r1')),
+    "_assign_robot (사용자의 활성 로봇)": (auth.ACTIVE_ROBOTS_FOR_USER_SQL, (1,)),
+    "_assign_robot (사용자 할당 비활성화)": (auth.DEACTIVATE_USER_ASSIGNMENTS_SQL, (1,)),
+    "_assign_robot (다른 사용자 할당 비활성화)": (auth.DEACTIVATE_OTHER_ASSIGNMENTS_SQL, ('r1', 1)),
+    "_assign_robot (할당)": (auth.ASSIGN_ROBOT_SQL, (1, 'r1', 'n1')),
+    "deactivate_robot_assignment": (auth.DEACTIVATE_ROBOT_SQL, ('r1',)),
+    "delete_robot_from_db": (auth.DELETE_ROBOT_SQL, ('r1',)),
+    "get_users_by_ids": in_list(auth.USERS_BY_IDS_SQL, (1, 2, 3)),
+    "get_existing_usernames": in_list(auth.EXISTING_USERNAMES_SQL, ('u1', 'u2')),
+    "로봇 카탈로그 행 다시 읽기": in_list(catalog.ROBOT_ROWS_SQL, ('r1', 'r2')),
+}
+
+TUTORIAL_QUERIES = {
+    "진행상황 저장": (tutorial_bp.PROGRESS_UPSERT_SQL, ('1', 't1', None)),
+    "진행상황 삭제 (미완료)": (tutorial_bp.PROGRESS_DELETE_SQL, ('1', 't1')),
+    "진행상황 조회": (tutorial_bp.PROGRESS_SELECT_SQL, ('1',)),
+    "진행상황 초기화": (tutorial_bp.PROGRESS_RESET_SQL, ('1',)),
+}
+
+SHA = '0' * 64
+CODE_ENTRY = {'owner_id': 1, 'name': 'a.py', 'size': 1, 'mtime_ns': 1, 'sha256': SHA}
+CODE_QUERIES = {
+    "entry": (codeindex.ENTRY_SQL, (1, 'a.py')),
+    "lookup (내 파일, 없으면 공용)": (codeindex.LOOKUP_SQL, (1, codeindex.SHARED_OWNER_ID, 'a.py',
+                                                     codeindex.SHARED_OWNER_ID)),
+    "content": (codeindex.CONTENT_SQL, (SHA,)),
+    "versions": (codeindex.VERSIONS_SQL, (1, 'a.py')),
+    "사용량 (할당량 확인)": (codeindex.USAGE_SQL, (1,)),
+    "저장 - 현재 항목 + 내용 존재": (codeindex.CURRENT_SQL, (1, 'a.py')),
+    "저장 - 파일 UPSERT": (codeindex.UPSERT_FILE_SQL, CODE_ENTRY),
+    "저장 - 버전 기록": (codeindex.INSERT_VERSION_SQL, CODE_ENTRY),
+    "저장 - 오래된 버전": (codeindex.EXPIRED_VERSIONS_SQL, (1, 'a.py', codeindex.CODE_HISTORY_LIMIT)),
+    "저장 - 오래된 버전 삭제": (codeindex.DELETE_VERSION_SQL, (1, 'a.py', 1)),
+    "삭제 - 버전 해시": (codeindex.VERSION_SHAS_SQL, (1, 'a.py')),
+    "삭제 - 버전 기록": (codeindex.DELETE_VERSIONS_SQL, (1, 'a.py')),
+    "삭제 - 파일 크기": (codeindex.FILE_SIZE_SQL, (1, 'a.py')),
+    "삭제 - 파일": (codeindex.DELETE_FILE_SQL, (1, 'a.py')),
+    "사용량 갱신": (codeindex.ADD_USAGE_SQL, (1, 1, 1)),
+    "참조 없는 내용 정리": (codeindex.COLLECT_SQL, (SHA, SHA)),
+}
+# 파일 목록: 사용자(내 파일 + 공용 파일) / 공용 네임스페이스, 전체 / 앞부분 검색
+for owner_id, owner in ((1, "사용자"), (codeindex.SHARED_OWNER_ID, "공용")):
+    for prefix in (None, 'ab'):
+        count_sql, rows_sql, params = codeindex.page_sql(owner_id, prefix)
+        params.update(limit=50, offset=0)
+        label = f"파일 목록 ({owner}{', 앞부분 검색' if prefix else ''})"
+        CODE_QUERIES[label] = (rows_sql, params)
+        if count_sql:
+            CODE_QUERIES[f"{label} 전체 수"] = (count_sql, params)
+
+
+def seed():
+    with db.auth_db.connection() as conn:
+        conn.executemany("INSERT INTO users (username, password_hash, role) VALUES (?, 'x', 'user')",
+                         [(f"u{i}",) for i in range(2000)])
+        conn.executemany('''
+            INSERT INTO user_robot_assignments (user_id, robot_name, robot_id, is_active)
+            VALUES (?, ?, ?, ?)
+        ''', [(i % 500, f"n{i}", f"r{i}", i % 3 == 0) for i in range(5000)])
+        conn.execute('ANALYZE')
+    with db.code_db.connection() as conn:
+        conn.executemany('''
+            INSERT INTO custom_code_files (owner_id, name, size, mtime_ns, sha256) VALUES (?, ?, 1, ?, ?)
+        ''', [(i % 200, f"f{i}.py", i, SHA) for i in range(5000)])
+        conn.execute('ANALYZE')
+
+
+def check(database, queries) -> int:
+    failures = 0
+    with database.connection() as conn:
+        for name, (sql, params) in queries.items():
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            # 단순 INSERT는 계획이 비어 있음, SCAN CONSTANT ROW는 SELECT 상수 행 (테이블 스캔 아님)
+            uses_index = all(not step.startswith('SCAN') or ' USING ' in step or step == 'SCAN CONSTANT ROW'
+                             for step in plan)
+            status = 'OK  ' if uses_index else 'FAIL'
+            failures += not uses_index
+            print(f"[{status}] {name}")
+            for step in plan:
+                print(f"         {step}")
+        conn.rollback()
+    return failures
+
+
+if __name__ == "__main__":
+    with tmp:
+        migrate_all()
+        seed()
+
+        failures = (check(db.auth_db, AUTH_QUERIES) + check(db.tutorial_db, TUTORIAL_QUERIES)
+                    + check(db.code_db, CODE_QUERIES))
+        for database in (db.auth_db, db.tutorial_db, db.code_db):
+            database.close_all()
+
+    print("=" * 60)
+    print("모든 쿼리가 인덱스를 사용합니다." if not failures else f"인덱스를 사용하지 않는 쿼리 {failures}개")
+    sys.exit(1 if failures else 0)
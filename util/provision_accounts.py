@@ -0,0 +1,77 @@
+"""
+수업용 계정 일괄 생성 CLI
+
+CSV 또는 JSON 파일의 사용자(및 로봇 할당)를 실행 중인 서버의 /api/admin/provision으로 보내고
+행별 결과를 출력한다. 관리자 계정으로 로그인해서 요청한다.
+
+    python util/provision_accounts.py students.csv --url http://127.0.0.1:5000 --admin admin
+    python util/provision_accounts.py students.json --report result.csv
+
+CSV 열: username,password,email,role,robot_id,robot_name (username/password 외에는 선택,
+로봇은 robot_id 또는 robot_name 중 하나). JSON은 같은 키를 가진 객체 목록.
+"""
+
+import argparse
+import csv
+import getpass
+import json
+import sys
+import urllib.error
+import urllib.request
+from http.cookiejar import CookieJar
+from pathlib import Path
+
+
+def request_json(opener, url, body: bytes, content_type: str):
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': content_type}, method='POST')
+    try:
+        with opener.open(req) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b'{}')
+
+
+def run(path, url, admin, password, report):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    status, data = request_json(opener, f"{url}/api/auth/login",
+                                json.dumps({'username': admin, 'password': password}).encode(), 'application/json')
+    if status != 200:
+        print(f"로그인 실패 ({status}): {data.get('error')}")
+        return 1
+
+    content_type = 'application/json' if path.suffix.lower() == '.json' else 'text/csv; charset=utf-8'
+    status, data = request_json(opener, f"{url}/api/admin/provision", path.read_bytes(), content_type)
+    if status != 200:
+        print(f"일괄 생성 실패 ({status}): {data.get('error')}")
+        return 1
+
+    for result in data['results']:
+        if result['status'] == 'created':
+            robot = f" 로봇 {result['robot_id']}" if result.get('robot_id') else ''
+            print(f"[OK  ] {result['row']:>4} {result['username']} (ID: {result['user_id']}){robot}")
+        else:
+            print(f"[FAIL] {result['row']:>4} {result['username']}: {result['error']}")
+    print("=" * 60)
+    print(f"생성 {data['created']}명, 실패 {data['failed']}명")
+
+    if report:
+        with open(report, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['row', 'username', 'status', 'user_id', 'robot_id', 'error'])
+            writer.writeheader()
+            for result in data['results']:
+                writer.writerow(result)
+        print(f"결과 저장: {report}")
+    return 0 if data['failed'] == 0 else 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='수업용 계정 일괄 생성')
+    parser.add_argument('file', type=Path, help='사용자 목록 CSV 또는 JSON 파일')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--admin', default='admin', help='관리자 사용자명')
+    parser.add_argument('--password', help='관리자 비밀번호 (없으면 입력 요청)')
+    parser.add_argument('--report', help='행별 결과를 저장할 CSV 경로')
+    args = parser.parse_args()
+    sys.exit(run(args.file, args.url.rstrip('/'), args.admin,
+                 args.password or getpass.getpass('관리자 비밀번호: '), args.report))
@@ -0,0 +1,108 @@
+"""
+SQLite 쓰기 지연(write-behind) 큐
+
+요청 경로에 있을 필요 없는 쓰기(마지막 로그인 시각, 튜토리얼 진행상황, 연결 해제 시
+할당 비활성화 등)를 큐에 모아 두었다가 백그라운드 태스크가 한 트랜잭션으로 묶어 commit한다.
+
+  - 큐가 maxsize에 도달하면 submit한 쪽이 직접 flush (메모리 상한, 쓰기 유실 없음)
+  - 프로세스 종료 시(atexit) 남은 쓰기를 모두 commit
+  - 배치 중 하나가 실패하면 나머지는 하나씩 다시 실행
+
+submit()은 deque.append만 하므로 어느 스레드에서 호출해도 된다.
+flush()는 요청/백그라운드 태스크에서만 호출한다 (@offload된 함수 안에서 호출하지 않음).
+"""
+
+from __future__ import annotations
+import atexit
+import threading
+from collections import deque
+
+from concurrency import run_blocking
+from db import auth_db, tutorial_db
+
+WRITE_QUEUE_SIZE = 10000        # 큐 최대 길이
+WRITE_BATCH_SIZE = 500          # 한 트랜잭션에 묶을 최대 쓰기 수
+WRITE_FLUSH_INTERVAL = 0.2      # 백그라운드 flush 주기 (초)
+
+
+class WriteBehindQueue:
+    def __init__(self, db, maxsize: int = WRITE_QUEUE_SIZE, batch_size: int = WRITE_BATCH_SIZE,
+                 interval: float = WRITE_FLUSH_INTERVAL):
+        self.db = db
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.interval = interval
+        self._pending: deque = deque()      # (func, args, on_done)
+        self._flush_lock = threading.Lock() # 배치 commit 순서 보장
+        self._started = False
+        self._closed = False
+
+    def submit(self, func, *args, on_done=None):
+        """func(conn, *args)를 나중에 실행하도록 등록 (on_done(결과)은 commit 후 flush한 스레드에서 호출)"""
+        if self._closed:
+            self._commit_one((func, args, on_done))
+            return
+        if len(self._pending) >= self.maxsize:
+            self.flush()
+        self._pending.append((func, args, on_done))
+
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def start(self, socketio):
+        """백그라운드 flush 태스크 시작 + 종료 시 flush 등록 (한 번만)"""
+        if not self._started:
+            self._started = True
+            socketio.start_background_task(self._run, socketio)
+            atexit.register(self.close)
+
+    def flush(self):
+        """대기 중인 쓰기를 모두 commit"""
+        with self._flush_lock:
+            while self._pending:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                for (_, _, on_done), result in zip(batch, run_blocking(self._commit_batch, batch)):
+                    if on_done:
+                        on_done(result)
+
+    def close(self):
+        """종료 시 남은 쓰기 commit (이벤트 루프/스레드 풀을 거치지 않고 직접 실행)"""
+        self._closed = True
+        count = len(self._pending)
+        while self._pending:
+            self._commit_one(self._pending.popleft())
+        if count:
+            print(f"쓰기 지연 큐 종료: {count}개 쓰기 commit ({self.db.path.name})")
+
+    def _commit_batch(self, batch: list) -> list:
+        try:
+            with self.db.connection() as conn:
+                return [func(conn, *args) for func, args, _ in batch]
+        except Exception as e:
+            print(f"쓰기 지연 배치 commit 오류 ({self.db.path.name}): {e} - 개별 재시도")
+            return [self._commit_one(item, run_callback=False) for item in batch]
+
+    def _commit_one(self, item, run_callback: bool = True):
+        func, args, on_done = item
+        try:
+            with self.db.connection() as conn:
+                result = func(conn, *args)
+        except Exception as e:
+            print(f"쓰기 지연 실행 오류 ({func.__name__}): {e}")
+            return None
+        if run_callback and on_done:
+            on_done(result)
+        return result
+
+    def _run(self, socketio):
+        while True:
+            socketio.sleep(self.interval)
+            try:
+                if self._pending:
+                    self.flush()
+            except Exception as e:
+                print(f"쓰기 지연 큐 flush 오류: {e}")
+
+
+auth_writes = WriteBehindQueue(auth_db)
+tutorial_writes = WriteBehindQueue(tutorial_db)